@@ -15,12 +15,78 @@ except ImportError:
         raise ImportError("Could not import 'LFUCache' from either path.")
 
 try:
-    import aas_util.value_only
+    from embedded_system.aas_api.submodel_registry import SubmodelRegistry, base64url_encode, base64url_decode
 except ImportError:
     try:
-        import embedded_system.aas_util.value_only
+        from aas_api.submodel_registry import SubmodelRegistry, base64url_encode, base64url_decode
     except ImportError:
-        raise ImportError("Could not import 'aas_util' from either path.")
+        raise ImportError("Could not import 'SubmodelRegistry' from either path.")
+
+try:
+    from embedded_system.aas_api.id_short_path_index import IdShortPathIndex, get_children, join_path
+except ImportError:
+    try:
+        from aas_api.id_short_path_index import IdShortPathIndex, get_children, join_path
+    except ImportError:
+        raise ImportError("Could not import 'IdShortPathIndex' from either path.")
+
+try:
+    from embedded_system.aas_api.chunked_response import coalesce
+except ImportError:
+    try:
+        from aas_api.chunked_response import coalesce
+    except ImportError:
+        raise ImportError("Could not import 'coalesce' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series_export import EXPORT_FORMATS
+except ImportError:
+    try:
+        from submodel_templates.time_series_export import EXPORT_FORMATS
+    except ImportError:
+        raise ImportError("Could not import 'EXPORT_FORMATS' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series_storage import parse_timestamp
+except ImportError:
+    try:
+        from submodel_templates.time_series_storage import parse_timestamp
+    except ImportError:
+        raise ImportError("Could not import 'parse_timestamp' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series_aggregation import aggregate
+except ImportError:
+    try:
+        from submodel_templates.time_series_aggregation import aggregate
+    except ImportError:
+        raise ImportError("Could not import 'aggregate' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series import RecordsCollection, find_records_collection, \
+        query_records, query_storage, find_segment_storage
+except ImportError:
+    try:
+        from submodel_templates.time_series import RecordsCollection, find_records_collection, query_records, \
+            query_storage, find_segment_storage
+    except ImportError:
+        raise ImportError("Could not import 'RecordsCollection' from either path.")
+
+try:
+    from embedded_system.aas_util.value_only import to_value_only, value_only, lexical_value
+except ImportError:
+    try:
+        from aas_util.value_only import to_value_only, value_only, lexical_value
+    except ImportError:
+        raise ImportError("Could not import 'value_only' from either path.")
+
+try:
+    from embedded_system.aas_util.metadata import to_metadata
+except ImportError:
+    try:
+        from aas_util.metadata import to_metadata
+    except ImportError:
+        raise ImportError("Could not import 'to_metadata' from either path.")
 
 try:
     import ujson as ujson
@@ -84,6 +150,12 @@ class MESSAGES:
 
     # endregion
 
+    # region: PAGING
+
+    ERROR_INVALID_PAGING = "Invalid paging parameters, limit must be a positive number and cursor a returned cursor."
+
+    # endregion
+
     # region: SUBMODEL-REFS
 
     SUCCESS_GET_SUBMODEL_REFS = "Successfully retrieved AAS submodel references."
@@ -106,6 +178,19 @@ class MESSAGES:
 
     # endregion
 
+    # region: TIME SERIES
+
+    USAGE_TIME_SERIES_QUERY = "Usage: /aas/submodels/<submodel_identifier>/records?start=<time>&end=<time>" \
+                              "&limit=<count>&latest=<count>&cursor=<cursor>"
+    ERROR_TIME_SERIES_NOT_FOUND = "Submodel has no TimeSeries Records collection."
+    USAGE_TIME_SERIES_AGGREGATION = "Usage: /aas/submodels/<submodel_identifier>/records/aggregate?interval=<time>" \
+                                    "&start=<time>&end=<time>&variables=<name>,<name>"
+    ERROR_TIME_SERIES_NO_STORAGE = "Aggregation and export need a storage backed Records collection."
+    USAGE_TIME_SERIES_EXPORT = "Usage: /aas/submodels/<submodel_identifier>/records/export?format=<csv|ndjson>" \
+                               "&start=<time>&end=<time>"
+
+    # endregion
+
     # region: SUBMODEL ELEMENTS
 
     # Errors
@@ -113,39 +198,226 @@ class MESSAGES:
 
     # Usage
     USAGE_SUBMODEL_ELEMENT = "Usage: /aas/submodels/<submodel_identifier>/submodel-elements/<idShortPath>"
+    USAGE_BATCH_READ = "Usage: a JSON list of [<submodel_identifier>, <idShortPath>, <modifier>] items."
+    USAGE_BULK_PATCH = "Usage: a JSON object of <submodel_identifier>.<idShortPath>: <value> updates."
 
     # Success
     SUCCESS_GET_SUBMODEL_ELEMENT = "Successfully retrieved submodel element from AAS environment."
     SUCCESS_CREATE_SUBMODEL_ELEMENT = "Successfully created submodel element in AAS environment."
     SUCCESS_UPDATE_SUBMODEL_ELEMENT = "Successfully updated submodel element in AAS environment."
     SUCCESS_DELETE_SUBMODEL_ELEMENT = "Successfully deleted submodel element from AAS environment."
+    SUCCESS_BULK_PATCH = "Successfully updated all properties."
+
+    # Errors
+    ERROR_BULK_PATCH = "No property was updated, see errors for the invalid updates."
+    ERROR_READ_ONLY_PROPERTY = "Property is read-only."
 
     # endregion
 
 
 class AasApi:
-    # region: cache
-    id_short_path_cache = LFUCache(10)
+    """
+    Implements the AAS API operations on an environment.
+
+    Read operations (get_*, export_time_series) return the encoded JSON response body as bytes,
+    or a generator of byte chunks where a `chunk_size` is given. Everything else, i.e. errors
+    of read operations, results of write operations and metrics, is returned as a dict like the
+    ones of `generate_response_message`, whose "code" is the HTTP status. Handlers can pass any
+    result through `encode_response` to get the body as bytes.
+    """
 
-    # endregion
     def __init__(self, aas: aas_types.Environment, debug=False, cache=True):
         self.aas = aas
         self.debug = debug
         self.cache = cache
+        self.submodel_registry = SubmodelRegistry(self.aas.submodels)
+        self.id_short_path_index = IdShortPathIndex()
+
+        # region: cache
+        self.id_short_path_cache = LFUCache(10)
+
+        # Encoded GET responses as (version, bytes), keyed by "aas" or tuples starting with the submodel,
+        # like (submodel, serialization modifier) and (submodel, "$metadata", idShortPath)
+        self.response_cache = LFUCache(16)
+
+        # Encoded full JSON of every submodel as (version, bytes), spliced together for GET /aas
+        self.submodel_fragments = {}
+
+        # Bumped whenever elements of a submodel are added, removed or replaced through the API
+        self.submodel_structure_versions = {}
+
+        # Bumped on every change of a submodel through the API, including value updates
+        self.submodel_versions = {}
+
+        # Bumped on every change of the environment through the API
+        self.environment_version = 0
+
+        # (TimeSeries submodel, its structure version, idShortPath and Records collection), see get_time_series_records
+        self.time_series_handle = None
+
+        # endregion
+
+    # region: versioning
+    def get_submodel_structure_version(self, submodel):
+        return self.submodel_structure_versions.get(submodel, 0)
+
+    def get_submodel_version(self, submodel):
+        return self.submodel_versions.get(submodel, 0)
+
+    def submodel_changed(self, submodel, structural=True):
+        """
+        Marks `submodel` as changed, which invalidates cached responses for it. Structural
+        changes (elements added, removed or replaced) also invalidate cached lookups into it,
+        value updates do not. Cached entries of other submodels stay valid.
+        """
+        self.submodel_versions[submodel] = self.get_submodel_version(submodel) + 1
+        if structural:
+            self.submodel_structure_versions[submodel] = self.get_submodel_structure_version(submodel) + 1
+        self.environment_version += 1
+
+    def submodel_removed(self, submodel):
+        """Forgets everything derived from a submodel that was deleted or replaced."""
+        self.submodel_versions.pop(submodel, None)
+        self.submodel_structure_versions.pop(submodel, None)
+        self.id_short_path_index.drop(submodel)
+        self.submodel_fragments.pop(submodel, None)
+        # Cached responses are keyed by (submodel, variant, ...), including the $metadata of its elements
+        for key in self.response_cache.keys():
+            if isinstance(key, tuple) and key[0] is submodel:
+                self.response_cache.remove(key)
+        self.environment_version += 1
+
+    def invalidate(self):
+        """
+        Drops all caches and indexes. Call it after the environment was modified without going
+        through the API, e.g. by calling template methods on it directly, as cached responses of
+        the changed submodels would be served otherwise. idShortPath lookups do not need it, they
+        detect elements that were removed or replaced and resolve the path again.
+        """
+        self.submodel_registry.rebuild(self.aas.submodels)
+        self.id_short_path_index.clear()
+        self.id_short_path_cache.clear()
+        self.response_cache.clear()
+        self.submodel_fragments = {}
+        self.submodel_structure_versions = {}
+        self.submodel_versions = {}
+        self.time_series_handle = None
+        self.environment_version += 1
+
+    @staticmethod
+    def encode_response(response):
+        """Returns the body of a result of any operation as bytes, see the class documentation."""
+        if isinstance(response, bytes):
+            return response
+        return ujson.dumps(response).encode('utf-8')
+
+    def get_cached_response(self, key, version, build_jsonable):
+        """
+        Returns the encoded response for `key` if it was built at `version`, otherwise encodes
+        `build_jsonable()` and caches the bytes for the next request.
+        """
+        if self.cache:
+            cached = self.response_cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        response = ujson.dumps(build_jsonable()).encode('utf-8')
+        if self.cache:
+            self.response_cache.put(key, (version, response))
+        return response
+
+    def get_submodel_fragment(self, submodel):
+        """Returns the encoded full JSON of `submodel`, re-encoding it only if it changed since the last call."""
+        version = self.get_submodel_version(submodel)
+        cached = self.submodel_fragments.get(submodel)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        fragment = aas_jsonization.to_json_bytes(submodel)
+        if self.cache:
+            self.submodel_fragments[submodel] = (version, fragment)
+        return fragment
+
+    def serialize_environment(self):
+        """
+        Encodes the environment like ``ujson.dumps(to_jsonable(self.aas))``, but splices in the cached
+        fragments of unchanged submodels. Only submodels changed since the last call are serialized
+        again, so the cost follows the size of the change instead of the size of the environment.
+        """
+        parts = []
+
+        if self.aas.asset_administration_shells is not None:
+            shells = [aas_jsonization.to_jsonable(shell) for shell in self.aas.asset_administration_shells]
+            parts.append(b'"assetAdministrationShells": ' + ujson.dumps(shells).encode('utf-8'))
+
+        if self.aas.submodels is not None:
+            fragments = [self.get_submodel_fragment(submodel) for submodel in self.aas.submodels]
+            parts.append(b'"submodels": [' + b', '.join(fragments) + b']')
+
+        if self.aas.concept_descriptions is not None:
+            concept_descriptions = [aas_jsonization.to_jsonable(concept_description)
+                                    for concept_description in self.aas.concept_descriptions]
+            parts.append(b'"conceptDescriptions": ' + ujson.dumps(concept_descriptions).encode('utf-8'))
+
+        return b'{' + b', '.join(parts) + b'}'
+
+    def iterate_environment(self, chunk_size=512):
+        """
+        Yields the same bytes as `serialize_environment` in chunks of about `chunk_size` bytes.
+        Cached fragments are sent as they are, everything else is serialized piece by piece
+        while sending, so neither the whole environment nor a large submodel is held in RAM.
+        """
+        version = (self.environment_version, len(self.aas.submodels or []))
+        if self.cache:
+            cached = self.response_cache.get("aas")
+            if cached is not None and cached[0] == version:
+                yield cached[1]
+                return
+
+        yield from coalesce(self._environment_pieces(chunk_size), chunk_size)
+
+    def iterate_submodel(self, submodel, chunk_size=512):
+        """Yields the full JSON of `submodel` in chunks, using its cached fragment if it is up to date."""
+        cached = self.submodel_fragments.get(submodel)
+        if cached is not None and cached[0] == self.get_submodel_version(submodel):
+            yield cached[1]
+            return
+
+        for chunk in aas_jsonization.iterate(submodel, chunk_size):
+            yield chunk.encode('utf-8')
+
+    def _environment_pieces(self, chunk_size):
+        sep = b'{'
+        for key, instances in ((b'"assetAdministrationShells": ', self.aas.asset_administration_shells),
+                               (b'"submodels": ', self.aas.submodels),
+                               (b'"conceptDescriptions": ', self.aas.concept_descriptions)):
+            if instances is None:
+                continue
+            yield sep + key + b'['
+            sep = b', '
+            for index, instance in enumerate(instances):
+                if index > 0:
+                    yield b', '
+                if isinstance(instance, aas_types.Submodel):
+                    yield from self.iterate_submodel(instance, chunk_size)
+                else:
+                    for chunk in aas_jsonization.iterate(instance, chunk_size):
+                        yield chunk.encode('utf-8')
+            yield b']'
+        yield b'}' if sep == b', ' else b'{}'
+
+    # endregion
 
     # region: search methods
-    def does_submodel_exist(self, id_short):
-        for submodel in self.aas.submodels:
-            if submodel.id_short == id_short:
-                return True
-        return False
+    def does_submodel_exist(self, identifier):
+        """Checks by id, id_short or the base64url form of either."""
+        self.submodel_registry.sync(self.aas.submodels)
+        return self.submodel_registry.exists(identifier)
 
     def get_submodel_by_identifier(self, identifier):
-        for submodel in self.aas.submodels:
-            if submodel.id_short == identifier or self.base64url_encode(submodel.id_short) == identifier:
-                return submodel
-
-        return None
+        """Resolves a submodel by id, id_short or the base64url form of either."""
+        self.submodel_registry.sync(self.aas.submodels)
+        return self.submodel_registry.get(identifier)
 
     # endregion
 
@@ -153,89 +425,106 @@ class AasApi:
 
     def get_submodel_from_id_short_path(self, id_short_path, submodel: aas_types.Submodel = None):
 
+        if submodel is not None:
+            return None
+
+        found_submodel, element_path = self.split_id_short_path(id_short_path)
+        if found_submodel is None or element_path is None:
+            return found_submodel
+
+        # Cached entries remember the submodel and its version, entries of changed or removed submodels are stale.
+        # Elements replaced without going through the API are caught by the liveness check of the index.
+        version = self.get_submodel_structure_version(found_submodel)
         if self.cache:
-            if self.id_short_path_cache.exists(id_short_path):
-                return self.id_short_path_cache.get(id_short_path)
-
-        split_id_short = id_short_path.split(".")
-        print("Length of path: ", len(split_id_short))
-        split_id_short = list(reversed(split_id_short))
-        print(split_id_short)
-
-        if submodel is None:
-            current_lookup = split_id_short.pop()
-            lookup_id_short, lookup_index = get_path_part(current_lookup)
-            print("lookup_id_short", lookup_id_short)
-            print("lookup_index", lookup_index)
-            found_submodel = self.get_submodel_by_identifier(lookup_id_short)
-            if found_submodel is None:
-                print("submodel not found")
-                return None
-            print("submodel found")
-            if len(split_id_short) == 0:
-                print("last in line")
-                return found_submodel
-            else:
-                print("looking for submodel elements")
-                result_found_submodel_element = self.get_submodel_element_from_id_short_path(split_id_short,
-                                                                                             found_submodel)
-                if self.cache:
-                    self.id_short_path_cache.put(id_short_path, result_found_submodel_element)
-                return result_found_submodel_element
+            cached = self.id_short_path_cache.get(id_short_path)
+            if cached is not None:
+                cached_submodel, cached_version, cached_element = cached
+                if (cached_submodel is found_submodel and cached_version == version
+                        and self.id_short_path_index.is_live(found_submodel, element_path, cached_element)):
+                    return cached_element
+                self.id_short_path_cache.remove(id_short_path)
+
+        found = self.get_submodel_element_from_path(found_submodel, element_path)
+        # Only what the index holds can be checked on a hit, views of stored records are not kept
+        if self.cache and found is not None and self.id_short_path_index.is_live(found_submodel, element_path, found):
+            self.id_short_path_cache.put(id_short_path, (found_submodel, version, found))
+        return found
+
+    def split_id_short_path(self, id_short_path):
+        """
+        Splits a full idShortPath like 'TimeSeries.Segments.InternalSegment.Records[3]' into the
+        resolved submodel and the path inside of it ('Segments.InternalSegment.Records[3]').
+        The path is None if the full path only names the submodel.
+        """
+        split_id_short = id_short_path.split(".", 1)
+        lookup_id_short, lookup_index = get_path_part(split_id_short[0])
+        found_submodel = self.get_submodel_by_identifier(lookup_id_short)
+        if found_submodel is None and self.debug:
+            print("submodel not found")
+        return found_submodel, split_id_short[1] if len(split_id_short) > 1 else None
+
+    def lookup_id_short_path(self, id_short_path, use_index=True):
+        """
+        Resolves a full idShortPath without going through the LFU cache.
 
-        return None
+        With `use_index=False` only the linear search is used, which is what the lookup speed
+        metric compares against.
+        """
+        found_submodel, element_path = self.split_id_short_path(id_short_path)
+        if found_submodel is None or element_path is None:
+            return found_submodel
+        return self.get_submodel_element_from_path(found_submodel, element_path, use_index)
+
+    def get_submodel_element_from_path(self, submodel, element_path, use_index=None):
+        """
+        Looks up `element_path` in the idShortPath index of `submodel`. Paths the index does not
+        know fall back to the linear search, which also covers the older 'List.List[3]' notation
+        for list items. The index is used by default if caching is enabled, with `cache=False`
+        every lookup is a linear search of the live tree.
+        """
+        if use_index is None:
+            use_index = self.cache
+        if use_index:
+            found = self.id_short_path_index.get(submodel, element_path)
+            if found is not None:
+                return found
+
+        element_path_list = list(reversed(element_path.split(".")))
+        return self.get_submodel_element_from_id_short_path(element_path_list, submodel)
 
     def get_submodel_element_from_id_short_path(self, id_short_path_list: [str], submodel: aas_types.SubmodelElement):
         current_path = id_short_path_list.pop()
-        print("Length of path: ", len(id_short_path_list))
         lookup_id_short, lookup_index = get_path_part(current_path)
-        print("lookup_id_short", lookup_id_short)
-        print("lookup_index", lookup_index)
+        if self.debug:
+            print("lookup_id_short", lookup_id_short, "lookup_index", lookup_index)
         if lookup_id_short is None:
             return None
 
         if isinstance(submodel, aas_types.SubmodelElementList):
-            print("IS submodel element list")
             if lookup_index is None:
-                print("No lookup index for Submodel Element List defined.")
+                if self.debug:
+                    print("No lookup index for Submodel Element List defined.")
                 return None
             else:
                 if len(id_short_path_list) == 0:
-                    print("No more submodel elements")
-
-                    print("Submodel element class: ", submodel.value[lookup_index].__class__)
                     return submodel.value[lookup_index]
                 else:
-                    print("Submodel elements found")
                     return self.get_submodel_element_from_id_short_path(id_short_path_list, submodel.value[lookup_index])
 
-
         if isinstance(submodel, aas_types.SubmodelElementCollection):
-            print("IS submodel element collection")
-            for submodel_element in submodel.value:
+            for submodel_element in submodel.value or []:
                 if submodel_element.id_short == lookup_id_short:
-                    print("Found Submodel element", submodel_element.id_short)
-
                     if len(id_short_path_list) == 0:
-                        print("No more submodel elements")
-
-                        print("Submodel element class: ", submodel_element.__class__)
                         return submodel_element
                     else:
-                        print("Submodel elements found")
                         return self.get_submodel_element_from_id_short_path(id_short_path_list, submodel_element)
 
         if isinstance(submodel, aas_types.Submodel):
-            print("IS submodel element")
-            for submodel_element in submodel.submodel_elements:
+            for submodel_element in submodel.submodel_elements or []:
                 if submodel_element.id_short == lookup_id_short:
-                    print("Found Submodel element", submodel_element.id_short)
                     if len(id_short_path_list) == 0:
-                        print("No more submodel elements")
-                        print("Submodel elements", submodel_element.__class__)
                         return submodel_element
                     else:
-                        print("Submodel elements found")
                         return self.get_submodel_element_from_id_short_path(id_short_path_list, submodel_element)
 
         return None
@@ -268,12 +557,210 @@ class AasApi:
     # endregion
 
     # region: timeseries stuff
+    def get_time_series_records(self):
+        """
+        Returns (submodel, idShortPath, collection) of the TimeSeries Records collection.
+
+        The collection is only searched for on the first call and after structural changes of the
+        TimeSeries submodel made by others, appending records keeps the handle valid. Raises
+        ValueError if the environment has no TimeSeries submodel with a Records collection.
+        """
+        time_series_submodel = self.get_submodel_by_identifier("TimeSeries")
+        handle = self.time_series_handle
+        if (handle is not None and handle[0] is time_series_submodel
+                and handle[1] == self.get_submodel_structure_version(time_series_submodel)):
+            return time_series_submodel, handle[2], handle[3]
+
+        if not isinstance(time_series_submodel, aas_types.Submodel):
+            raise ValueError("TimeSeries submodel does not exist in the environment.")
+        records_path, records_collection = find_records_collection(time_series_submodel)
+        if records_collection is None:
+            raise ValueError("Records collection not found in the TimeSeries submodel.")
+
+        self.time_series_handle = (time_series_submodel, self.get_submodel_structure_version(time_series_submodel),
+                                   records_path, records_collection)
+        return time_series_submodel, records_path, records_collection
+
+    def records_appended(self, time_series_submodel, records_path, records_collection=None):
+        """Invalidates what depends on the records after rows were appended to a storage backed collection."""
+        self.id_short_path_index.container_changed(time_series_submodel, records_path)
+        # Rollup segments of a retention policy only change when a bucket is closed
+        retention = getattr(records_collection, "retention", None)
+        if retention is not None:
+            for segment_id_short in retention.take_changed_segments():
+                self.id_short_path_index.container_changed(
+                    time_series_submodel, "Segments." + segment_id_short + ".Records"
+                )
+        self.submodel_changed(time_series_submodel)
+
+        # Appending does not move the collection, so the handle stays valid
+        handle = self.time_series_handle
+        if handle is not None and handle[0] is time_series_submodel:
+            self.time_series_handle = (time_series_submodel, self.get_submodel_structure_version(time_series_submodel),
+                                       handle[2], handle[3])
+
+    @staticmethod
+    def parse_time(value):
+        """Parses a time or interval parameter, numbers as they are and ISO 8601 date times as epoch seconds."""
+        if value is None or isinstance(value, (int, float)):
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            return float(value)
+        except ValueError:
+            return parse_timestamp(value)
+
+    def find_time_series_records(self, submodel):
+        """Returns the Records collection of a TimeSeries submodel, using the cached handle if it is the one."""
+        handle = self.time_series_handle
+        if handle is not None and handle[0] is submodel:
+            return self.get_time_series_records()[2]
+        return find_records_collection(submodel)[1]
+
+    def get_time_series_aggregation(self, request, submodel_identifier="TimeSeries", interval=None, start=None,
+                                    end=None, variables=None, segment=None):
+        """
+        Returns min, max, mean, count and last value per bucket of `interval` time units for the
+        records with `start` <= Time < `end`, e.g. for trend charts. `variables` selects the
+        variables by name or idShort, as a list or comma separated, by default all but the time
+        are aggregated. See `time_series_aggregation.aggregate` for the format of the buckets.
+        With `segment` the records are read from the storage of that segment.
+        """
+        try:
+            interval = self.parse_time(interval)
+            start = self.parse_time(start)
+            end = self.parse_time(end)
+            if isinstance(variables, str):
+                variables = variables.split(",")
+            if interval is None or interval <= 0:
+                raise ValueError("interval must be positive")
+        except ValueError as e:
+            return self.generate_response_message(MESSAGES.USAGE_TIME_SERIES_AGGREGATION + " " + str(e), code=400)
+
+        submodel = self.get_submodel_by_identifier(submodel_identifier)
+        if not isinstance(submodel, aas_types.Submodel):
+            return self.generate_response_message(MESSAGES.ERROR_SUBMODEL_NOT_FOUND, code=404)
+        storage = self.find_time_series_storage(submodel, segment)
+        if isinstance(storage, dict):
+            return storage
+
+        try:
+            buckets = aggregate(storage, interval, start, end, variables)
+        except ValueError as e:
+            return self.generate_response_message(MESSAGES.USAGE_TIME_SERIES_AGGREGATION + " " + str(e), code=400)
+        return ujson.dumps({"interval": interval, "buckets": buckets}).encode('utf-8')
+
+    def find_time_series_storage(self, submodel, segment=None):
+        """
+        Returns the storage of the records of a TimeSeries submodel, of the segment `segment` if
+        given. Returns a response message if there is none.
+        """
+        if segment is not None:
+            storage = find_segment_storage(submodel, segment)
+            if storage is None:
+                return self.generate_response_message(MESSAGES.ERROR_TIME_SERIES_NOT_FOUND, code=404)
+            return storage
+        records_collection = self.find_time_series_records(submodel)
+        if records_collection is None:
+            return self.generate_response_message(MESSAGES.ERROR_TIME_SERIES_NOT_FOUND, code=404)
+        if not isinstance(records_collection, RecordsCollection):
+            return self.generate_response_message(MESSAGES.ERROR_TIME_SERIES_NO_STORAGE, code=400)
+        return records_collection.storage
+
+    def export_time_series(self, request, submodel_identifier="TimeSeries", format="csv", start=None, end=None,
+                           segment=None, chunk_size=512):
+        """
+        Exports the records with `start` <= Time < `end` as CSV, with a header of the variable
+        idShorts, or as NDJSON, one object per record. Returns a generator of byte chunks of about
+        `chunk_size` bytes, see `time_series_export.EXPORT_CONTENT_TYPES` for the content type.
+
+        Rows are read from the storage a few at a time and formatted straight to bytes, so large
+        exports run in constant memory. Invalid requests return a response message instead.
+        """
+        try:
+            lines = EXPORT_FORMATS[format]
+            start = self.parse_time(start)
+            end = self.parse_time(end)
+        except (KeyError, ValueError) as e:
+            return self.generate_response_message(MESSAGES.USAGE_TIME_SERIES_EXPORT + " " + str(e), code=400)
+
+        submodel = self.get_submodel_by_identifier(submodel_identifier)
+        if not isinstance(submodel, aas_types.Submodel):
+            return self.generate_response_message(MESSAGES.ERROR_SUBMODEL_NOT_FOUND, code=404)
+        storage = self.find_time_series_storage(submodel, segment)
+        if isinstance(storage, dict):
+            return storage
+        return coalesce(lines(storage, start, end), chunk_size)
+
+    def get_time_series_records_in_range(self, request, submodel_identifier="TimeSeries", start=None, end=None,
+                                         limit=None, latest=None, cursor=None, serialization_modifier=None,
+                                         segment=None):
+        """
+        Returns the records of a TimeSeries submodel with `start` <= Time < `end` as an encoded JSON
+        list, oldest first. Both bounds are optional, `latest` keeps only the newest records of the
+        range. With `limit` or `cursor` set, a paged result is returned whose cursor points at the
+        next record, it stays valid while records are appended.
+
+        Records are encoded like the elements of `get_all_submodel_elements`, with $value as their
+        ValueOnly representation keyed by idShort, e.g. {"Record": {"Time": 5, ...}}.
+        Only the records of the result are materialized and encoded. With `segment` the records
+        are read from the storage of that segment, e.g. the file log of an ExternalSegment.
+        """
+        try:
+            start = self.parse_time(start)
+            end = self.parse_time(end)
+            latest = None if latest is None else int(latest)
+            paged = limit is not None or cursor is not None
+            limit, after_sequence = self.parse_paging(limit, cursor)
+            if latest is not None and latest < 0:
+                raise ValueError(latest)
+        except ValueError as e:
+            return self.generate_response_message(MESSAGES.USAGE_TIME_SERIES_QUERY + " " + str(e), code=400)
+
+        submodel = self.get_submodel_by_identifier(submodel_identifier)
+        if not isinstance(submodel, aas_types.Submodel):
+            return self.generate_response_message(MESSAGES.ERROR_SUBMODEL_NOT_FOUND, code=404)
+        if cursor is None:
+            after_sequence = None
+        if segment is not None:
+            storage = find_segment_storage(submodel, segment)
+            if storage is None:
+                return self.generate_response_message(MESSAGES.ERROR_TIME_SERIES_NOT_FOUND, code=404)
+        else:
+            storage = None
+            records_collection = self.find_time_series_records(submodel)
+            if records_collection is None:
+                return self.generate_response_message(MESSAGES.ERROR_TIME_SERIES_NOT_FOUND, code=404)
+
+        try:
+            if storage is not None:
+                records, next_sequence = query_storage(storage, start, end, limit, latest, after_sequence)
+            else:
+                records, next_sequence = query_records(records_collection, start, end, limit, latest, after_sequence)
+            if serialization_modifier == "$value":
+                encoded_records = [ujson.dumps(value_only(record)).encode('utf-8') for record in records]
+            else:
+                encoded_records = [aas_jsonization.to_json_bytes(record) for record in records]
+        except Exception as e:
+            return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
+
+        if paged:
+            return self.encode_paged_response(
+                encoded_records, None if next_sequence is None else base64url_encode(str(next_sequence))
+            )
+        return b'[' + b', '.join(encoded_records) + b']'
+
     def add_record_to_time_series(self, timestamp, cft, cfdt, cfdp, cfer, statusf1, statusf2, alarmf1, alarmf2,
-                                  alarmf3, max_record_count: int = 10):
+                                  alarmf3, max_record_count: int = None):
         """
         Add a new record to the TimeSeries submodel.
 
-        :param timestamp: The timestamp of the record (e.g., in UNIX format or ISO 8601)
+        :param timestamp: The timestamp of the record, in UNIX format or as ISO 8601 date time. With a
+            storage backed Records collection ISO 8601 is converted to UNIX seconds, see
+            `time_series_storage.parse_timestamp`, other values raise ValueError.
         :param cft = Circulation fluid temperature => 000Bh
         :param cfdt = Circulation fluid discharge temperature => 0000h
         :param cfdp = Circulation fluid discharge pressure => 0002h
@@ -285,44 +772,19 @@ class AasApi:
         :param alarmf3 = Alarm flag 3 => 0007h
         """
         # Get the TimeSeries submodel
-        time_series_submodel = self.get_submodel_by_identifier("TimeSeries")
-        if time_series_submodel is None:
-            raise ValueError("TimeSeries submodel does not exist in the environment.")
-
-        # Locate the "Segments" collection
-        segments_collection = None
-
-        if isinstance(time_series_submodel, aas_types.Submodel):
-            for elem in time_series_submodel.submodel_elements:
-                if elem.id_short == "Segments":
-                    segments_collection = elem
-                    break
-        else:
-            raise ValueError("TimeSeries submodel does not exist in the environment.")
-
-        if segments_collection is None or not isinstance(segments_collection, aas_types.SubmodelElementCollection):
-            raise ValueError("Segments collection not found or invalid in the TimeSeries submodel.")
-
-        # Locate the "InternalSegment" collection within "Segments"
-        internal_segment = None
-        for elem in segments_collection.value:
-            if isinstance(elem, aas_types.SubmodelElementCollection):
-                if elem.id_short == "InternalSegment":
-                    internal_segment = elem
-                    break
-
-        if internal_segment is None or not isinstance(internal_segment, aas_types.SubmodelElementCollection):
-            return None
-
-        # Locate the "Records" collection within "InternalSegment"
-        records_collection = None
-        for elem in internal_segment.value:
-            if elem.id_short == "Records":
-                records_collection = elem
-                break
-
-        if records_collection is None or not isinstance(records_collection, aas_types.SubmodelElementCollection):
-            raise ValueError("Records collection not found in InternalSegment.")
+        time_series_submodel, records_path, records_collection = self.get_time_series_records()
+
+        if isinstance(records_collection, RecordsCollection):
+            # Columnar storage, the Record collections are only materialized when they are read
+            storage = records_collection.storage
+            if max_record_count is not None and storage.capacity != max_record_count:
+                storage.resize(max_record_count)
+            records_collection.append_row((timestamp, cft, cfdt, cfdp, cfer, statusf1, statusf2,
+                                           alarmf1, alarmf2, alarmf3))
+            self.records_appended(time_series_submodel, records_path, records_collection)
+            if self.debug:
+                print(f"Added new record with timestamp {timestamp} and temperature {cft}.")
+            return
 
         # Create the new Record collection
         new_record = aas_types.SubmodelElementCollection(
@@ -389,36 +851,97 @@ class AasApi:
 
         if records_collection.value is None:
             return None
-        # Add the new record to the "Records" collection
+        # Add the new record to the "Records" collection, evicting the oldest one when full
+        if max_record_count is None:
+            max_record_count = 10
         if len(records_collection.value) > max_record_count:
-            records_collection.value.pop()
-        records_collection.value.append(new_record)
-        print(f"Added new record with timestamp {timestamp} and temperature {cft}.")
+            for position, element in enumerate(records_collection.value):
+                if isinstance(element, aas_types.SubmodelElementCollection):
+                    del records_collection.value[position]
+                    break
+            records_collection.value.append(new_record)
+            self.id_short_path_index.container_changed(time_series_submodel, records_path)
+        else:
+            records_collection.value.append(new_record)
+            self.id_short_path_index.element_added(time_series_submodel, records_path, new_record)
+        self.submodel_changed(time_series_submodel)
+        self.time_series_handle = (time_series_submodel, self.get_submodel_structure_version(time_series_submodel),
+                                   records_path, records_collection)
+        if self.debug:
+            print(f"Added new record with timestamp {timestamp} and temperature {cft}.")
 
-    # endregion
+    def add_records_to_time_series(self, rows=None, columns=None, max_record_count: int = None):
+        """
+        Add many records to the TimeSeries submodel at once, e.g. a burst of polled samples.
 
-    # region: Encoding
-    def base64url_encode(self, data: str) -> str:
-        # Convert the input string to bytes
-        byte_data = data.encode("utf-8")
+        The records are given either as `rows`, a list of tuples in the order of the arguments of
+        `add_record_to_time_series`, or as `columns`, one sequence of values per variable, either
+        in that order or as a dict keyed by the variable names ('timestamp', 'cft', ...).
 
-        # Base64 encode the bytes
-        base64_bytes = ubinascii.b2a_base64(byte_data).strip()  # Strip newline
+        With a storage backed Records collection the batch is appended in one go, evicting once and
+        invalidating caches once. Otherwise the records are added one by one. Raises ValueError if
+        the batch does not fit the variables, nothing is added then.
+        """
+        time_series_submodel, records_path, records_collection = self.get_time_series_records()
+
+        if not isinstance(records_collection, RecordsCollection):
+            if rows is None:
+                if isinstance(columns, dict):
+                    raise ValueError("Columns by variable name need a storage backed Records collection.")
+                rows = list(zip(*columns))
+            for row in rows:
+                self.add_record_to_time_series(*row, max_record_count=max_record_count)
+            return
+
+        storage = records_collection.storage
+        if isinstance(columns, dict):
+            missing = [variable.name for variable in storage.variables if variable.name not in columns]
+            if missing:
+                raise ValueError("Missing columns: " + ", ".join(missing))
+            columns = [columns[variable.name] for variable in storage.variables]
+
+        if max_record_count is not None and storage.capacity != max_record_count:
+            storage.resize(max_record_count)
+        version = storage.version
+        if rows is not None:
+            records_collection.extend_rows(rows)
+        elif columns is not None:
+            records_collection.extend_columns(columns)
+        if storage.version != version:
+            self.records_appended(time_series_submodel, records_path, records_collection)
 
-        # Convert Base64 bytes to a string and make it URL-safe
-        base64_url = base64_bytes.decode("utf-8").replace("+", "-").replace("/", "_").rstrip("=")
+    # endregion
 
-        return base64_url
+    # region: Encoding
+    def base64url_encode(self, data: str) -> str:
+        return base64url_encode(data)
 
     # endregion
 
     # region: Asset Administration Shell
-    def get_asset_administration_shell(self, serialization_modifier=None):
+    def get_asset_administration_shell(self, serialization_modifier=None, chunk_size=None):
+        """
+        Returns the encoded environment. With `chunk_size` set, a generator of byte chunks is
+        returned instead, for servers that send it with chunked transfer encoding. Errors while
+        streaming are raised by the generator, as the response is already on its way.
+        """
+        if chunk_size is not None:
+            return self.iterate_environment(chunk_size)
         try:
-            jsonable = aas_jsonization.to_jsonable(self.aas)
+            # The submodel count catches submodels that were appended without going through the API
+            version = (self.environment_version, len(self.aas.submodels or []))
+            response = None
+            if self.cache:
+                cached = self.response_cache.get("aas")
+                if cached is not None and cached[0] == version:
+                    response = cached[1]
+            if response is None:
+                response = self.serialize_environment()
+                if self.cache:
+                    self.response_cache.put("aas", (version, response))
             if self.debug:
                 print(MESSAGES.SUCCESS_GET_AAS_ENVIRONMENT)
-            return jsonable
+            return response
         except Exception as e:
             return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
 
@@ -426,6 +949,7 @@ class AasApi:
         try:
             aas_aas = aas_jsonization.asset_administration_shell_from_jsonable(request.body)
             self.aas = aas_aas
+            self.invalidate()
             return self.generate_response_message(MESSAGES.SUCCESS_CREATE_AAS_ENVIRONMENT)
         except Exception as e:
             return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e))
@@ -436,21 +960,70 @@ class AasApi:
     def get_asset_information(self, request, serialization_modifier=None):
         try:
             # Since we only have one Shell we return the first one
-            jsonable = aas_jsonization.to_jsonable(self.aas.asset_administration_shells[0].asset_information)
+            encoded = aas_jsonization.to_json_bytes(self.aas.asset_administration_shells[0].asset_information)
             if self.debug:
                 print(MESSAGES.SUCCESS_GET_ASSET_INFORMATION)
-            return jsonable
+            return encoded
         except Exception as e:
             return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
 
     # endregion
 
+    # region: Paging
+    @staticmethod
+    def encode_paged_response(encoded_items, next_cursor):
+        """
+        Joins already encoded items into a paged result like
+        {"paging_metadata": {"cursor": ...}, "result": [...]}. The cursor is left out on the last page.
+        """
+        paging_metadata = b'{}'
+        if next_cursor is not None:
+            paging_metadata = b'{"cursor": ' + ujson.dumps(next_cursor).encode('utf-8') + b'}'
+        return b'{"paging_metadata": ' + paging_metadata + b', "result": [' + b', '.join(encoded_items) + b']}'
+
+    @staticmethod
+    def parse_paging(limit, cursor):
+        """
+        Returns the page size and the position to start at. The page size is None without paging.
+        Cursors are base64url encoded positions. Raises ValueError for invalid values.
+        """
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError(limit)
+        start = 0
+        if cursor is not None:
+            start = int(base64url_decode(cursor))
+            if start < 0:
+                raise ValueError(cursor)
+        return limit, start
+
+    @staticmethod
+    def next_cursor(end, count):
+        return base64url_encode(str(end)) if end < count else None
+
+    # endregion
+
     # region: Submodels
-    def get_all_submodel_references(self):
+    def get_all_submodel_references(self, limit=None, cursor=None):
+        """
+        Returns the references of all submodels as an encoded JSON list.
+
+        With `limit` or `cursor` set, at most `limit` references starting at `cursor` are returned
+        as a paged result, whose cursor points at the first submodel of the next page.
+        """
         try:
+            limit, start = self.parse_paging(limit, cursor)
+        except ValueError:
+            return self.generate_response_message(MESSAGES.ERROR_INVALID_PAGING, code=400)
+
+        try:
+            submodels = self.aas.submodels
+            end = len(submodels) if limit is None else min(start + limit, len(submodels))
+
             # Generate submodel references from the Chiller instance
             submodel_refs = []
-            for submodel in self.aas.submodels:
+            for submodel in submodels[start:end]:
                 submodel_ref = {
                     "idShort": submodel.id_short,
                     "type": "Submodel",
@@ -462,14 +1035,20 @@ class AasApi:
                     ]
                 }
                 submodel_refs.append(submodel_ref)
-            json_data = ujson.dumps(submodel_refs).encode('utf-8')
+            if limit is None and cursor is None:
+                json_data = ujson.dumps(submodel_refs).encode('utf-8')
+            else:
+                json_data = self.encode_paged_response(
+                    [ujson.dumps(submodel_ref).encode('utf-8') for submodel_ref in submodel_refs],
+                    self.next_cursor(end, len(submodels))
+                )
             if self.debug:
                 print(MESSAGES.SUCCESS_GET_SUBMODEL_REFS)
             return json_data
         except Exception as e:
             return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
 
-    def get_submodel(self, request, submodel_identifier, serialization_modifier=None):
+    def get_submodel(self, request, submodel_identifier, serialization_modifier=None, chunk_size=None, level=None):
         """
             Retrieves a submodel from the AAS server based on the provided identifier and optional serialization modifier.
 
@@ -477,19 +1056,28 @@ class AasApi:
             - $value: Returns only the values of the submodel elements
             - $reference: Returns a reference to the submodel
             - $path: Returns the id_short as a path
+            - $metadata: Returns the submodel without the values of its elements
             - None: Returns the complete submodel JSON
 
             Args:
                 request: The incoming request object
                 submodel_identifier (str): The identifier of the submodel to retrieve
                 serialization_modifier (str, optional): Modifier to control the response format.
-                    Valid values are "$value", "$reference", "$path", or None. Defaults to None.
+                    Valid values are "$value", "$reference", "$path", "$metadata" or None. Defaults to None.
+                chunk_size (int, optional): If set, the complete submodel JSON is returned as a
+                    generator of byte chunks of about this size, for chunked transfer encoding.
+                level (str, optional): "core" returns the submodel JSON with its top level elements,
+                    but without their children, "deep" or None the whole tree.
+
+            Encoded responses are cached per submodel and modifier until the submodel is changed
+            through the API, so repeated reads of an unchanged submodel skip serialization.
+            $metadata responses only depend on the structure and survive value updates.
 
             Returns:
-                dict/list: The requested submodel data in the specified format. Format depends on serialization_modifier:
-                    - dict: Complete submodel JSON (default) or $value format
-                    - dict: Reference object for $reference format
-                    - list: Path components for $path format
+                bytes: The requested submodel data as encoded JSON. Format depends on serialization_modifier:
+                    - object: Complete submodel JSON (default) or $value format
+                    - object: Reference object for $reference format
+                    - array: Path components for $path format
                 dict: Error message if the operation fails, with structure:
                     {
                         "message": str,  # Error description
@@ -501,29 +1089,30 @@ class AasApi:
 
             Example:
                 get_submodel(request, "temperature_sensor")
-                {<complete submodel JSON>}
+                b'{<complete submodel JSON>}'
 
                 get_submodel(request, "temperature_sensor", "$value")
-                {<value-only submodel data>}
+                b'{<value-only submodel data>}'
             """
         if submodel_identifier is None:
             return self.generate_response_message(MESSAGES.USAGE_GET_SUBMODEL, code=400)
         else:
-            submodel_exists = self.does_submodel_exist(submodel_identifier)
-            if submodel_exists:
-                found_submodel = self.get_submodel_by_identifier(submodel_identifier)
+            found_submodel = self.get_submodel_by_identifier(submodel_identifier)
+            if found_submodel is not None:
                 if self.debug:
                     print("Submodel found by id_short:", found_submodel.id_short)
+                if serialization_modifier not in ("$value", "$reference", "$path", "$metadata"):
+                    serialization_modifier = None
+                cache_key = (found_submodel, serialization_modifier)
+                version = self.get_submodel_version(found_submodel)
                 if serialization_modifier == "$value":
-                    if found_submodel is not None:
-                        try:
-                            jsonable = aas_jsonization.to_jsonable(found_submodel)
-
-                            return self.convert_to_value_only(jsonable)
-                        except Exception as e:
-                            return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
-                    else:
-                        return self.generate_response_message("Submodel was found but has no value")
+                    try:
+                        return self.get_cached_response(
+                            cache_key, version,
+                            lambda: to_value_only(found_submodel)
+                        )
+                    except Exception as e:
+                        return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
                 if serialization_modifier == "$reference":
                     if found_submodel.id is not None:
                         try:
@@ -536,27 +1125,45 @@ class AasApi:
                                     )
                                 ]
                             )
-                            jsonable = aas_jsonization.to_jsonable(submodel_reference)
+                            response = self.get_cached_response(
+                                cache_key, version, lambda: aas_jsonization.to_jsonable(submodel_reference)
+                            )
                             if self.debug:
-                                print("get_submodel/$value: successfully serialized aas into json")
-                            return jsonable
+                                print("get_submodel/$reference: successfully serialized aas into json")
+                            return response
                         except Exception as e:
                             return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
                     else:
                         return self.generate_response_message("Submodel was found but unable to find reference")
+                if serialization_modifier == "$metadata":
+                    try:
+                        return self.get_cached_response(
+                            cache_key, self.get_submodel_structure_version(found_submodel),
+                            lambda: to_metadata(found_submodel)
+                        )
+                    except Exception as e:
+                        return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
                 if serialization_modifier == "$path":
                     if found_submodel.id_short is not None:
-                        response_json = [
-                            found_submodel.id_short
-                        ]
-                        return response_json
+                        return self.get_cached_response(cache_key, version, lambda: [found_submodel.id_short])
                     else:
                         return self.generate_response_message("Submodel was found but unable to find path")
-                jsonable = aas_jsonization.to_jsonable(found_submodel)
-                return jsonable
+                if level == "core":
+                    try:
+                        return self.get_cached_response(
+                            (found_submodel, "core"), version,
+                            lambda: aas_jsonization.to_jsonable(found_submodel, max_depth=1)
+                        )
+                    except Exception as e:
+                        return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
+                if chunk_size is not None:
+                    return self.iterate_submodel(found_submodel, chunk_size)
+                try:
+                    return self.get_submodel_fragment(found_submodel)
+                except Exception as e:
+                    return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
             else:
-                response_message = "Submodel was found" if submodel_exists else "Submodel was not found"
-                return self.generate_response_message(response_message)
+                return self.generate_response_message("Submodel was not found")
 
     def put_submodel(self, request, submodel_identifier, serialization_modifier=None):
         if submodel_identifier is None:
@@ -569,7 +1176,10 @@ class AasApi:
                     # This will fail if it receives a nested json
                     jsonable = ujson.loads(request.body)
                     submodel_to_put = aas_jsonization.submodel_from_jsonable(jsonable)
-                    found_submodel = submodel_to_put
+                    position = self.aas.submodels.index(found_submodel)
+                    self.aas.submodels[position] = submodel_to_put
+                    self.submodel_registry.replace(found_submodel, submodel_to_put)
+                    self.submodel_removed(found_submodel)
                     return self.generate_response_message("Submodel was found and updated successfully.")
                 except Exception as e:
                     return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e))
@@ -584,6 +1194,8 @@ class AasApi:
             if submodel_exists:
                 found_submodel = self.get_submodel_by_identifier(submodel_identifier)
                 self.aas.submodels.remove(found_submodel)
+                self.submodel_registry.remove(found_submodel)
+                self.submodel_removed(found_submodel)
                 return self.generate_response_message("Submodel was found and deleted successfully.")
             else:
                 return self.generate_response_message("Submodel was not found.")
@@ -591,51 +1203,252 @@ class AasApi:
     # endregion
 
     # region: Submodel Elements
-    def get_submodel_element_by_path(self, request, submodel_identifier, id_short_path, serialization_modifier=None):
-        if submodel_identifier is None or id_short_path is None:
-            return self.generate_response_message(MESSAGES.USAGE_SUBMODEL_ELEMENT)
+    def get_all_submodel_elements(self, request, submodel_identifier, serialization_modifier=None,
+                                  limit=None, cursor=None, id_short_path=None):
+        """
+        Lists the elements of a submodel, or the children of the container at `id_short_path`, as
+        a paged result. Only the elements of the requested page are serialized, so walking a large
+        collection like the TimeSeries Records with a small `limit` keeps every response small.
+
+        Cursors are positions, appending to a collection does not move the following pages.
+        Supported modifiers are $value, $metadata and $path, anything else returns full elements.
+        """
+        if submodel_identifier is None:
+            return self.generate_response_message(MESSAGES.USAGE_SUBMODEL_ELEMENT, code=400)
+        try:
+            limit, start = self.parse_paging(limit, cursor)
+        except ValueError:
+            return self.generate_response_message(MESSAGES.ERROR_INVALID_PAGING, code=400)
+
+        if id_short_path is None:
+            container = self.get_submodel_by_identifier(submodel_identifier)
         else:
-            found_by_path = self.get_submodel_from_id_short_path(submodel_identifier + "." + id_short_path)
-            if found_by_path:
-                if self.debug:
-                    print("Submodel found by found_by_path")
+            container = self.get_submodel_from_id_short_path(submodel_identifier + "." + id_short_path)
+        if container is None:
+            return self.generate_response_message(MESSAGES.ERROR_SUBMODEL_ELEMENT_NOT_FOUND, code=404)
+
+        elements = get_children(container) or []
+        end = len(elements) if limit is None else min(start + limit, len(elements))
+
+        id_short_counts = {}
+        if serialization_modifier == "$path":
+            for element in elements:
+                id_short_counts[element.id_short] = id_short_counts.get(element.id_short, 0) + 1
+
+        try:
+            encoded_elements = []
+            for position in range(start, end):
+                element = elements[position]
                 if serialization_modifier == "$value":
-                    if isinstance(found_by_path, aas_types.Property):
-                        if found_by_path.value is not None:
-                            if self.debug:
-                                print("Found value:", found_by_path.value)
-                            return found_by_path.value
-                    # Here is where I would put my ValueOnly methods IF I HAD ANY
-                    jsonable = aas_jsonization.to_jsonable(found_by_path)
-                    return jsonable
-                if serialization_modifier == "$reference":
-                    return self.generate_response_message("SubmodelElement lookup with $reference is not implemented")
-                if serialization_modifier == "$path":
-                    return [id_short_path]
+                    encoded = ujson.dumps(value_only(element)).encode('utf-8')
+                elif serialization_modifier == "$metadata":
+                    encoded = ujson.dumps(to_metadata(element)).encode('utf-8')
+                elif serialization_modifier == "$path":
+                    parent_path = id_short_path or ""
+                    # Siblings sharing an id_short, like the TimeSeries records, are addressed by position
+                    if (isinstance(container, aas_types.SubmodelElementList) or element.id_short is None
+                            or id_short_counts[element.id_short] > 1):
+                        path = parent_path + "[" + str(position) + "]"
+                    else:
+                        path = join_path(parent_path, element.id_short)
+                    encoded = ujson.dumps(path).encode('utf-8')
+                else:
+                    encoded = aas_jsonization.to_json_bytes(element)
+                encoded_elements.append(encoded)
+            return self.encode_paged_response(encoded_elements, self.next_cursor(end, len(elements)))
+        except Exception as e:
+            return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
 
-                jsonable = aas_jsonization.to_jsonable(found_by_path)
-                return jsonable
+    def get_submodel_element_by_path(self, request, submodel_identifier, id_short_path, serialization_modifier=None,
+                                     level=None):
+        """
+        Returns the element at `id_short_path` as encoded JSON. With $value a Property gives its
+        value as a JSON string, other elements their ValueOnly representation. With level=core
+        the direct children of the element are included, but without their own children.
+        """
+        if submodel_identifier is None or id_short_path is None:
+            return self.generate_response_message(MESSAGES.USAGE_SUBMODEL_ELEMENT, code=400)
+        found_by_path = self.get_submodel_from_id_short_path(submodel_identifier + "." + id_short_path)
+        if not found_by_path:
+            return self.generate_response_message(MESSAGES.ERROR_SUBMODEL_ELEMENT_NOT_FOUND, code=404)
+        if self.debug:
+            print("Submodel found by found_by_path")
+        if serialization_modifier == "$reference":
+            return self.generate_response_message("SubmodelElement lookup with $reference is not implemented")
+        try:
+            found_submodel = self.split_id_short_path(submodel_identifier)[0]
+            return self.encode_submodel_element(found_submodel, found_by_path, id_short_path, serialization_modifier,
+                                                level)
+        except Exception as e:
+            return self.generate_response_message(MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)
+
+    def get_submodel_elements_batch(self, request, items=None):
+        """
+        Reads many submodel elements in one request.
+
+        `items` is a list of (submodel_identifier, id_short_path, serialization_modifier) entries.
+        Without `items` they are read from the JSON request body, either as such triples or as
+        objects with "submodelIdentifier", "idShortPath" and an optional "modifier".
+
+        Returns an encoded JSON list with one result per item, in order. Results are encoded like
+        the single element reads, items that cannot be resolved get an error message. Submodels
+        and paths are only resolved once per batch and repeated items share their encoding.
+        """
+        try:
+            if items is None:
+                items = ujson.loads(request.body)
+            if not isinstance(items, (list, tuple)):
+                raise ValueError("expected a JSON list")
+            items = [self._parse_batch_item(item) for item in items]
+        except Exception as e:
+            return self.generate_response_message(MESSAGES.USAGE_BATCH_READ + " " + str(e), code=400)
+
+        submodels = {}  # submodel_identifier -> submodel
+        elements = {}  # (submodel_identifier, id_short_path) -> element
+        encoded_results = {}  # (submodel_identifier, id_short_path, modifier) -> bytes
+
+        results = []
+        for submodel_identifier, id_short_path, serialization_modifier in items:
+            key = (submodel_identifier, id_short_path, serialization_modifier)
+            encoded = encoded_results.get(key)
+            if encoded is None:
+                if submodel_identifier not in submodels:
+                    submodels[submodel_identifier] = self.get_submodel_by_identifier(submodel_identifier)
+                submodel = submodels[submodel_identifier]
+
+                element_key = (submodel_identifier, id_short_path)
+                if element_key not in elements:
+                    elements[element_key] = None if submodel is None else \
+                        self.get_submodel_element_from_path(submodel, id_short_path)
+                element = elements[element_key]
+
+                if element is None:
+                    message = MESSAGES.ERROR_SUBMODEL_NOT_FOUND if submodel is None \
+                        else MESSAGES.ERROR_SUBMODEL_ELEMENT_NOT_FOUND
+                    encoded = ujson.dumps(self.generate_response_message(message, code=404)).encode('utf-8')
+                else:
+                    try:
+                        encoded = self.encode_submodel_element(
+                            submodel, element, id_short_path, serialization_modifier
+                        )
+                    except Exception as e:
+                        encoded = ujson.dumps(self.generate_response_message(
+                            MESSAGES.ERROR_JSON_SERIALIZATION + str(e), code=500)).encode('utf-8')
+                encoded_results[key] = encoded
+            results.append(encoded)
+
+        return b'[' + b', '.join(results) + b']'
+
+    @staticmethod
+    def _parse_batch_item(item):
+        if isinstance(item, dict):
+            return item["submodelIdentifier"], item["idShortPath"], item.get("modifier")
+        if not isinstance(item, (list, tuple)) or len(item) not in (2, 3):
+            raise ValueError("invalid item " + repr(item))
+        if len(item) == 2:
+            return item[0], item[1], None
+        return item[0], item[1], item[2]
+
+    def encode_submodel_element(self, submodel, element, id_short_path, serialization_modifier=None, level=None):
+        """Encodes a resolved element the way `get_submodel_element_by_path` returns it, as JSON bytes."""
+        if serialization_modifier == "$value":
+            if isinstance(element, aas_types.Property) and element.value is not None:
+                return ujson.dumps(element.value).encode('utf-8')
+            return ujson.dumps(value_only(element)).encode('utf-8')
+        if serialization_modifier == "$reference":
+            return ujson.dumps(self.generate_response_message(
+                "SubmodelElement lookup with $reference is not implemented")).encode('utf-8')
+        if serialization_modifier == "$path":
+            return ujson.dumps([id_short_path]).encode('utf-8')
+        if serialization_modifier == "$metadata":
+            # Cached until elements of the submodel are added, removed or replaced
+            return self.get_cached_response(
+                (submodel, "$metadata", id_short_path),
+                self.get_submodel_structure_version(submodel),
+                lambda: to_metadata(element)
+            )
+        if level == "core":
+            # Only the direct children are included
+            return ujson.dumps(aas_jsonization.to_jsonable(element, max_depth=1)).encode('utf-8')
+        return aas_jsonization.to_json_bytes(element)
 
     def patch_submodel_element_by_path(self, request, submodel_identifier, id_short_path, serialization_modifier=None):
         if submodel_identifier is None or id_short_path is None:
             return {"message": "please use /aas/submodels/<submodel_identifier>/submodel-elements/<idShortPath>"}
         else:
-            found_by_path = self.get_submodel_from_id_short_path(submodel_identifier + "." + id_short_path)
+            full_id_short_path = submodel_identifier + "." + id_short_path
+            found_by_path = self.get_submodel_from_id_short_path(full_id_short_path)
             if found_by_path:
-                print("Submodel found by found_by_path")
+                if self.debug:
+                    print("Submodel found by found_by_path")
                 if serialization_modifier == "$value":
                     if found_by_path.value is not None:
-                        print("x Found value:", found_by_path.value)
-                        print(request.body)
+                        if self.debug:
+                            print("x Found value:", found_by_path.value)
+                            print(request.body)
+                        if getattr(found_by_path, "read_only", False):
+                            return self.generate_response_message(MESSAGES.ERROR_READ_ONLY_PROPERTY, code=400)
                         if request.body and isinstance(found_by_path, aas_types.Property):
-                            print("error ?")
                             found_by_path.value = str(request.body)
-                            print("no error ?")
+                            self.submodel_changed(self.split_id_short_path(full_id_short_path)[0], structural=False)
                             return self.generate_response_message("Successfully updated property")
 
                 jsonable = aas_jsonization.to_jsonable(found_by_path)
                 return jsonable
 
+    def patch_submodel_elements_bulk(self, request, updates=None):
+        """
+        Sets the values of many properties at once.
+
+        `updates` maps full idShortPaths like 'TimeSeries.Segments.InternalSegment.TEST' to the
+        new values. Without `updates` they are read from the JSON request body. Values may be
+        JSON numbers, booleans or strings and are checked against the `value_type` of their
+        Property first. If any update is invalid, nothing is changed and the errors are returned.
+        Caches are invalidated once per affected submodel, as a value update.
+        """
+        try:
+            if updates is None:
+                updates = ujson.loads(request.body)
+            if not isinstance(updates, dict):
+                raise ValueError("expected a JSON object")
+        except Exception as e:
+            return self.generate_response_message(MESSAGES.USAGE_BULK_PATCH + " " + str(e), code=400)
+
+        # Validate everything before the first property is touched
+        changes = []
+        changed_submodels = []
+        errors = {}
+        for full_id_short_path, value in updates.items():
+            submodel, element_path = self.split_id_short_path(full_id_short_path)
+            element = None
+            if submodel is not None and element_path is not None:
+                element = self.get_submodel_element_from_path(submodel, element_path)
+            if not isinstance(element, aas_types.Property):
+                errors[full_id_short_path] = MESSAGES.ERROR_SUBMODEL_ELEMENT_NOT_FOUND if element is None \
+                    else "Only properties can be updated."
+                continue
+            if getattr(element, "read_only", False):
+                errors[full_id_short_path] = MESSAGES.ERROR_READ_ONLY_PROPERTY
+                continue
+            try:
+                changes.append((element, lexical_value(element.value_type, value)))
+            except ValueError as e:
+                errors[full_id_short_path] = "Invalid " + element.value_type.value + " value: " + str(e)
+                continue
+            if submodel not in changed_submodels:
+                changed_submodels.append(submodel)
+
+        if errors:
+            message = self.generate_response_message(MESSAGES.ERROR_BULK_PATCH, code=400)
+            message["errors"] = errors
+            return message
+
+        for element, lexical in changes:
+            element.value = lexical
+        for submodel in changed_submodels:
+            self.submodel_changed(submodel, structural=False)
+        return self.generate_response_message(MESSAGES.SUCCESS_BULK_PATCH + " (" + str(len(changes)) + ")")
+
     # endregion
 
     # region: Metrics
@@ -680,11 +1493,17 @@ class AasApi:
         # Calculate the elapsed time in microseconds
         elapsed_time = time.ticks_diff(end_time, start_time)
 
+        # The same environment through the incremental serializer, which only re-encodes the TimeSeries
+        start_time = time.ticks_us()
+        self.serialize_environment()
+        elapsed_time_incremental = time.ticks_diff(time.ticks_us(), start_time)
+
         # Return a JSON response with the serialization timestamp and the time it took
         return {
             "metric": "json serialization speed",
             "timestamp": time.ticks_us(),  # Current time in microseconds
             "result": elapsed_time,  # Time taken for serialization in microseconds
+            "result_incremental": elapsed_time_incremental,  # Time taken for incremental serialization in microseconds
             "json_size": json_size
         }
 
@@ -699,57 +1518,24 @@ class AasApi:
 
         # Calculate the elapsed time in microseconds
         elapsed_time = time.ticks_diff(end_time, start_time)
+
+        # The same path once through the idShortPath index and once by linear search, both without the LFU cache
+        full_id_short_path = submodel_identifier + "." + id_short_path
+
+        start_time = time.ticks_us()
+        self.lookup_id_short_path(full_id_short_path, use_index=True)
+        elapsed_time_indexed = time.ticks_diff(time.ticks_us(), start_time)
+
+        start_time = time.ticks_us()
+        self.lookup_id_short_path(full_id_short_path, use_index=False)
+        elapsed_time_unindexed = time.ticks_diff(time.ticks_us(), start_time)
+
         return {
             "metric": "idShortPath lookup speed in us",
             "timestamp": time.ticks_us(),  # Current time in microseconds
             "result": elapsed_time,  # Time taken for serialization in microseconds
-            "lookup_success": True if look_up else False
+            "result_indexed": elapsed_time_indexed,  # Index lookup only, in microseconds
+            "result_unindexed": elapsed_time_unindexed,  # Linear search only, in microseconds
+            "lookup_success": isinstance(look_up, bytes)
         }
     # endregion
-
-
-    # region: Helper
-
-    @staticmethod
-    def convert_to_value_only(aas_json):
-        """
-        Tries to convert AAS JSON to ValueOnly notation for MicroPython.
-
-        Args:
-            aas_json (dict): The input AAS JSON structure
-
-        Returns:
-            dict: The ValueOnly notation JSON hopefully
-        """
-
-        def extract_value(json_element):
-            model_type = json_element.get("modelType", "")
-
-            if model_type == "Property":
-                return json_element.get("value")
-
-            elif model_type == "MultiLanguageProperty":
-                values = json_element.get("value", [])
-                if values:
-                    return values[0].get("text")
-                return None
-
-            elif model_type == "SubmodelElementCollection":
-                collection_values = {}
-                for item in json_element.get("value", []):
-                    if "idShort" in item:
-                        collection_values[item["idShort"]] = extract_value(item)
-                return collection_values
-
-            return None
-
-        result = {}
-
-        elements = aas_json.get("submodelElements", [])
-        for element in elements:
-            if "idShort" in element:
-                result[element["idShort"]] = extract_value(element)
-
-        return result
-
-    # endregion
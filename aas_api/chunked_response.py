@@ -0,0 +1,49 @@
+def is_chunked(response):
+    """Tells whether an AasApi handler returned a generator of byte chunks rather than a complete body."""
+    return not isinstance(response, (bytes, bytearray, str, dict, list)) and hasattr(response, "__next__")
+
+
+def coalesce(pieces, chunk_size=512):
+    """Joins small byte pieces into chunks of at least `chunk_size` bytes, the last one may be smaller."""
+    parts = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def encode_chunked(chunks):
+    """
+    Frames byte chunks for 'Transfer-Encoding: chunked'.
+
+    Every chunk is prefixed with its size in hex and terminated by CRLF. Empty chunks are
+    skipped, since a zero sized chunk marks the end of the body.
+    """
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        yield ("%x\r\n" % len(chunk)).encode("utf-8")
+        yield chunk
+        yield b"\r\n"
+    yield b"0\r\n\r\n"
+
+
+def write_chunked(stream, status_line, headers, chunks):
+    """
+    Writes a complete chunked HTTP response to `stream`, which only needs a `write()` method
+    accepting bytes, e.g. a socket. A Content-Length header is dropped, as it cannot be known.
+    """
+    head = status_line + "\r\n"
+    for name, value in headers.items():
+        if name.lower() != "content-length":
+            head += name + ": " + value + "\r\n"
+    head += "Transfer-Encoding: chunked\r\n\r\n"
+    stream.write(head.encode("utf-8"))
+    for framed in encode_chunked(chunks):
+        stream.write(framed)
@@ -0,0 +1,264 @@
+import aas_core3.types as aas_types
+
+
+def get_children(element):
+    """Returns the navigable child elements of a submodel or submodel element, or None for leaves."""
+    if isinstance(element, aas_types.Submodel):
+        return element.submodel_elements
+    if isinstance(element, (aas_types.SubmodelElementCollection, aas_types.SubmodelElementList)):
+        return element.value
+    if isinstance(element, aas_types.Entity):
+        return element.statements
+    if isinstance(element, aas_types.AnnotatedRelationshipElement):
+        return element.annotations
+    return None
+
+
+def join_path(parent_path, id_short):
+    return parent_path + "." + id_short if parent_path else id_short
+
+
+class IdShortPathIndex:
+    """
+    Maps idShortPaths to submodel elements in constant time.
+
+    Keys are relative to their submodel, e.g. 'Segments.InternalSegment.Records[3]' inside
+    the TimeSeries submodel. Children of a SubmodelElementList are addressed by position.
+    Children of a collection are addressed by id_short and, as an alias, by position. When
+    siblings share an id_short (like the 'Record' entries of a TimeSeries), the positional
+    form becomes the canonical one for their subtrees and the id_short only resolves the
+    first of them, like the linear search does.
+
+    The dict of a submodel is only built on the first lookup into it. Afterwards, changes
+    made through the API are patched in with `element_added` and `container_changed`
+    instead of rebuilding the whole submodel. Both expect the canonical path of the
+    container.
+
+    Containers with a true `lazy_children` attribute, like the storage backed TimeSeries
+    Records, are never descended into. Paths below them are resolved from their live children
+    on every lookup, so the index holds none of the views they create.
+
+    Every hit is checked against the live children of its ancestors, so elements that were
+    removed or replaced without going through the API are never returned, the submodel is
+    indexed again instead. Elements added that way are found by the linear search fallback.
+    """
+
+    def __init__(self):
+        # submodel -> (entries, paths of duplicated id_shorts, unexpanded lazy containers,
+        #              (parent path, position) per entry)
+        self.by_submodel = {}
+
+    def get(self, submodel, id_short_path):
+        indexed = self.by_submodel.get(submodel)
+        if indexed is None:
+            indexed = self.build(submodel)
+        found, indexed_path = self._lookup(indexed, id_short_path)
+        if found is not None and not self._is_live(indexed, submodel, indexed_path):
+            # The submodel was changed without going through the API
+            found = self.get_from(self.build(submodel), id_short_path)
+        return found
+
+    def is_live(self, submodel, id_short_path, element):
+        """Returns True if `element` is indexed at `id_short_path` and still part of `submodel` there."""
+        indexed = self.by_submodel.get(submodel)
+        if indexed is None or indexed[0].get(id_short_path) is not element:
+            return False
+        return self._is_live(indexed, submodel, id_short_path)
+
+    @staticmethod
+    def _is_live(indexed, submodel, id_short_path):
+        entries, locations = indexed[0], indexed[3]
+        path = id_short_path
+        while path:
+            location = locations.get(path)
+            if location is None:
+                return False
+            parent_path, position = location
+            parent = entries.get(parent_path) if parent_path else submodel
+            children = get_children(parent)
+            if children is None or position >= len(children) or children[position] is not entries[path]:
+                return False
+            path = parent_path
+        return True
+
+    def build(self, submodel):
+        indexed = ({}, set(), {}, {})
+        self._add_children(indexed, "", submodel)
+        self.by_submodel[submodel] = indexed
+        return indexed
+
+    def drop(self, submodel):
+        """Forgets a submodel, e.g. after it was deleted or replaced."""
+        self.by_submodel.pop(submodel, None)
+
+    def clear(self):
+        self.by_submodel = {}
+
+    def element_added(self, submodel, parent_path, element):
+        """Call after `element` was appended to the container at `parent_path`."""
+        indexed = self.by_submodel.get(submodel)
+        if indexed is None:
+            return
+        entries, duplicated, locations = indexed[0], indexed[1], indexed[3]
+
+        parent = entries.get(parent_path) if parent_path else submodel
+        if parent is None:
+            return
+        if getattr(parent, "lazy_children", False):
+            self.container_changed(submodel, parent_path)
+            return
+        position = len(get_children(parent)) - 1
+        positional_path = parent_path + "[" + str(position) + "]"
+
+        if isinstance(parent, aas_types.SubmodelElementList) or element.id_short is None:
+            if parent_path:
+                entries[positional_path] = element
+                locations[positional_path] = (parent_path, position)
+                self._add_children(indexed, positional_path, element)
+            return
+
+        named_path = join_path(parent_path, element.id_short)
+        if named_path not in entries:
+            entries[named_path] = element
+            locations[named_path] = (parent_path, position)
+            if parent_path:
+                entries[positional_path] = element
+                locations[positional_path] = (parent_path, position)
+            self._add_children(indexed, named_path, element)
+        elif named_path in duplicated:
+            entries[positional_path] = element
+            locations[positional_path] = (parent_path, position)
+            self._add_children(indexed, positional_path, element)
+        else:
+            # First duplicate of this id_short, so the sibling's subtree changes its keys
+            self.container_changed(submodel, parent_path)
+
+    def container_changed(self, submodel, container_path):
+        """
+        Call after children of the container at `container_path` were removed, replaced or
+        reordered. Only the keys below that container are rebuilt.
+        """
+        indexed = self.by_submodel.get(submodel)
+        if indexed is None:
+            return
+        if not container_path:
+            self.build(submodel)
+            return
+        entries, duplicated, lazy, locations = indexed
+
+        dotted = container_path + "."
+        bracketed = container_path + "["
+        stale_keys = [key for key in entries if key.startswith(dotted) or key.startswith(bracketed)]
+        for key in stale_keys:
+            del entries[key]
+            del locations[key]
+            duplicated.discard(key)
+        for key in [key for key in lazy if key.startswith(dotted) or key.startswith(bracketed)]:
+            del lazy[key]
+
+        container = entries.get(container_path)
+        if container is None:
+            return
+        if getattr(container, "lazy_children", False):
+            lazy[container_path] = container
+        else:
+            self._add_children(indexed, container_path, container)
+
+    def get_from(self, indexed, id_short_path):
+        return self._lookup(indexed, id_short_path)[0]
+
+    @classmethod
+    def _lookup(cls, indexed, id_short_path):
+        """
+        Returns the element at `id_short_path` and the indexed path it hangs off, which is the
+        lazy container for paths below one of them.
+        """
+        found = indexed[0].get(id_short_path)
+        if found is not None or not indexed[2]:
+            return found, id_short_path
+        for container_path, container in indexed[2].items():
+            if (len(id_short_path) > len(container_path) and id_short_path.startswith(container_path)
+                    and id_short_path[len(container_path)] in ".["):
+                return cls._walk(container, id_short_path[len(container_path):]), container_path
+        return None, id_short_path
+
+    @staticmethod
+    def _walk(element, relative_path):
+        """Follows a relative path like '[3].Time' from `element` through its live children."""
+        while relative_path and element is not None:
+            children = get_children(element)
+            if not children:
+                return None
+            if relative_path[0] == "[":
+                end = relative_path.find("]")
+                try:
+                    position = int(relative_path[1:end]) if end > 1 else -1
+                except ValueError:
+                    return None
+                if not 0 <= position < len(children):
+                    return None
+                element = children[position]
+                relative_path = relative_path[end + 1:]
+            else:
+                if isinstance(element, aas_types.SubmodelElementList):
+                    return None
+                relative_path = relative_path[1:]
+                end = len(relative_path)
+                for separator in ".[":
+                    separator_index = relative_path.find(separator)
+                    if 0 <= separator_index < end:
+                        end = separator_index
+                id_short = relative_path[:end]
+                element = None
+                for child in children:
+                    if child.id_short == id_short:
+                        element = child
+                        break
+                relative_path = relative_path[end:]
+        return element
+
+    @staticmethod
+    def _add_children(indexed, path, container):
+        entries, duplicated, lazy, locations = indexed
+
+        # Iterative, so deeply nested collections do not hit the recursion limit
+        stack = [(path, container)]
+        while stack:
+            parent_path, parent = stack.pop()
+            children = get_children(parent)
+            if not children:
+                continue
+
+            is_list = isinstance(parent, aas_types.SubmodelElementList)
+            id_short_counts = {}
+            if not is_list:
+                for child in children:
+                    id_short_counts[child.id_short] = id_short_counts.get(child.id_short, 0) + 1
+
+            for position, child in enumerate(children):
+                positional_path = parent_path + "[" + str(position) + "]"
+                if is_list or child.id_short is None:
+                    if not parent_path:
+                        continue
+                    canonical_path = positional_path
+                else:
+                    named_path = join_path(parent_path, child.id_short)
+                    if named_path not in entries:
+                        entries[named_path] = child
+                        locations[named_path] = (parent_path, position)
+                    if id_short_counts[child.id_short] > 1 and parent_path:
+                        duplicated.add(named_path)
+                        canonical_path = positional_path
+                    elif entries[named_path] is child:
+                        canonical_path = named_path
+                    else:
+                        # Shadowed top-level element, not reachable by any path
+                        continue
+
+                if parent_path:
+                    entries[positional_path] = child
+                    locations[positional_path] = (parent_path, position)
+                if getattr(child, "lazy_children", False):
+                    lazy[canonical_path] = child
+                else:
+                    stack.append((canonical_path, child))
@@ -1,54 +1,163 @@
+class _Node:
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.freq = 1
+        self.last_used = 0
+        self.prev = None
+        self.next = None
+
+
+class _NodeList:
+    """Circular doubly-linked list of nodes sharing one frequency, least recently used first."""
+
+    def __init__(self):
+        self.sentinel = _Node(None, None)
+        self.sentinel.prev = self.sentinel
+        self.sentinel.next = self.sentinel
+        self.size = 0
+
+    def append(self, node):
+        last = self.sentinel.prev
+        node.prev = last
+        node.next = self.sentinel
+        last.next = node
+        self.sentinel.prev = node
+        self.size += 1
+
+    def remove(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = None
+        node.next = None
+        self.size -= 1
+
+    def oldest(self):
+        return self.sentinel.next if self.size > 0 else None
+
+
 class LFUCache:
-    def __init__(self, capacity):
+    """
+    Least frequently used cache with O(1) get, put and eviction.
+
+    Entries live in one doubly-linked list per access frequency, so the victim is always
+    the head of the lowest frequency bucket. Among equally frequent entries the least
+    recently used one is evicted first.
+
+    With `decay_interval` set, all frequencies are halved every `decay_interval`
+    operations, so entries that were popular a long time ago can age out. A decay is
+    not O(1): it re-buckets every entry, O(n log n) for n entries, within the operation
+    that triggers it. Spread over the interval that is O(n log n / decay_interval) per
+    operation, so keep the interval well above the capacity.
+    """
+
+    def __init__(self, capacity, decay_interval=0):
         self.capacity = capacity
-        self.cache = {}  # stores key-value pairs
-        self.freq = {}  # stores access frequencies
+        self.decay_interval = decay_interval
+        self.cache = {}  # key -> node
+        self.freq = {}  # access frequency -> _NodeList
+        self.min_freq = 0
+        self.operations = 0
 
     def get(self, key):
-        if key in self.cache:
-            self.freq[key] = self.freq.get(key, 0) + 1
-            print("Cached element found with key: {}".format(key))
-            return self.cache[key]
-        return None
+        node = self.cache.get(key)
+        if node is None:
+            return None
+        self._touch(node)
+        self._tick()
+        return node.value
 
     def exists(self, key):
-        if key in self.cache:
-            print("Cached element found with key: {}".format(key))
-            return True
-        return None
+        return key in self.cache
 
     def put(self, key, value):
         if self.capacity <= 0:
             return
 
         # If key exists, update value and frequency
-        if key in self.cache:
-            self.cache[key] = value
-            self.freq[key] = self.freq.get(key, 0) + 1
+        node = self.cache.get(key)
+        if node is not None:
+            node.value = value
+            self._touch(node)
+            self._tick()
             return
 
-        # If cache is full, remove least frequently used item
+        # If cache is full, remove the least recently used of the least frequently used items
         if len(self.cache) >= self.capacity:
-            # Find key with minimum frequency
-            min_freq = float('inf')
-            lfu_key = None
+            self._evict()
 
-            for k, f in self.freq.items():
-                if f < min_freq:
-                    min_freq = f
-                    lfu_key = k
+        # Add new item
+        node = _Node(key, value)
+        node.last_used = self.operations
+        self.cache[key] = node
+        self._bucket(1).append(node)
+        self.min_freq = 1
+        self._tick()
 
-            if lfu_key:
-                del self.cache[lfu_key]
-                del self.freq[lfu_key]
+    def remove(self, key):
+        node = self.cache.pop(key, None)
+        if node is None:
+            return
+        bucket = self.freq[node.freq]
+        bucket.remove(node)
+        if bucket.size == 0:
+            del self.freq[node.freq]
+            if self.min_freq == node.freq:
+                self.min_freq = min(self.freq) if self.freq else 0
 
-        # Add new item
-        self.cache[key] = value
-        self.freq[key] = 1
+    def keys(self):
+        """Returns a list of the cached keys, e.g. to remove a group of them."""
+        return list(self.cache)
 
     def clear(self):
         self.cache = {}
         self.freq = {}
+        self.min_freq = 0
+        self.operations = 0
+
+    def __len__(self):
+        return len(self.cache)
 
     def __str__(self):
-        return str(self.cache)
+        return str({key: node.value for key, node in self.cache.items()})
+
+    def _bucket(self, freq):
+        bucket = self.freq.get(freq)
+        if bucket is None:
+            bucket = _NodeList()
+            self.freq[freq] = bucket
+        return bucket
+
+    def _touch(self, node):
+        bucket = self.freq[node.freq]
+        bucket.remove(node)
+        if bucket.size == 0:
+            del self.freq[node.freq]
+            if self.min_freq == node.freq:
+                self.min_freq = node.freq + 1
+        node.freq += 1
+        node.last_used = self.operations
+        self._bucket(node.freq).append(node)
+
+    def _evict(self):
+        bucket = self.freq[self.min_freq]
+        node = bucket.oldest()
+        bucket.remove(node)
+        if bucket.size == 0:
+            del self.freq[self.min_freq]
+        del self.cache[node.key]
+
+    def _tick(self):
+        self.operations += 1
+        if self.decay_interval > 0 and self.operations % self.decay_interval == 0:
+            self._decay()
+
+    def _decay(self):
+        # Rebuild the buckets with halved frequencies, keeping recency order within each bucket
+        nodes = list(self.cache.values())
+        nodes.sort(key=lambda item: item.last_used)
+        self.freq = {}
+        for node in nodes:
+            node.freq = max(1, node.freq // 2)
+            self._bucket(node.freq).append(node)
+        self.min_freq = min(self.freq) if self.freq else 0
@@ -0,0 +1,120 @@
+try:
+    import ubinascii as ubinascii
+except ImportError:
+    try:
+        import binascii as ubinascii
+    except ImportError:
+        raise ImportError("Could not import 'ubinascii' from either path.")
+
+
+def base64url_encode(data: str) -> str:
+    """Encodes a string into unpadded base64url, as used for identifiers in the AAS API paths."""
+    base64_bytes = ubinascii.b2a_base64(data.encode("utf-8")).strip()
+    return base64_bytes.decode("utf-8").replace("+", "-").replace("/", "_").rstrip("=")
+
+
+def base64url_decode(data: str) -> str:
+    """Inverse of `base64url_encode`, raises ValueError for malformed input."""
+    padded = data.replace("-", "+").replace("_", "/") + "=" * (-len(data) % 4)
+    try:
+        return ubinascii.a2b_base64(padded.encode("utf-8")).decode("utf-8")
+    except Exception:
+        raise ValueError("Invalid base64url: " + data)
+
+
+class SubmodelRegistry:
+    """
+    Hash index over the submodels of an environment.
+
+    Every submodel can be resolved in constant time by its id, its id_short or the
+    base64url form of either. When two submodels share a key, the one that comes first
+    in the environment wins, just like the linear scan it replaces.
+
+    Submodels added or removed through `add`/`remove`/`replace` are patched into the
+    index directly. Submodels appended to, removed from or replaced in the environment
+    list by other code are picked up on the next lookup, since the registry rebuilds
+    itself whenever the list object or its length changed, every hit is checked to
+    still be at its indexed position and a miss scans the list before it is reported.
+    A submodel renamed in place is found under its new keys, but its old keys keep
+    resolving to it until the next `rebuild`.
+    """
+
+    def __init__(self, submodels=None):
+        self.submodels = None
+        self.count = 0
+        self.by_key = {}  # key -> (position, submodel)
+        self.rebuild(submodels)
+
+    def rebuild(self, submodels):
+        self.submodels = submodels
+        self.by_key = {}
+        if submodels is None:
+            self.count = 0
+            return
+
+        for position, submodel in enumerate(submodels):
+            self._index(submodel, position)
+        self.count = len(submodels)
+
+    def sync(self, submodels):
+        """Rebuilds the index if the submodel list was replaced or resized behind our back."""
+        if submodels is not self.submodels or (submodels is not None and len(submodels) != self.count):
+            self.rebuild(submodels)
+
+    def get(self, identifier):
+        indexed = self.by_key.get(identifier)
+        if indexed is None:
+            return self._find_unindexed(identifier)
+        position, submodel = indexed
+        if position >= len(self.submodels) or self.submodels[position] is not submodel:
+            # Replaced in the list by other code
+            self.rebuild(self.submodels)
+            indexed = self.by_key.get(identifier)
+            return None if indexed is None else indexed[1]
+        return submodel
+
+    def _find_unindexed(self, identifier):
+        """
+        Handles a miss. Submodels replaced in the list by ones with other keys, or renamed, by
+        other code are not indexed under their new keys yet, so the list is scanned before the
+        miss is reported, and the index is rebuilt if the scan finds the submodel.
+        """
+        if self.submodels is None:
+            return None
+        for submodel in self.submodels:
+            if identifier in self._keys(submodel):
+                self.rebuild(self.submodels)
+                indexed = self.by_key.get(identifier)
+                return None if indexed is None else indexed[1]
+        return None
+
+    def exists(self, identifier):
+        return self.get(identifier) is not None
+
+    def add(self, submodel):
+        """Call after `submodel` was appended to the environment."""
+        self._index(submodel, self.count)
+        self.count += 1
+
+    def remove(self, submodel):
+        """Call after `submodel` was removed from the environment."""
+        # The following submodels moved up and a shadowed one may come to light
+        self.rebuild(self.submodels)
+
+    def replace(self, old_submodel, new_submodel):
+        """Call after `old_submodel` was replaced by `new_submodel` at the same position."""
+        self.rebuild(self.submodels)
+
+    def _index(self, submodel, position):
+        for key in self._keys(submodel):
+            if key not in self.by_key:
+                self.by_key[key] = (position, submodel)
+
+    @staticmethod
+    def _keys(submodel):
+        keys = []
+        for identifier in (getattr(submodel, "id_short", None), getattr(submodel, "id", None)):
+            if identifier is not None:
+                keys.append(identifier)
+                keys.append(base64url_encode(identifier))
+        return keys
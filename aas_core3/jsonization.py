@@ -2,6 +2,11 @@ import binascii
 
 import sys
 
+try:
+    import json
+except ImportError:
+    import ujson as json
+
 import aas_core3.common as aas_common
 import aas_core3.stringification as aas_stringification
 import aas_core3.types as aas_types
@@ -7691,6 +7696,1659 @@ class _Serializer(aas_types.AbstractTransformer):
 _SERIALIZER = _Serializer()
 
 
-def to_jsonable(that):
+class _WithoutChildren:
+
+    # Read-only view of an element which hides its children from the serializer,
+    # the element itself is never modified
+    def __init__(self, that, attribute):
+
+        self._that = that
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+
+        if name == self._attribute:
+            return None
+        return getattr(self._that, name)
+
+
+class _DepthLimitedSerializer(_Serializer):
+
+    def __init__(self, max_depth):
+
+        self.max_depth = max_depth
+        self._level = 0
+
+    def transform(self, that):
+
+        if not isinstance(that, (aas_types.Submodel, aas_types.SubmodelElement)):
+            return that.transform(self)
+
+        self._level += 1
+        try:
+            return that.transform(self)
+        finally:
+            self._level -= 1
+
+    def _limited(self, that, attribute):
+
+        # Below the maximum depth the children are left out, as if the element had none
+        if self._level > self.max_depth:
+            return _WithoutChildren(that, attribute)
+        return that
+
+    def transform_submodel(self, that):
+
+        return _Serializer.transform_submodel(
+            self, self._limited(that, "submodel_elements")
+        )
+
+    def transform_submodel_element_list(self, that):
+
+        return _Serializer.transform_submodel_element_list(
+            self, self._limited(that, "value")
+        )
+
+    def transform_submodel_element_collection(self, that):
+
+        return _Serializer.transform_submodel_element_collection(
+            self, self._limited(that, "value")
+        )
+
+    def transform_annotated_relationship_element(self, that):
+
+        return _Serializer.transform_annotated_relationship_element(
+            self, self._limited(that, "annotations")
+        )
+
+    def transform_entity(self, that):
+
+        return _Serializer.transform_entity(self, self._limited(that, "statements"))
+
+
+def to_jsonable(that, max_depth=None):
+
+    if max_depth is None:
+        return _SERIALIZER.transform(that)
+    return _DepthLimitedSerializer(max_depth).transform(that)
+
+
+class _Deferred:
+
+    def __init__(self, instance):
+
+        self.instance = instance
+
+
+_DEFERRED_CLASSES = (
+    aas_types.AssetAdministrationShell,
+    aas_types.Submodel,
+    aas_types.SubmodelElement,
+    aas_types.ConceptDescription,
+)
+
+
+class _ShallowSerializer(_Serializer):
+
+    def __init__(self):
+
+        self._depth = 0
+
+    def transform(self, that):
+
+        if self._depth > 0 and isinstance(that, _DEFERRED_CLASSES):
+            return _Deferred(that)
+
+        self._depth += 1
+        try:
+            return that.transform(self)
+        finally:
+            self._depth -= 1
+
+    def transform_operation_variable(self, that):
+
+        # Keep deferred instances out of nested objects, operation variables are small
+        return _SERIALIZER.transform(that)
+
+
+class _JsonPieces:
+
+    def __init__(self):
+
+        self._shallow_serializer = _ShallowSerializer()
+
+    def of_instance(self, instance):
+
+        jsonable = self._shallow_serializer.transform(instance)
+
+        separator = "{"
+        for key, value in jsonable.items():
+            yield separator + '"' + key + '": '
+            separator = ", "
+
+            if isinstance(value, list) and len(value) > 0 and isinstance(value[0], _Deferred):
+                yield "["
+                for index, item in enumerate(value):
+                    if index > 0:
+                        yield ", "
+                    yield from self.of_instance(item.instance)
+                yield "]"
+            else:
+                yield json.dumps(value)
+        yield "}" if separator == ", " else "{}"
+
+
+def iterate(instance, chunk_size=512):
+
+    parts = []
+    size = 0
+    for piece in _JsonPieces().of_instance(instance):
+        parts.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def write(instance, stream, buffer_size=512):
+
+    for chunk in iterate(instance, buffer_size):
+        stream.write(chunk)
+
+
+def _is_plain_ascii(value):
+
+    return value.isascii() and value.isprintable() and '"' not in value and "\\" not in value
+
+
+try:
+    _is_plain_ascii("")
+except AttributeError:
+    # MicroPython strings lack isascii() and isprintable(), always take the slow path
+    def _is_plain_ascii(value):
+
+        return False
+
+
+def _encode_str(value):
+
+    if _is_plain_ascii(value):
+        return '"' + value + '"'
+    return json.dumps(value)
+
+
+class _Encoder(aas_types.AbstractVisitor):
+
+    def __init__(self):
+
+        self._parts = []
+
+    def visit(self, that):
+
+        method = _ENCODER_DISPATCH.get(type(that))
+        if method is None:
+            method = _resolve_encoder_method(that)
+        method(self, that)
+
+    def _write_list(self, items):
+
+        write = self._parts.append
+        if len(items) == 0:
+            write("[]")
+            return
+
+        sep = "["
+        for item in items:
+            write(sep)
+            method = _ENCODER_DISPATCH.get(type(item))
+            if method is None:
+                method = _resolve_encoder_method(item)
+            method(self, item)
+            sep = ", "
+        write("]")
+
+    def visit_extension(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.semantic_id is not None:
+            write('{"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        write(sep + '"name": ' + _encode_str(that.name))
+
+        if that.value_type is not None:
+            write(', "valueType": ' + '"' + that.value_type.value + '"')
+
+        if that.value is not None:
+            write(', "value": ' + _encode_str(that.value))
+
+        if that.refers_to is not None:
+            write(', "refersTo": ')
+            self._write_list(that.refers_to)
+
+        write("}")
+
+    def visit_administrative_information(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.embedded_data_specifications is not None:
+            write('{"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.version is not None:
+            write(sep + '"version": ' + _encode_str(that.version))
+            sep = ", "
+
+        if that.revision is not None:
+            write(sep + '"revision": ' + _encode_str(that.revision))
+            sep = ", "
+
+        if that.creator is not None:
+            write(sep + '"creator": ')
+            self.visit(that.creator)
+            sep = ", "
+
+        if that.template_id is not None:
+            write(sep + '"templateId": ' + _encode_str(that.template_id))
+            sep = ", "
+
+        write("}" if sep == ", " else "{}")
+
+    def visit_qualifier(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.semantic_id is not None:
+            write('{"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.kind is not None:
+            write(sep + '"kind": ' + '"' + that.kind.value + '"')
+            sep = ", "
+
+        write(sep + '"type": ' + _encode_str(that.type))
+
+        write(', "valueType": ' + '"' + that.value_type.value + '"')
+
+        if that.value is not None:
+            write(', "value": ' + _encode_str(that.value))
+
+        if that.value_id is not None:
+            write(', "valueId": ')
+            self.visit(that.value_id)
+
+        write("}")
+
+    def visit_asset_administration_shell(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.administration is not None:
+            write(sep + '"administration": ')
+            self.visit(that.administration)
+            sep = ", "
+
+        write(sep + '"id": ' + _encode_str(that.id))
+
+        if that.embedded_data_specifications is not None:
+            write(', "embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+
+        if that.derived_from is not None:
+            write(', "derivedFrom": ')
+            self.visit(that.derived_from)
+
+        write(', "assetInformation": ')
+        self.visit(that.asset_information)
+
+        if that.submodels is not None:
+            write(', "submodels": ')
+            self._write_list(that.submodels)
+
+        write(', "modelType": "AssetAdministrationShell"}')
+
+    def visit_asset_information(self, that):
+
+        write = self._parts.append
+
+        write('{"assetKind": ' + '"' + that.asset_kind.value + '"')
+
+        if that.global_asset_id is not None:
+            write(', "globalAssetId": ' + _encode_str(that.global_asset_id))
+
+        if that.specific_asset_ids is not None:
+            write(', "specificAssetIds": ')
+            self._write_list(that.specific_asset_ids)
+
+        if that.asset_type is not None:
+            write(', "assetType": ' + _encode_str(that.asset_type))
+
+        if that.default_thumbnail is not None:
+            write(', "defaultThumbnail": ')
+            self.visit(that.default_thumbnail)
+
+        write("}")
+
+    def visit_resource(self, that):
+
+        write = self._parts.append
+
+        write('{"path": ' + _encode_str(that.path))
+
+        if that.content_type is not None:
+            write(', "contentType": ' + _encode_str(that.content_type))
+
+        write("}")
+
+    def visit_specific_asset_id(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.semantic_id is not None:
+            write('{"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        write(sep + '"name": ' + _encode_str(that.name))
+
+        write(', "value": ' + _encode_str(that.value))
+
+        if that.external_subject_id is not None:
+            write(', "externalSubjectId": ')
+            self.visit(that.external_subject_id)
+
+        write("}")
+
+    def visit_submodel(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.administration is not None:
+            write(sep + '"administration": ')
+            self.visit(that.administration)
+            sep = ", "
+
+        write(sep + '"id": ' + _encode_str(that.id))
+
+        if that.kind is not None:
+            write(', "kind": ' + '"' + that.kind.value + '"')
+
+        if that.semantic_id is not None:
+            write(', "semanticId": ')
+            self.visit(that.semantic_id)
+
+        if that.supplemental_semantic_ids is not None:
+            write(', "supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+
+        if that.qualifiers is not None:
+            write(', "qualifiers": ')
+            self._write_list(that.qualifiers)
+
+        if that.embedded_data_specifications is not None:
+            write(', "embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+
+        if that.submodel_elements is not None:
+            write(', "submodelElements": ')
+            self._write_list(that.submodel_elements)
+
+        write(', "modelType": "Submodel"}')
+
+    def visit_relationship_element(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"first": ')
+        self.visit(that.first)
+
+        write(', "second": ')
+        self.visit(that.second)
+
+        write(', "modelType": "RelationshipElement"}')
+
+    def visit_submodel_element_list(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
 
-    return _SERIALIZER.transform(that)
+        if that.order_relevant is not None:
+            write(sep + '"orderRelevant": ' + ("true" if that.order_relevant else "false"))
+            sep = ", "
+
+        if that.semantic_id_list_element is not None:
+            write(sep + '"semanticIdListElement": ')
+            self.visit(that.semantic_id_list_element)
+            sep = ", "
+
+        write(sep + '"typeValueListElement": ' + '"' + that.type_value_list_element.value + '"')
+
+        if that.value_type_list_element is not None:
+            write(', "valueTypeListElement": ' + '"' + that.value_type_list_element.value + '"')
+
+        if that.value is not None:
+            write(', "value": ')
+            self._write_list(that.value)
+
+        write(', "modelType": "SubmodelElementList"}')
+
+    def visit_submodel_element_collection(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.value is not None:
+            write(sep + '"value": ')
+            self._write_list(that.value)
+            sep = ", "
+
+        write(sep + '"modelType": "SubmodelElementCollection"')
+
+        write("}")
+
+    def visit_property(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"valueType": ' + '"' + that.value_type.value + '"')
+
+        if that.value is not None:
+            write(', "value": ' + _encode_str(that.value))
+
+        if that.value_id is not None:
+            write(', "valueId": ')
+            self.visit(that.value_id)
+
+        write(', "modelType": "Property"}')
+
+    def visit_multi_language_property(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.value is not None:
+            write(sep + '"value": ')
+            self._write_list(that.value)
+            sep = ", "
+
+        if that.value_id is not None:
+            write(sep + '"valueId": ')
+            self.visit(that.value_id)
+            sep = ", "
+
+        write(sep + '"modelType": "MultiLanguageProperty"')
+
+        write("}")
+
+    def visit_range(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"valueType": ' + '"' + that.value_type.value + '"')
+
+        if that.min is not None:
+            write(', "min": ' + _encode_str(that.min))
+
+        if that.max is not None:
+            write(', "max": ' + _encode_str(that.max))
+
+        write(', "modelType": "Range"}')
+
+    def visit_reference_element(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.value is not None:
+            write(sep + '"value": ')
+            self.visit(that.value)
+            sep = ", "
+
+        write(sep + '"modelType": "ReferenceElement"')
+
+        write("}")
+
+    def visit_blob(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.value is not None:
+            write(sep + '"value": ' + _encode_str(_bytes_to_base64_str(that.value)))
+            sep = ", "
+
+        write(sep + '"contentType": ' + _encode_str(that.content_type))
+
+        write(', "modelType": "Blob"}')
+
+    def visit_file(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.value is not None:
+            write(sep + '"value": ' + _encode_str(that.value))
+            sep = ", "
+
+        write(sep + '"contentType": ' + _encode_str(that.content_type))
+
+        write(', "modelType": "File"}')
+
+    def visit_annotated_relationship_element(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"first": ')
+        self.visit(that.first)
+
+        write(', "second": ')
+        self.visit(that.second)
+
+        if that.annotations is not None:
+            write(', "annotations": ')
+            self._write_list(that.annotations)
+
+        write(', "modelType": "AnnotatedRelationshipElement"}')
+
+    def visit_entity(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.statements is not None:
+            write(sep + '"statements": ')
+            self._write_list(that.statements)
+            sep = ", "
+
+        write(sep + '"entityType": ' + '"' + that.entity_type.value + '"')
+
+        if that.global_asset_id is not None:
+            write(', "globalAssetId": ' + _encode_str(that.global_asset_id))
+
+        if that.specific_asset_ids is not None:
+            write(', "specificAssetIds": ')
+            self._write_list(that.specific_asset_ids)
+
+        write(', "modelType": "Entity"}')
+
+    def visit_event_payload(self, that):
+
+        write = self._parts.append
+
+        write('{"source": ')
+        self.visit(that.source)
+
+        if that.source_semantic_id is not None:
+            write(', "sourceSemanticId": ')
+            self.visit(that.source_semantic_id)
+
+        write(', "observableReference": ')
+        self.visit(that.observable_reference)
+
+        if that.observable_semantic_id is not None:
+            write(', "observableSemanticId": ')
+            self.visit(that.observable_semantic_id)
+
+        if that.topic is not None:
+            write(', "topic": ' + _encode_str(that.topic))
+
+        if that.subject_id is not None:
+            write(', "subjectId": ')
+            self.visit(that.subject_id)
+
+        write(', "timeStamp": ' + _encode_str(that.time_stamp))
+
+        if that.payload is not None:
+            write(', "payload": ' + _encode_str(_bytes_to_base64_str(that.payload)))
+
+        write("}")
+
+    def visit_basic_event_element(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"observed": ')
+        self.visit(that.observed)
+
+        write(', "direction": ' + '"' + that.direction.value + '"')
+
+        write(', "state": ' + '"' + that.state.value + '"')
+
+        if that.message_topic is not None:
+            write(', "messageTopic": ' + _encode_str(that.message_topic))
+
+        if that.message_broker is not None:
+            write(', "messageBroker": ')
+            self.visit(that.message_broker)
+
+        if that.last_update is not None:
+            write(', "lastUpdate": ' + _encode_str(that.last_update))
+
+        if that.min_interval is not None:
+            write(', "minInterval": ' + _encode_str(that.min_interval))
+
+        if that.max_interval is not None:
+            write(', "maxInterval": ' + _encode_str(that.max_interval))
+
+        write(', "modelType": "BasicEventElement"}')
+
+    def visit_operation(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        if that.input_variables is not None:
+            write(sep + '"inputVariables": ')
+            self._write_list(that.input_variables)
+            sep = ", "
+
+        if that.output_variables is not None:
+            write(sep + '"outputVariables": ')
+            self._write_list(that.output_variables)
+            sep = ", "
+
+        if that.inoutput_variables is not None:
+            write(sep + '"inoutputVariables": ')
+            self._write_list(that.inoutput_variables)
+            sep = ", "
+
+        write(sep + '"modelType": "Operation"')
+
+        write("}")
+
+    def visit_operation_variable(self, that):
+
+        write = self._parts.append
+
+        write('{"value": ')
+        self.visit(that.value)
+
+        write("}")
+
+    def visit_capability(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.semantic_id is not None:
+            write(sep + '"semanticId": ')
+            self.visit(that.semantic_id)
+            sep = ", "
+
+        if that.supplemental_semantic_ids is not None:
+            write(sep + '"supplementalSemanticIds": ')
+            self._write_list(that.supplemental_semantic_ids)
+            sep = ", "
+
+        if that.qualifiers is not None:
+            write(sep + '"qualifiers": ')
+            self._write_list(that.qualifiers)
+            sep = ", "
+
+        if that.embedded_data_specifications is not None:
+            write(sep + '"embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+            sep = ", "
+
+        write(sep + '"modelType": "Capability"')
+
+        write("}")
+
+    def visit_concept_description(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.extensions is not None:
+            write('{"extensions": ')
+            self._write_list(that.extensions)
+            sep = ", "
+
+        if that.category is not None:
+            write(sep + '"category": ' + _encode_str(that.category))
+            sep = ", "
+
+        if that.id_short is not None:
+            write(sep + '"idShort": ' + _encode_str(that.id_short))
+            sep = ", "
+
+        if that.display_name is not None:
+            write(sep + '"displayName": ')
+            self._write_list(that.display_name)
+            sep = ", "
+
+        if that.description is not None:
+            write(sep + '"description": ')
+            self._write_list(that.description)
+            sep = ", "
+
+        if that.administration is not None:
+            write(sep + '"administration": ')
+            self.visit(that.administration)
+            sep = ", "
+
+        write(sep + '"id": ' + _encode_str(that.id))
+
+        if that.embedded_data_specifications is not None:
+            write(', "embeddedDataSpecifications": ')
+            self._write_list(that.embedded_data_specifications)
+
+        if that.is_case_of is not None:
+            write(', "isCaseOf": ')
+            self._write_list(that.is_case_of)
+
+        write(', "modelType": "ConceptDescription"}')
+
+    def visit_reference(self, that):
+
+        write = self._parts.append
+
+        write('{"type": ' + '"' + that.type.value + '"')
+
+        if that.referred_semantic_id is not None:
+            write(', "referredSemanticId": ')
+            self.visit(that.referred_semantic_id)
+
+        write(', "keys": ')
+        self._write_list(that.keys)
+
+        write("}")
+
+    def visit_key(self, that):
+
+        write = self._parts.append
+
+        write('{"type": ' + '"' + that.type.value + '"')
+
+        write(', "value": ' + _encode_str(that.value))
+
+        write("}")
+
+    def visit_lang_string_name_type(self, that):
+
+        write = self._parts.append
+
+        write('{"language": ' + _encode_str(that.language))
+
+        write(', "text": ' + _encode_str(that.text))
+
+        write("}")
+
+    def visit_lang_string_text_type(self, that):
+
+        write = self._parts.append
+
+        write('{"language": ' + _encode_str(that.language))
+
+        write(', "text": ' + _encode_str(that.text))
+
+        write("}")
+
+    def visit_environment(self, that):
+
+        write = self._parts.append
+        sep = "{"
+
+        if that.asset_administration_shells is not None:
+            write('{"assetAdministrationShells": ')
+            self._write_list(that.asset_administration_shells)
+            sep = ", "
+
+        if that.submodels is not None:
+            write(sep + '"submodels": ')
+            self._write_list(that.submodels)
+            sep = ", "
+
+        if that.concept_descriptions is not None:
+            write(sep + '"conceptDescriptions": ')
+            self._write_list(that.concept_descriptions)
+            sep = ", "
+
+        write("}" if sep == ", " else "{}")
+
+    def visit_embedded_data_specification(self, that):
+
+        write = self._parts.append
+
+        write('{"dataSpecificationContent": ')
+        self.visit(that.data_specification_content)
+
+        write(', "dataSpecification": ')
+        self.visit(that.data_specification)
+
+        write("}")
+
+    def visit_level_type(self, that):
+
+        write = self._parts.append
+
+        write('{"min": ' + ("true" if that.min else "false"))
+
+        write(', "nom": ' + ("true" if that.nom else "false"))
+
+        write(', "typ": ' + ("true" if that.typ else "false"))
+
+        write(', "max": ' + ("true" if that.max else "false"))
+
+        write("}")
+
+    def visit_value_reference_pair(self, that):
+
+        write = self._parts.append
+
+        write('{"value": ' + _encode_str(that.value))
+
+        write(', "valueId": ')
+        self.visit(that.value_id)
+
+        write("}")
+
+    def visit_value_list(self, that):
+
+        write = self._parts.append
+
+        write('{"valueReferencePairs": ')
+        self._write_list(that.value_reference_pairs)
+
+        write("}")
+
+    def visit_lang_string_preferred_name_type_iec_61360(self, that):
+
+        write = self._parts.append
+
+        write('{"language": ' + _encode_str(that.language))
+
+        write(', "text": ' + _encode_str(that.text))
+
+        write("}")
+
+    def visit_lang_string_short_name_type_iec_61360(self, that):
+
+        write = self._parts.append
+
+        write('{"language": ' + _encode_str(that.language))
+
+        write(', "text": ' + _encode_str(that.text))
+
+        write("}")
+
+    def visit_lang_string_definition_type_iec_61360(self, that):
+
+        write = self._parts.append
+
+        write('{"language": ' + _encode_str(that.language))
+
+        write(', "text": ' + _encode_str(that.text))
+
+        write("}")
+
+    def visit_data_specification_iec_61360(self, that):
+
+        write = self._parts.append
+
+        write('{"preferredName": ')
+        self._write_list(that.preferred_name)
+
+        if that.short_name is not None:
+            write(', "shortName": ')
+            self._write_list(that.short_name)
+
+        if that.unit is not None:
+            write(', "unit": ' + _encode_str(that.unit))
+
+        if that.unit_id is not None:
+            write(', "unitId": ')
+            self.visit(that.unit_id)
+
+        if that.source_of_definition is not None:
+            write(', "sourceOfDefinition": ' + _encode_str(that.source_of_definition))
+
+        if that.symbol is not None:
+            write(', "symbol": ' + _encode_str(that.symbol))
+
+        if that.data_type is not None:
+            write(', "dataType": ' + '"' + that.data_type.value + '"')
+
+        if that.definition is not None:
+            write(', "definition": ')
+            self._write_list(that.definition)
+
+        if that.value_format is not None:
+            write(', "valueFormat": ' + _encode_str(that.value_format))
+
+        if that.value_list is not None:
+            write(', "valueList": ')
+            self.visit(that.value_list)
+
+        if that.value is not None:
+            write(', "value": ' + _encode_str(that.value))
+
+        if that.level_type is not None:
+            write(', "levelType": ')
+            self.visit(that.level_type)
+
+        write(', "modelType": "DataSpecificationIec61360"}')
+
+
+# AnnotatedRelationshipElement comes first as it derives from RelationshipElement
+_ENCODER_METHODS = (
+    (aas_types.AnnotatedRelationshipElement, _Encoder.visit_annotated_relationship_element),
+    (aas_types.Extension, _Encoder.visit_extension),
+    (aas_types.AdministrativeInformation, _Encoder.visit_administrative_information),
+    (aas_types.Qualifier, _Encoder.visit_qualifier),
+    (aas_types.AssetAdministrationShell, _Encoder.visit_asset_administration_shell),
+    (aas_types.AssetInformation, _Encoder.visit_asset_information),
+    (aas_types.Resource, _Encoder.visit_resource),
+    (aas_types.SpecificAssetID, _Encoder.visit_specific_asset_id),
+    (aas_types.Submodel, _Encoder.visit_submodel),
+    (aas_types.RelationshipElement, _Encoder.visit_relationship_element),
+    (aas_types.SubmodelElementList, _Encoder.visit_submodel_element_list),
+    (aas_types.SubmodelElementCollection, _Encoder.visit_submodel_element_collection),
+    (aas_types.Property, _Encoder.visit_property),
+    (aas_types.MultiLanguageProperty, _Encoder.visit_multi_language_property),
+    (aas_types.Range, _Encoder.visit_range),
+    (aas_types.ReferenceElement, _Encoder.visit_reference_element),
+    (aas_types.Blob, _Encoder.visit_blob),
+    (aas_types.File, _Encoder.visit_file),
+    (aas_types.Entity, _Encoder.visit_entity),
+    (aas_types.EventPayload, _Encoder.visit_event_payload),
+    (aas_types.BasicEventElement, _Encoder.visit_basic_event_element),
+    (aas_types.Operation, _Encoder.visit_operation),
+    (aas_types.OperationVariable, _Encoder.visit_operation_variable),
+    (aas_types.Capability, _Encoder.visit_capability),
+    (aas_types.ConceptDescription, _Encoder.visit_concept_description),
+    (aas_types.Reference, _Encoder.visit_reference),
+    (aas_types.Key, _Encoder.visit_key),
+    (aas_types.LangStringNameType, _Encoder.visit_lang_string_name_type),
+    (aas_types.LangStringTextType, _Encoder.visit_lang_string_text_type),
+    (aas_types.Environment, _Encoder.visit_environment),
+    (aas_types.EmbeddedDataSpecification, _Encoder.visit_embedded_data_specification),
+    (aas_types.LevelType, _Encoder.visit_level_type),
+    (aas_types.ValueReferencePair, _Encoder.visit_value_reference_pair),
+    (aas_types.ValueList, _Encoder.visit_value_list),
+    (aas_types.LangStringPreferredNameTypeIEC61360, _Encoder.visit_lang_string_preferred_name_type_iec_61360),
+    (aas_types.LangStringShortNameTypeIEC61360, _Encoder.visit_lang_string_short_name_type_iec_61360),
+    (aas_types.LangStringDefinitionTypeIEC61360, _Encoder.visit_lang_string_definition_type_iec_61360),
+    (aas_types.DataSpecificationIEC61360, _Encoder.visit_data_specification_iec_61360),
+)
+
+_ENCODER_DISPATCH = dict(_ENCODER_METHODS)
+
+
+def _resolve_encoder_method(that):
+
+    # Instances of derived classes, e.g. submodels of a template, are resolved once
+    for cls, method in _ENCODER_METHODS:
+        if isinstance(that, cls):
+            _ENCODER_DISPATCH[type(that)] = method
+            return method
+    raise TypeError("Unexpected instance of type {}".format(type(that)))
+
+
+def to_json_bytes(that):
+
+    encoder = _Encoder()
+    encoder.visit(that)
+    return "".join(encoder._parts).encode("utf-8")
@@ -17,11 +17,13 @@ from typing import (
     Any,
     Callable,
     Iterable,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
     Optional,
     Sequence,
+    TextIO,
     Union,
 )
 
@@ -3974,17 +3976,101 @@ class _Serializer(aas_types.AbstractTransformer[MutableJsonable]):
 
 _SERIALIZER = _Serializer()
 
-def to_jsonable(that: aas_types.Class) -> MutableJsonable:
+def to_jsonable(
+    that: aas_types.Class, max_depth: Optional[int] = None
+) -> MutableJsonable:
     """
     Convert :paramref:`that` to a JSON-able structure.
 
+    With :paramref:`max_depth` set, only that many levels of submodel elements
+    below :paramref:`that` are converted with their children. Collections, lists,
+    entities and annotated relationship elements further down are converted as if
+    they had no children, which corresponds to ``level=core`` of the AAS API for
+    a :paramref:`max_depth` of 1. With a :paramref:`max_depth` of 0 only
+    :paramref:`that` itself is converted, a submodel without its submodel elements.
+    The children below the limit are never visited and no instance is modified.
+
     :param that:
         AAS data to be recursively converted to a JSON-able structure
+    :param max_depth:
+        number of element levels converted with their children, unlimited if ``None``
     :return:
         JSON-able structure which can be further encoded with, *e.g.*, :py:mod:`json`
     """
     ...
 
+def to_json_bytes(that: aas_types.Class) -> bytes:
+    """
+    Encode :paramref:`that` as UTF-8 JSON in a single pass.
+
+    The JSON text is written straight from the instances without building the
+    intermediate JSON-able structure first. Keys are emitted as precomputed
+    fragments, and plain ASCII strings are quoted directly instead of going
+    through the JSON library.
+
+    The result is byte-identical to ``json.dumps(to_jsonable(that)).encode("utf-8")``.
+
+    Example usage:
+
+    .. code-block::
+
+        import aas_core3.jsonization as aas_jsonization
+
+        data = aas_jsonization.to_json_bytes(environment)
+
+    :param that:
+        AAS data to be encoded
+    :return:
+        UTF-8 encoded JSON of :paramref:`that`
+    """
+    ...
+
+def iterate(instance: aas_types.Class, chunk_size: int = 512) -> Iterator[str]:
+    """
+    Iterate over the JSON representation of :paramref:`instance` in chunks.
+
+    This is the pull counterpart of :py:func:`write`, *e.g.*, for sending a
+    response with chunked transfer encoding. Only the pieces needed for the next
+    chunk are serialized, so the time to the first chunk and the peak memory do
+    not depend on the size of :paramref:`instance`.
+
+    Every chunk but the last one holds at least :paramref:`chunk_size` characters.
+    Joined together, the chunks are equal to ``json.dumps(to_jsonable(instance))``.
+
+    :param instance: to be serialized
+    :param chunk_size: minimum number of characters per chunk
+    :return: iterator over the chunks of JSON text
+    """
+    ...
+
+def write(instance: aas_types.Class, stream: TextIO, buffer_size: int = 512) -> None:
+    """
+    Write the JSON representation of :paramref:`instance` to :paramref:`stream`.
+
+    Unlike :py:func:`to_jsonable`, the JSON-able structure is never built for the
+    whole :paramref:`instance`. Submodels, submodel elements and other identifiables
+    are transformed one at a time and their JSON is collected in a buffer which is
+    flushed to :paramref:`stream` whenever it holds :paramref:`buffer_size`
+    characters or more. The peak memory is hence bounded by the largest single
+    element and the nesting depth rather than by the size of the environment.
+
+    The written text is equal to ``json.dumps(to_jsonable(instance))``.
+
+    Example usage:
+
+    .. code-block::
+
+        import aas_core3.jsonization as aas_jsonization
+
+        with open("environment.json", "wt") as fid:
+            aas_jsonization.write(environment, fid)
+
+    :param instance: to be serialized
+    :param stream: anything with a ``write()`` method accepting text
+    :param buffer_size: number of characters to collect before writing to :paramref:`stream`
+    """
+    ...
+
 # endregion
 
 # This code has been automatically generated by aas-core-codegen.
@@ -2151,14 +2151,85 @@ class _Serializer(aas_types.AbstractVisitor):
         self._write_end_element("dataSpecificationIec61360")
 
 
-def write(instance, stream):
+class _WithoutChildren:
 
-    serializer = _Serializer(stream)
+    # Read-only view of an element which hides its children from the serializer,
+    # the element itself is never modified
+    def __init__(self, that, attribute):
+
+        self._that = that
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+
+        if name == self._attribute:
+            return None
+        return getattr(self._that, name)
+
+
+class _DepthLimitedSerializer(_Serializer):
+
+    def __init__(self, stream, max_depth):
+
+        _Serializer.__init__(self, stream)
+        self.max_depth = max_depth
+        self._level = 0
+
+    def visit(self, that):
+
+        if not isinstance(that, (aas_types.Submodel, aas_types.SubmodelElement)):
+            that.accept(self)
+            return
+
+        self._level += 1
+        try:
+            that.accept(self)
+        finally:
+            self._level -= 1
+
+    def _limited(self, that, attribute):
+
+        # Below the maximum depth the children are left out, as if the element had none
+        if self._level > self.max_depth:
+            return _WithoutChildren(that, attribute)
+        return that
+
+    def visit_submodel(self, that):
+
+        _Serializer.visit_submodel(self, self._limited(that, "submodel_elements"))
+
+    def visit_submodel_element_list(self, that):
+
+        _Serializer.visit_submodel_element_list(self, self._limited(that, "value"))
+
+    def visit_submodel_element_collection(self, that):
+
+        _Serializer.visit_submodel_element_collection(
+            self, self._limited(that, "value")
+        )
+
+    def visit_annotated_relationship_element(self, that):
+
+        _Serializer.visit_annotated_relationship_element(
+            self, self._limited(that, "annotations")
+        )
+
+    def visit_entity(self, that):
+
+        _Serializer.visit_entity(self, self._limited(that, "statements"))
+
+
+def write(instance, stream, max_depth=None):
+
+    if max_depth is None:
+        serializer = _Serializer(stream)
+    else:
+        serializer = _DepthLimitedSerializer(stream, max_depth)
     serializer.visit(instance)
 
 
-def to_str(that):
+def to_str(that, max_depth=None):
 
     writer = io.StringIO()
-    write(that, writer)
+    write(that, writer, max_depth)
     return writer.getvalue()
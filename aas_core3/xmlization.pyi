@@ -1111,10 +1111,21 @@ class _Serializer(aas_types.AbstractVisitor):
         """
         ...
 
-def write(instance: aas_types.Class, stream: TextIO) -> None:
+def write(
+    instance: aas_types.Class, stream: TextIO, max_depth: Optional[int] = None
+) -> None:
     """
     Write the XML representation of :paramref:`instance` to :paramref:`stream`.
 
+    With :paramref:`max_depth` set, only that many levels of submodel elements
+    below :paramref:`instance` are written with their children. Collections,
+    lists, entities and annotated relationship elements further down are written
+    as if they had no children, which corresponds to ``level=core`` of the AAS
+    API for a :paramref:`max_depth` of 1. With a :paramref:`max_depth` of 0 only
+    :paramref:`instance` itself is written, a submodel without its submodel
+    elements. The children below the limit are never visited and no instance is
+    modified.
+
     Example usage:
 
     .. code-block::
@@ -1134,14 +1145,16 @@ def write(instance: aas_types.Class, stream: TextIO) -> None:
 
     :param instance: to be serialized
     :param stream: to write to
+    :param max_depth: number of element levels written with their children
     """
     ...
 
-def to_str(that: aas_types.Class) -> str:
+def to_str(that: aas_types.Class, max_depth: Optional[int] = None) -> str:
     """
     Serialize :paramref:`that` to an XML-encoded text.
 
     :param that: instance to be serialized
+    :param max_depth: number of element levels written with their children, see :py:func:`write`
     :return: :paramref:`that` serialized to XML serialized to text
     """
     ...
@@ -34,13 +34,79 @@ except ImportError:
     except ImportError:
         raise ImportError("Could not import 'time_series' from either path.")
 
+try:
+    from submodel_templates.time_series_storage import *
+except ImportError:
+    try:
+        from embedded_system.submodel_templates.time_series_storage import *
+    except ImportError:
+        raise ImportError("Could not import 'time_series_storage' from either path.")
+
+try:
+    from submodel_templates.time_series_statistics import *
+except ImportError:
+    try:
+        from embedded_system.submodel_templates.time_series_statistics import *
+    except ImportError:
+        raise ImportError("Could not import 'time_series_statistics' from either path.")
+
+try:
+    from submodel_templates.time_series_retention import *
+except ImportError:
+    try:
+        from embedded_system.submodel_templates.time_series_retention import *
+    except ImportError:
+        raise ImportError("Could not import 'time_series_retention' from either path.")
+
+
+# endregion
+
+# region: Time Series layout
+# One column per recorded chiller variable, the names are the keys of the ingestion API
+CHILLER_RECORD_VARIABLES = [
+    TimeSeriesVariable(
+        "timestamp", "Time", aas_types.DataTypeDefXSD.LONG, parse=parse_timestamp,
+        description=[
+            aas_types.LangStringTextType(
+                language="de",
+                text="Enthält die Zeit der Momentaufnahme.",
+            ),
+        ],
+    ),
+    # Circulation fluid temperature => 000Bh
+    TimeSeriesVariable("cft", "Circulation Fluid Temperature", aas_types.DataTypeDefXSD.FLOAT),
+    # Circulation fluid discharge temperature => 0000h
+    TimeSeriesVariable("cfdt", "Circulation fluid discharge Temperature", aas_types.DataTypeDefXSD.FLOAT),
+    # Circulation fluid discharge pressure => 0002h
+    TimeSeriesVariable("cfdp", "Circulation fluid discharge pressure", aas_types.DataTypeDefXSD.FLOAT),
+    # Circulation fluid electricity resistivity/conductivity => 0003h
+    TimeSeriesVariable("cfer", "Circulation fluid electricity resistivity/conductivity",
+                       aas_types.DataTypeDefXSD.FLOAT),
+    # Status flags => 0004h, 0009h
+    TimeSeriesVariable("statusf1", "Status flag 1", aas_types.DataTypeDefXSD.FLOAT),
+    TimeSeriesVariable("statusf2", "Status flag 2", aas_types.DataTypeDefXSD.FLOAT),
+    # Alarm flags => 0005h, 0006h, 0007h
+    TimeSeriesVariable("alarmf1", "Alarm flag 1", aas_types.DataTypeDefXSD.FLOAT),
+    TimeSeriesVariable("alarmf2", "Alarm flag 2", aas_types.DataTypeDefXSD.FLOAT),
+    TimeSeriesVariable("alarmf3", "Alarm flag 3", aas_types.DataTypeDefXSD.FLOAT),
+]
+
+CHILLER_RECORD_CAPACITY = 10
+
 
 # endregion
 
 class Chiller(aas_types.Environment):
     serial_number = "aaabbbccc"
 
-    def __init__(self):
+    def __init__(self, record_storage=None, retention=None, running_statistics=True):
+        """
+        `record_storage` keeps the TimeSeries records, by default a `RingBufferStorage` of the
+        last CHILLER_RECORD_CAPACITY records. A `CompressedStorage` holds long histories. With a
+        `RetentionPolicy` of CHILLER_RECORD_VARIABLES its rollup segments are added as well.
+        With `running_statistics` the InternalSegment publishes running statistics of all
+        variables in its 'Statistics' collection.
+        """
         self.asset_information = aas_types.AssetInformation(
             asset_kind=aas_types.AssetKind.TYPE
         )
@@ -277,10 +343,17 @@ class Chiller(aas_types.Environment):
         #region: Time Series
         time_series_internal_segment = Segment(
             segment_type=SegmentType.INTERNAL_SEGMENT,
+            storage=record_storage if record_storage is not None
+            else RingBufferStorage(CHILLER_RECORD_VARIABLES, CHILLER_RECORD_CAPACITY),
+            retention=retention,
+            statistics=StatisticsCollection(CHILLER_RECORD_VARIABLES) if running_statistics else None,
         )
+        time_series_segments = [time_series_internal_segment]
+        if retention is not None:
+            time_series_segments.extend(retention.segments())
         submodel_chiller_time_series = TimeSeries(
             new_id=self.id + ":timeseries",
-            segments=[time_series_internal_segment],
+            segments=time_series_segments,
         )
         # endregion
 
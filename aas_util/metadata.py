@@ -0,0 +1,53 @@
+import aas_core3.jsonization as aas_jsonization
+
+
+class _MetadataSerializer(aas_jsonization._Serializer):
+    """
+    Serializes like `to_jsonable`, but leaves out the values of submodel elements. Semantic ids,
+    qualifiers, descriptions and the tree of collections, lists, entity statements and annotations
+    are kept, so the result describes the structure of a submodel without its current state.
+    """
+
+    @staticmethod
+    def without(jsonable, *keys):
+        for key in keys:
+            jsonable.pop(key, None)
+        return jsonable
+
+    def transform_property(self, that):
+        return self.without(super().transform_property(that), "value", "valueId")
+
+    def transform_multi_language_property(self, that):
+        return self.without(super().transform_multi_language_property(that), "value", "valueId")
+
+    def transform_range(self, that):
+        return self.without(super().transform_range(that), "min", "max")
+
+    def transform_blob(self, that):
+        return self.without(super().transform_blob(that), "value")
+
+    def transform_file(self, that):
+        return self.without(super().transform_file(that), "value")
+
+    def transform_reference_element(self, that):
+        return self.without(super().transform_reference_element(that), "value")
+
+    def transform_relationship_element(self, that):
+        return self.without(super().transform_relationship_element(that), "first", "second")
+
+    def transform_annotated_relationship_element(self, that):
+        return self.without(super().transform_annotated_relationship_element(that), "first", "second")
+
+    def transform_entity(self, that):
+        return self.without(super().transform_entity(that), "globalAssetId", "specificAssetIds")
+
+    def transform_basic_event_element(self, that):
+        return self.without(super().transform_basic_event_element(that), "observed")
+
+
+_SERIALIZER = _MetadataSerializer()
+
+
+def to_metadata(that):
+    """Returns the $metadata representation of a submodel or submodel element as a jsonable."""
+    return _SERIALIZER.transform(that)
@@ -1,20 +1,272 @@
 import aas_core3.types as aas_types
+import aas_core3.jsonization as aas_jsonization
+
+try:
+    import ubinascii as ubinascii
+except ImportError:
+    try:
+        import binascii as ubinascii
+    except ImportError:
+        raise ImportError("Could not import 'ubinascii' from either path.")
+
+
+def _to_bool(value):
+    if value in ("true", "1"):
+        return True
+    if value in ("false", "0"):
+        return False
+    raise ValueError(value)
+
+
+_INTEGER_TYPES = (
+    aas_types.DataTypeDefXSD.BYTE,
+    aas_types.DataTypeDefXSD.INT,
+    aas_types.DataTypeDefXSD.INTEGER,
+    aas_types.DataTypeDefXSD.LONG,
+    aas_types.DataTypeDefXSD.NEGATIVE_INTEGER,
+    aas_types.DataTypeDefXSD.NON_NEGATIVE_INTEGER,
+    aas_types.DataTypeDefXSD.NON_POSITIVE_INTEGER,
+    aas_types.DataTypeDefXSD.POSITIVE_INTEGER,
+    aas_types.DataTypeDefXSD.SHORT,
+    aas_types.DataTypeDefXSD.UNSIGNED_BYTE,
+    aas_types.DataTypeDefXSD.UNSIGNED_INT,
+    aas_types.DataTypeDefXSD.UNSIGNED_LONG,
+    aas_types.DataTypeDefXSD.UNSIGNED_SHORT,
+)
+
+_FLOAT_TYPES = (
+    aas_types.DataTypeDefXSD.DECIMAL,
+    aas_types.DataTypeDefXSD.DOUBLE,
+    aas_types.DataTypeDefXSD.FLOAT,
+)
+
+# Conversions are only looked up, never called, until a value of that type is converted
+_CONVERSIONS = {aas_types.DataTypeDefXSD.BOOLEAN: _to_bool}
+for _value_type in _INTEGER_TYPES:
+    _CONVERSIONS[_value_type] = int
+for _value_type in _FLOAT_TYPES:
+    _CONVERSIONS[_value_type] = float
+
+
+_INFINITY = float("inf")
 
 
 def property_type_switch(option: aas_types.DataTypeDefXSD, value):
-    switch = {
-        aas_types.DataTypeDefXSD.STRING: str(value),
-        aas_types.DataTypeDefXSD.LONG: int(value)
-    }
+    """
+    Converts the lexical `value` of an XSD type to the matching JSON type: numbers for the
+    numeric types, booleans for xs:boolean and strings for everything else. Values that do not
+    parse, like 'NaN' for an xs:int, stay strings. NaN and infinite floats have no JSON number
+    and become None.
+    """
+    if value is None:
+        return None
+    conversion = _CONVERSIONS.get(option)
+    if conversion is None:
+        return value
+    try:
+        converted = conversion(value)
+    except ValueError:
+        return value
+    if conversion is float and (converted != converted or converted in (_INFINITY, -_INFINITY)):
+        return None
+    return converted
 
-    return switch.get(option, str)()
 
+_INTEGER_RANGES = {
+    aas_types.DataTypeDefXSD.BYTE: (-2 ** 7, 2 ** 7 - 1),
+    aas_types.DataTypeDefXSD.SHORT: (-2 ** 15, 2 ** 15 - 1),
+    aas_types.DataTypeDefXSD.INT: (-2 ** 31, 2 ** 31 - 1),
+    aas_types.DataTypeDefXSD.LONG: (-2 ** 63, 2 ** 63 - 1),
+    aas_types.DataTypeDefXSD.UNSIGNED_BYTE: (0, 2 ** 8 - 1),
+    aas_types.DataTypeDefXSD.UNSIGNED_SHORT: (0, 2 ** 16 - 1),
+    aas_types.DataTypeDefXSD.UNSIGNED_INT: (0, 2 ** 32 - 1),
+    aas_types.DataTypeDefXSD.UNSIGNED_LONG: (0, 2 ** 64 - 1),
+    aas_types.DataTypeDefXSD.NEGATIVE_INTEGER: (None, -1),
+    aas_types.DataTypeDefXSD.NON_POSITIVE_INTEGER: (None, 0),
+    aas_types.DataTypeDefXSD.NON_NEGATIVE_INTEGER: (0, None),
+    aas_types.DataTypeDefXSD.POSITIVE_INTEGER: (1, None),
+}
 
-def value_only(value):
-    if isinstance(value, aas_types.Property):
-        return_value = {
-            value.id_short: property_type_switch(value.value_type, value=value.value)
+
+def _is_finite(number):
+    return number == number and number not in (_INFINITY, -_INFINITY)
+
+
+def _non_finite_lexical(number):
+    """The xs:double and xs:float lexical forms of NaN and the infinities."""
+    if number != number:
+        return "NaN"
+    return "INF" if number > 0 else "-INF"
+
+
+def lexical_value(option: aas_types.DataTypeDefXSD, value):
+    """
+    Inverse of `property_type_switch`: turns a JSON value into the lexical string stored in a
+    Property of type `option`. Numbers and booleans are accepted for the numeric and boolean
+    types, strings for every type as long as they parse. NaN and the infinities become 'NaN',
+    'INF' and '-INF', xs:decimal rejects them. Raises ValueError if `value` does not fit the
+    type, e.g. 300 for an xs:byte or "abc" for an xs:double.
+    """
+    if option == aas_types.DataTypeDefXSD.BOOLEAN:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, str):
+            _to_bool(value)
+            return value
+        raise ValueError("Expected a boolean, got " + repr(value))
+
+    if option in _CONVERSIONS:
+        if isinstance(value, bool):
+            raise ValueError("Expected a number, got " + repr(value))
+        if _CONVERSIONS[option] is int:
+            number = int(value) if isinstance(value, str) else value
+            if not isinstance(number, int):
+                raise ValueError("Expected an integer, got " + repr(value))
+            lower, upper = _INTEGER_RANGES.get(option, (None, None))
+            if (lower is not None and number < lower) or (upper is not None and number > upper):
+                raise ValueError(repr(value) + " is out of range for " + option.value)
+            return value if isinstance(value, str) else str(value)
+
+        if not isinstance(value, (str, int, float)):
+            raise ValueError("Expected a number, got " + repr(value))
+        number = float(value)
+        if not _is_finite(number):
+            if option == aas_types.DataTypeDefXSD.DECIMAL:
+                raise ValueError(repr(value) + " is not a valid xs:decimal")
+            # 'nan', 'inf' or 'Infinity' parse, but only the XSD forms are valid lexical values
+            return _non_finite_lexical(number)
+        return value if isinstance(value, str) else str(value)
+
+    if not isinstance(value, str):
+        raise ValueError("Expected a string, got " + repr(value))
+    return value
+
+
+class _NoValue:
+    pass
+
+
+# Returned for elements that have no ValueOnly representation, like operations and capabilities
+NO_VALUE = _NoValue()
+
+
+class _ValueOnlyTransformer(aas_types.AbstractTransformer):
+    """
+    Builds the ValueOnly representation straight from the instances. Only values are visited,
+    semantic ids, descriptions, qualifiers and the like are never touched.
+    """
+
+    def named_values(self, elements):
+        result = {}
+        if elements is None:
+            return result
+        for element in elements:
+            value = self.transform(element)
+            if value is not NO_VALUE:
+                result[element.id_short] = value
+        return result
+
+    def transform_submodel(self, that):
+        return self.named_values(that.submodel_elements)
+
+    def transform_property(self, that):
+        return property_type_switch(that.value_type, that.value)
+
+    def transform_multi_language_property(self, that):
+        if that.value is None:
+            return None
+        return [{lang_string.language: lang_string.text} for lang_string in that.value]
+
+    def transform_range(self, that):
+        result = {}
+        if that.min is not None:
+            result["min"] = property_type_switch(that.value_type, that.min)
+        if that.max is not None:
+            result["max"] = property_type_switch(that.value_type, that.max)
+        return result
+
+    def transform_blob(self, that):
+        result = {"contentType": that.content_type}
+        if that.value is not None:
+            result["value"] = ubinascii.b2a_base64(that.value).decode("ascii").strip()
+        return result
+
+    def transform_file(self, that):
+        result = {"contentType": that.content_type}
+        if that.value is not None:
+            result["value"] = that.value
+        return result
+
+    def transform_reference_element(self, that):
+        if that.value is None:
+            return None
+        return aas_jsonization.to_jsonable(that.value)
+
+    def transform_submodel_element_collection(self, that):
+        return self.named_values(that.value)
+
+    def transform_submodel_element_list(self, that):
+        result = []
+        if that.value is None:
+            return result
+        # Items without a value are left out, like in collections
+        for element in that.value:
+            value = self.transform(element)
+            if value is not NO_VALUE:
+                result.append(value)
+        return result
+
+    def transform_entity(self, that):
+        result = {
+            "statements": self.named_values(that.statements),
+            "entityType": that.entity_type.value,
+        }
+        if that.global_asset_id is not None:
+            result["globalAssetId"] = that.global_asset_id
+        if that.specific_asset_ids is not None:
+            result["specificAssetIds"] = [aas_jsonization.to_jsonable(specific_asset_id)
+                                          for specific_asset_id in that.specific_asset_ids]
+        return result
+
+    def transform_relationship_element(self, that):
+        return {
+            "first": aas_jsonization.to_jsonable(that.first),
+            "second": aas_jsonization.to_jsonable(that.second),
         }
-        print(return_value)
 
-        return return_value
+    def transform_annotated_relationship_element(self, that):
+        result = self.transform_relationship_element(that)
+        result["annotations"] = self.named_values(that.annotations)
+        return result
+
+    def transform_basic_event_element(self, that):
+        return {"observed": aas_jsonization.to_jsonable(that.observed)}
+
+    def transform_operation(self, that):
+        return NO_VALUE
+
+    def transform_capability(self, that):
+        return NO_VALUE
+
+
+_TRANSFORMER = _ValueOnlyTransformer()
+
+
+def to_value_only(that):
+    """
+    Returns the ValueOnly representation of a submodel or submodel element.
+
+    A submodel becomes a dict of its elements by id_short. Collections, entity statements and
+    annotations are dicts as well, lists are JSON arrays and properties and ranges carry typed
+    values, non-finite floats are None. Operations and capabilities are left out of their
+    parents, on their own NO_VALUE is returned.
+    """
+    return _TRANSFORMER.transform(that)
+
+
+def value_only(value):
+    """Returns the ValueOnly representation of a single element keyed by its id_short, as used for $value reads."""
+    element_value = to_value_only(value)
+    if element_value is NO_VALUE:
+        return {}
+    return {value.id_short: element_value}
@@ -18,6 +18,23 @@ except ImportError:
         raise ImportError("Could not import 'SubmodelTemplate' from either path.")
 
 
+try:
+    from embedded_system.submodel_templates.time_series_log import LOG_CONTENT_TYPE
+except ImportError:
+    try:
+        from submodel_templates.time_series_log import LOG_CONTENT_TYPE
+    except ImportError:
+        raise ImportError("Could not import 'time_series_log' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series_statistics import lexical
+except ImportError:
+    try:
+        from submodel_templates.time_series_statistics import lexical
+    except ImportError:
+        raise ImportError("Could not import 'time_series_statistics' from either path.")
+
+
 class SegmentType:
     EXTERNAL_SEGMENT = "ExternalSegment"
     LINKED_SEGMENT = "LinkedSegment"
@@ -47,10 +64,159 @@ class Record(aas_types.SubmodelElementCollection):
         self.value = values
 
 
+class RecordView(aas_types.SubmodelElementCollection):
+    """
+    A record of a TimeSeries storage as a collection of Properties. Views are only created when
+    the records are serialized or navigated, nothing keeps them afterwards. A view keeps its
+    values after the row was evicted.
+    """
+
+    def __init__(self, variables, row, sequence, id_short="Record"):
+        super().__init__(
+            id_short=id_short,
+            value=[
+                aas_types.Property(
+                    id_short=variable.id_short,
+                    description=variable.description,
+                    value_type=variable.value_type,
+                    value=lexical(row[column_index]),
+                )
+                for column_index, variable in enumerate(variables)
+            ]
+        )
+        self.sequence = sequence
+
+
+class _RecordsValue:
+    """
+    The `value` of a RecordsCollection: its fixed elements followed by one RecordView per
+    stored row. Views are created when an item is read and not kept, iterating holds one view
+    at a time and reads the rows straight from the storage.
+    """
+
+    def __init__(self, records):
+        self._records = records
+
+    def __len__(self):
+        return len(self._records.fixed_elements) + len(self._records.storage)
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("record index out of range")
+        fixed_elements = self._records.fixed_elements
+        if index < len(fixed_elements):
+            return fixed_elements[index]
+        return self._records.view(index - len(fixed_elements))
+
+    def __iter__(self):
+        records = self._records
+        for element in records.fixed_elements:
+            yield element
+        storage = records.storage
+        sequence = storage.first_sequence
+        for row in storage.rows():
+            yield RecordView(storage.variables, row, sequence, records.record_id_short)
+            sequence += 1
+
+
+class RecordsCollection(aas_types.SubmodelElementCollection):
+    """
+    The Records collection of an InternalSegment, backed by a columnar storage like
+    `RingBufferStorage` instead of a list of Record collections.
+
+    `value` reads as the elements given to the constructor (like the 'Record' placeholder)
+    followed by one `RecordView` per stored row. The views are built while the records are
+    serialized or navigated and never stored, so the collection costs no memory beyond its
+    storage. Records are appended with `append_row`, never by changing `value`.
+    """
+
+    # Tells the idShortPath index to resolve paths below the records without indexing them
+    lazy_children = True
+
+    def __init__(self, storage, record_id_short="Record", retention=None, statistics=None, **kwargs):
+        self.storage = storage
+        self.record_id_short = record_id_short
+        # Told about every appended record, see RetentionPolicy and StatisticsCollection
+        self.retention = retention
+        self.statistics = statistics
+        self.fixed_elements = []
+        self._value = _RecordsValue(self)
+        super().__init__(**kwargs)
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self.fixed_elements = [] if value is None else list(value)
+
+    def view(self, position):
+        """Returns a new RecordView of the row at `position`."""
+        storage = self.storage
+        return RecordView(storage.variables, storage.row(position), storage.sequence_at(position),
+                          self.record_id_short)
+
+    def query(self, start=None, end=None, limit=None, latest=None, after_sequence=None):
+        """Time range query on the records, see `query_storage`."""
+        return query_storage(self.storage, start, end, limit, latest, after_sequence, self.view)
+
+    def append_row(self, row):
+        """Appends one record in the variable order of the storage, returns True if the oldest one was evicted."""
+        evicted = self.storage.append(row)
+        self._records_added((row,), 1)
+        return evicted
+
+    def extend_rows(self, rows):
+        """Appends many records as rows in the variable order of the storage, returns the number of evicted ones."""
+        rows = list(rows)
+        evicted = self.storage.extend(rows)
+        self._records_added(rows, len(rows))
+        return evicted
+
+    def extend_columns(self, columns):
+        """Appends many records as one sequence per variable, returns the number of evicted ones."""
+        evicted = self.storage.extend_columns(columns)
+        if columns:
+            self._records_added(list(zip(*columns)), len(columns[0]))
+        return evicted
+
+    def _records_added(self, rows, count):
+        """
+        Hands the `count` appended records, parsed, to the retention policy and the statistics.
+        They are read back from the storage, unless a batch evicted some of its own records.
+        """
+        observers = [observer for observer in (self.statistics, self.retention) if observer is not None]
+        if not observers or count == 0:
+            return
+        storage = self.storage
+        stored = len(storage)
+        if count == 1 and stored:
+            parsed = (storage.row(stored - 1),)
+        elif count <= stored:
+            parsed = list(storage.rows(stored - count, stored))
+        else:
+            parsed = [[variable.parse(value) for variable, value in zip(storage.variables, row)] for row in rows]
+        for observer in observers:
+            observer.records_added(storage, parsed)
+
+
 class Segment(aas_types.SubmodelElementCollection):
     """
     Class representing a Segment (e.g., InternalSegment, ExternalSegment, LinkedSegment)
     within a TimeSeries structure using aas-core3.
+
+    With a `storage` the records of an InternalSegment are served from it, a `retention` policy
+    and a `StatisticsCollection` are told about every record appended to it, the statistics are
+    added to the segment. An ExternalSegment describes a `FileLogStorage`
+    by its file as 'File', a LinkedSegment by a file URI as 'Endpoint' and the range query
+    parameters as 'Query'. The storage is kept as `storage`. `id_short` tells several segments
+    of the same type apart, by default the segment type is used.
     """
 
     def __init__(
@@ -67,10 +233,15 @@ class Segment(aas_types.SubmodelElementCollection):
             state: str = None,
             last_update: str = None,
             records: [Record] = None,
+            storage=None,
+            retention=None,
+            statistics=None,
+            id_short: str = None,
     ):
 
         # Initialize parent SubmodelElementCollection
-        super().__init__(id_short=str(segment_type))
+        super().__init__(id_short=id_short if id_short is not None else str(segment_type))
+        self.storage = storage
         self.value = [
             aas_types.Property(
                 category="CONSTANT",
@@ -435,9 +606,16 @@ class Segment(aas_types.SubmodelElementCollection):
                 )
             )
 
-        # Add records as a collection
+        # Add records as a collection, backed by `storage` if one is given
         if segment_type == SegmentType.INTERNAL_SEGMENT:
-            records_collection = aas_types.SubmodelElementCollection(
+            records_collection_class = aas_types.SubmodelElementCollection
+            records_collection_kwargs = {}
+            if storage is not None:
+                records_collection_class = RecordsCollection
+                records_collection_kwargs["storage"] = storage
+                records_collection_kwargs["retention"] = retention
+                records_collection_kwargs["statistics"] = statistics
+            records_collection = records_collection_class(
                 id_short="Records",
                 description=[
                     aas_types.LangStringTextType(
@@ -466,11 +644,172 @@ class Segment(aas_types.SubmodelElementCollection):
                         id_short="Record",
                         value_type=aas_types.DataTypeDefXSD.STRING
                     )
-                ]
+                ],
+                **records_collection_kwargs
             )
             if records:
                 records_collection.value.append(records)
             self.value.append(records_collection)
+            if statistics is not None and storage is not None:
+                self.value.append(statistics)
+
+        # Stored segments are described by where their records are, they are read with range queries
+        if segment_type == SegmentType.EXTERNAL_SEGMENT and hasattr(storage, "path"):
+            self.value.append(
+                aas_types.File(
+                    id_short="File",
+                    description=[
+                        aas_types.LangStringTextType(
+                            language="en",
+                            text="File with the records of the time series segment.",
+                        ),
+                    ],
+                    semantic_id=aas_types.Reference(
+                        type=aas_types.ReferenceTypes.EXTERNAL_REFERENCE,
+                        keys=[
+                            aas_types.Key(
+                                type=aas_types.KeyTypes.GLOBAL_REFERENCE,
+                                value="https://admin-shell.io/idta/TimeSeries/File/1/1"
+                            )
+                        ]
+                    ),
+                    content_type=LOG_CONTENT_TYPE,
+                    value=storage.path,
+                )
+            )
+
+        if segment_type == SegmentType.LINKED_SEGMENT and hasattr(storage, "path"):
+            self.value.append(
+                aas_types.Property(
+                    id_short="Endpoint",
+                    semantic_id=aas_types.Reference(
+                        type=aas_types.ReferenceTypes.EXTERNAL_REFERENCE,
+                        keys=[
+                            aas_types.Key(
+                                type=aas_types.KeyTypes.GLOBAL_REFERENCE,
+                                value="https://admin-shell.io/idta/TimeSeries/Endpoint/1/1"
+                            )
+                        ]
+                    ),
+                    value_type=aas_types.DataTypeDefXSD.STRING,
+                    value="file://" + storage.path,
+                )
+            )
+            self.value.append(
+                aas_types.Property(
+                    id_short="Query",
+                    semantic_id=aas_types.Reference(
+                        type=aas_types.ReferenceTypes.EXTERNAL_REFERENCE,
+                        keys=[
+                            aas_types.Key(
+                                type=aas_types.KeyTypes.GLOBAL_REFERENCE,
+                                value="https://admin-shell.io/idta/TimeSeries/Query/1/1"
+                            )
+                        ]
+                    ),
+                    value_type=aas_types.DataTypeDefXSD.STRING,
+                    value="start=<time>&end=<time>&limit=<count>&latest=<count>",
+                )
+            )
+
+
+def find_records_collection(submodel, segment_id_short=SegmentType.INTERNAL_SEGMENT):
+    """
+    Returns (idShortPath, collection) of the Records collection of a TimeSeries submodel, looking
+    in the segment `segment_id_short` first and in any other segment with Records after that.
+    Returns (None, None) if the submodel has no Records collection.
+    """
+    segments = None
+    for element in submodel.submodel_elements or []:
+        if element.id_short == "Segments" and isinstance(element, aas_types.SubmodelElementCollection):
+            segments = element
+            break
+    if segments is None:
+        return None, None
+
+    found_path, found = None, None
+    for segment in segments.value or []:
+        if not isinstance(segment, aas_types.SubmodelElementCollection):
+            continue
+        for element in segment.value or []:
+            if element.id_short == "Records" and isinstance(element, aas_types.SubmodelElementCollection):
+                path = "Segments." + segment.id_short + ".Records"
+                if segment.id_short == segment_id_short:
+                    return path, element
+                if found is None:
+                    found_path, found = path, element
+    return found_path, found
+
+
+def query_storage(storage, start=None, end=None, limit=None, latest=None, after_sequence=None, view=None):
+    """
+    Returns the views of the records of a TimeSeries storage with `start` <= time < `end` as a
+    list, oldest first, and the sequence number of the next record if `limit` cut the result
+    short, None otherwise.
+
+    `latest` keeps only the newest records of the range, `after_sequence` skips the records
+    before the one with that sequence number, as returned by a previous query. Only the
+    records of the result are materialized, by `view(position)` if given, the range is found by
+    binary search.
+    """
+    first, stop = storage.time_range(start, end)
+    if latest is not None and stop - latest > first:
+        first = stop - latest
+    if after_sequence is not None and after_sequence - storage.first_sequence > first:
+        first = after_sequence - storage.first_sequence
+    next_sequence = None
+    if limit is not None and first + limit < stop:
+        stop = first + limit
+        next_sequence = storage.sequence_at(stop)
+    if view is None:
+        return [RecordView(storage.variables, storage.row(position), storage.sequence_at(position))
+                for position in range(first, stop)], next_sequence
+    return [view(position) for position in range(first, stop)], next_sequence
+
+
+def find_segment_storage(submodel, segment_id_short):
+    """
+    Returns the storage of the segment `segment_id_short` of a TimeSeries submodel, e.g. the
+    FileLogStorage of an ExternalSegment. Returns None if the segment has no storage.
+    """
+    for element in submodel.submodel_elements or []:
+        if element.id_short == "Segments" and isinstance(element, aas_types.SubmodelElementCollection):
+            for segment in element.value or []:
+                if segment.id_short == segment_id_short:
+                    return getattr(segment, "storage", None)
+    return None
+
+
+def query_records(records_collection, start=None, end=None, limit=None, latest=None, after_sequence=None):
+    """
+    Time range query on any Records collection, see `RecordsCollection.query`.
+
+    Collections of Record collections are scanned linearly, the time being the value of the first
+    Property of a record, and sequence numbers are the positions of the records in the collection.
+    """
+    if isinstance(records_collection, RecordsCollection):
+        return records_collection.query(start, end, limit, latest, after_sequence)
+
+    records = [element for element in records_collection.value or []
+               if isinstance(element, aas_types.SubmodelElementCollection) and element.value]
+    in_range = []
+    for sequence, record in enumerate(records):
+        time = record.value[0].value if isinstance(record.value[0], aas_types.Property) else None
+        if time is None:
+            continue
+        time = float(time)
+        if (start is None or time >= start) and (end is None or time < end):
+            in_range.append((sequence, record))
+
+    if latest is not None:
+        in_range = in_range[max(0, len(in_range) - latest):]
+    if after_sequence is not None:
+        in_range = [entry for entry in in_range if entry[0] >= after_sequence]
+    next_sequence = None
+    if limit is not None and limit < len(in_range):
+        next_sequence = in_range[limit][0]
+        in_range = in_range[:limit]
+    return [record for _, record in in_range], next_sequence
 
 
 class TimeSeries(SubmodelTemplate):
@@ -538,3 +877,10 @@ class TimeSeries(SubmodelTemplate):
                 ),
             )
         # endregion
+
+    def query_records(self, start=None, end=None, limit=None, latest=None, after_sequence=None):
+        """Time range query on the Records of this TimeSeries, see `query_records`."""
+        records_path, records_collection = find_records_collection(self)
+        if records_collection is None:
+            return [], None
+        return query_records(records_collection, start, end, limit, latest, after_sequence)
@@ -0,0 +1,138 @@
+try:
+    import numpy as np
+except ImportError:
+    # MicroPython, the pure Python path is used
+    np = None
+
+_NUMPY_DTYPES = {"q": "int64", "d": "float64"}
+
+_INFINITY = float("inf")
+
+
+def bucket_start(time, interval, origin=0):
+    """Returns the start of the bucket of `interval` length, counted from `origin`, that `time` falls into."""
+    return origin + ((time - origin) // interval) * interval
+
+
+def _json_number(value):
+    """Returns None for NaN and infinite floats, which have no JSON number."""
+    if value != value or value == _INFINITY or value == -_INFINITY:
+        return None
+    return value
+
+
+def select_variables(storage, names=None):
+    """
+    Returns the column indexes of the variables to aggregate, by their name or id_short. Without
+    `names` all variables but the time are aggregated. Raises ValueError for unknown names.
+    """
+    if names is None:
+        return list(range(1, len(storage.variables)))
+    column_indexes = []
+    for name in names:
+        for column_index, variable in enumerate(storage.variables):
+            if name == variable.name or name == variable.id_short:
+                column_indexes.append(column_index)
+                break
+        else:
+            raise ValueError("Unknown variable: " + str(name))
+    return column_indexes
+
+
+def _aggregate_python(storage, first, stop, interval, origin, column_indexes):
+    buckets = []
+    current = None
+    statistics = None
+    count = 0
+    for position in range(first, stop):
+        row = storage.row(position)
+        start = bucket_start(row[0], interval, origin)
+        if start != current:
+            if statistics is not None:
+                buckets.append((current, count, statistics))
+            current = start
+            count = 0
+            # [min, max, sum, last] per variable
+            statistics = [[row[i], row[i], 0, row[i]] for i in column_indexes]
+        count += 1
+        for statistic, column_index in zip(statistics, column_indexes):
+            value = row[column_index]
+            # NaN spreads to min and max like with NumPy
+            if value < statistic[0] or value != value:
+                statistic[0] = value
+            if value > statistic[1] or value != value:
+                statistic[1] = value
+            statistic[2] += value
+            statistic[3] = value
+    if statistics is not None:
+        buckets.append((current, count, statistics))
+    return buckets
+
+
+def _aggregate_numpy(storage, first, stop, interval, origin, column_indexes):
+    segments = storage.segments(first, stop)
+
+    def column_values(column_index):
+        column = np.frombuffer(storage.columns[column_index], dtype=_NUMPY_DTYPES[storage.variables[column_index].typecode])
+        return np.concatenate([column[low:high] for low, high in segments])
+
+    starts = origin + ((column_values(0) - origin) // interval) * interval
+    boundaries = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    ends = np.append(boundaries[1:], len(starts))
+    counts = (ends - boundaries).tolist()
+
+    per_variable = []
+    for column_index in column_indexes:
+        values = column_values(column_index)
+        per_variable.append((
+            np.minimum.reduceat(values, boundaries).tolist(),
+            np.maximum.reduceat(values, boundaries).tolist(),
+            np.add.reduceat(values, boundaries).tolist(),
+            values[ends - 1].tolist(),
+        ))
+
+    bucket_starts = starts[boundaries].tolist()
+    return [
+        (bucket_starts[bucket], counts[bucket],
+         [[minimum[bucket], maximum[bucket], total[bucket], last[bucket]]
+          for minimum, maximum, total, last in per_variable])
+        for bucket in range(len(counts))
+    ]
+
+
+def aggregate(storage, interval, start=None, end=None, names=None):
+    """
+    Downsamples the rows of a TimeSeries storage with `start` <= time < `end` into buckets of
+    `interval` time units and returns a list of buckets, oldest first, like
+
+        {"start": 600, "end": 660, "count": 12, "values": {"cft": {"min": .., "max": .., "mean": .., "last": ..}}}
+
+    Buckets are aligned to `start`, or to multiples of `interval` without it, and empty buckets
+    are left out. `names` selects the variables, see `select_variables`. The rows are found by
+    binary search and aggregated with NumPy where it is available, in pure Python otherwise.
+    Statistics that are NaN or infinite, e.g. of a bucket holding a NaN, are None.
+    """
+    if interval is None or interval <= 0:
+        raise ValueError("interval must be positive")
+    column_indexes = select_variables(storage, names)
+    first, stop = storage.time_range(start, end)
+    if first >= stop:
+        return []
+
+    origin = 0 if start is None else start
+    # Compressed storages have no typed columns to view
+    if np is not None and hasattr(storage, "segments"):
+        buckets = _aggregate_numpy(storage, first, stop, interval, origin, column_indexes)
+    else:
+        buckets = _aggregate_python(storage, first, stop, interval, origin, column_indexes)
+
+    names = [storage.variables[column_index].name for column_index in column_indexes]
+    result = []
+    for bucket_start_time, count, statistics in buckets:
+        values = {}
+        for name, (minimum, maximum, total, last) in zip(names, statistics):
+            values[name] = {"min": _json_number(minimum), "max": _json_number(maximum),
+                            "mean": _json_number(total / count), "last": _json_number(last)}
+        result.append({"start": bucket_start_time, "end": bucket_start_time + interval, "count": count,
+                       "values": values})
+    return result
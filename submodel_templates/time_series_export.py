@@ -0,0 +1,86 @@
+try:
+    import ujson as ujson
+except ImportError:
+    try:
+        import json as ujson
+    except ImportError:
+        raise ImportError("Could not import 'json or ujson' from either path.")
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows read from the storage at once
+_EXPORT_ROWS = 64
+
+
+def _is_finite(value):
+    return value == value and value not in (float("inf"), float("-inf"))
+
+
+def _csv_field(text):
+    if "," in text or '"' in text or "\n" in text or "\r" in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _csv_value(value):
+    if isinstance(value, float) and not _is_finite(value):
+        return ""
+    return repr(value)
+
+
+def _ndjson_value(value):
+    if isinstance(value, float) and not _is_finite(value):
+        return "null"
+    return repr(value)
+
+
+def iterate_rows(storage, start=None, end=None):
+    """
+    Yields the rows of a TimeSeries storage with `start` <= time < `end`, oldest first, reading
+    a few rows at a time. Rows are tracked by sequence number, so rows appended while exporting
+    do not shift the export, rows evicted meanwhile are left out.
+    """
+    first, stop = storage.time_range(start, end)
+    sequence = storage.sequence_at(first)
+    stop_sequence = storage.sequence_at(stop)
+    while sequence < stop_sequence:
+        position = sequence - storage.first_sequence
+        if position < 0:
+            sequence -= position
+            continue
+        count = min(_EXPORT_ROWS, stop_sequence - sequence)
+        # Read the chunk before yielding, evictions meanwhile would shift the positions
+        for row in list(storage.rows(position, position + count)):
+            yield row
+        sequence += count
+
+
+def csv_lines(storage, start=None, end=None):
+    """Yields a header of the variable idShorts and one CSV line per row as bytes. Non-finite floats are empty."""
+    yield (",".join(_csv_field(variable.id_short) for variable in storage.variables) + "\r\n").encode("utf-8")
+    for row in iterate_rows(storage, start, end):
+        line = ",".join(map(repr, row))
+        # Only 'nan' and 'inf' contain letters
+        if "n" in line:
+            line = ",".join(_csv_value(value) for value in row)
+        yield (line + "\r\n").encode("utf-8")
+
+
+def ndjson_lines(storage, start=None, end=None):
+    """Yields one JSON object per row, keyed by the variable idShorts, as bytes. Non-finite floats are null."""
+    keys = [ujson.dumps(variable.id_short) + ": " for variable in storage.variables]
+    template = "{" + ", ".join(key.replace("%", "%%") + "%s" for key in keys) + "}\n"
+    for row in iterate_rows(storage, start, end):
+        values = tuple(map(repr, row))
+        if "n" in "".join(values):
+            values = tuple(_ndjson_value(value) for value in row)
+        yield (template % values).encode("utf-8")
+
+
+EXPORT_FORMATS = {
+    "csv": csv_lines,
+    "ndjson": ndjson_lines,
+}
@@ -0,0 +1,220 @@
+try:
+    import struct
+except ImportError:
+    try:
+        import ustruct as struct
+    except ImportError:
+        raise ImportError("Could not import 'struct' from either path.")
+
+try:
+    import mmap
+except ImportError:
+    # MicroPython, rows are read with seek and read
+    mmap = None
+
+# File layout: magic, variable count, one typecode per variable, then the rows back to back
+LOG_MAGIC = b"AASTS\x01"
+LOG_CONTENT_TYPE = "application/x-aas-timeseries-log"
+
+# Rows read at once when iterating without mmap
+_READ_ROWS = 64
+
+
+class FileLogStorage:
+    """
+    Persistent TimeSeries storage with the interface of `RingBufferStorage`, for histories that
+    do not fit into RAM.
+
+    Every row is appended to the file at `path` as fixed-width little endian binary, 8 bytes per
+    value, so row `n` is at a known offset and nothing is ever rewritten. Rows are read through
+    `mmap` where available and with plain file reads otherwise, only the rows that are asked for
+    are read. An existing file is continued, a partially written last row is overwritten.
+
+    Sequence numbers are row numbers in the file. With a `capacity` only the newest rows are
+    visible, evicted rows stay in the file. Without one the whole file is visible.
+    """
+
+    def __init__(self, variables, path, capacity=None):
+        self.variables = variables
+        self.path = path
+        self.capacity = capacity
+        self.row_format = "<" + "".join(variable.typecode for variable in variables)
+        self.row_size = struct.calcsize(self.row_format)
+        self.time_format = "<" + variables[0].typecode
+        header = LOG_MAGIC + bytes([len(variables)]) + "".join(variable.typecode for variable in variables).encode()
+        self.header_size = len(header)
+
+        try:
+            self.file = open(path, "r+b")
+            existing = self.file.read(self.header_size)
+            if existing != header:
+                self.file.close()
+                raise ValueError("'" + path + "' is not a TimeSeries log of these variables")
+            self.file.seek(0, 2)
+            rows = (self.file.tell() - self.header_size) // self.row_size
+        except OSError:
+            self.file = open(path, "w+b")
+            self.file.write(header)
+            rows = 0
+
+        # Rows in the file, the visible ones start at first_sequence
+        self.rows_written = rows
+        self.first_sequence = 0
+        self.count = rows
+        self._map = None
+        self._dirty = True
+        self._evict()
+        self.version = 0
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.file.close()
+
+    def _evict(self):
+        if self.capacity is None or self.count <= self.capacity:
+            return 0
+        evicted = self.count - self.capacity
+        self.first_sequence += evicted
+        self.count -= evicted
+        return evicted
+
+    def _write(self, rows):
+        self.file.seek(self.header_size + self.rows_written * self.row_size)
+        for row in rows:
+            self.file.write(struct.pack(self.row_format, *row))
+        self.rows_written += len(rows)
+        self.count += len(rows)
+        self._dirty = True
+
+    def _parse(self, row):
+        if len(row) != len(self.variables):
+            raise ValueError("Expected %d values per row, got %d" % (len(self.variables), len(row)))
+        return [variable.parse(value) for variable, value in zip(self.variables, row)]
+
+    def append(self, row):
+        """Appends one row of values in variable order, returns True if the oldest row was evicted."""
+        if self.capacity is not None and self.capacity <= 0:
+            return False
+        self._write([self._parse(row)])
+        evicted = self._evict()
+        self.version += 1
+        return evicted > 0
+
+    def extend(self, rows):
+        """Appends many rows of values in variable order with one write, returns the number of evicted rows."""
+        if self.capacity is not None and self.capacity <= 0:
+            return 0
+        parsed = [self._parse(row) for row in rows]
+        if not parsed:
+            return 0
+        self._write(parsed)
+        evicted = self._evict()
+        self.version += 1
+        return evicted
+
+    def extend_columns(self, columns):
+        """Appends many rows given as one sequence of values per variable."""
+        if len(columns) != len(self.variables):
+            raise ValueError("Expected %d columns, got %d" % (len(self.variables), len(columns)))
+        for values in columns:
+            if len(values) != len(columns[0]):
+                raise ValueError("All columns must have the same length")
+        return self.extend(list(zip(*columns)))
+
+    def flush(self):
+        """Writes buffered rows to the file."""
+        if self._dirty:
+            self.file.flush()
+            self._dirty = False
+
+    def _buffer(self, end_offset):
+        """Returns the mmap covering `end_offset`, or None without mmap."""
+        self.flush()
+        if mmap is None:
+            return None
+        if self._map is None or len(self._map) < end_offset:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _read(self, offset, size):
+        buffer = self._buffer(offset + size)
+        if buffer is not None:
+            return buffer, offset
+        self.file.seek(offset)
+        return self.file.read(size), 0
+
+    def _offset(self, position):
+        return self.header_size + (self.first_sequence + position) * self.row_size
+
+    def row(self, position):
+        data, offset = self._read(self._offset(position), self.row_size)
+        return struct.unpack_from(self.row_format, data, offset)
+
+    def value(self, position, column_index):
+        return self.row(position)[column_index]
+
+    def time_at(self, position):
+        data, offset = self._read(self._offset(position), 8)
+        return struct.unpack_from(self.time_format, data, offset)[0]
+
+    def rows(self, start=0, end=None):
+        """Yields the rows from position `start` up to, excluding, `end` as tuples, reading them in chunks."""
+        if end is None or end > self.count:
+            end = self.count
+        position = start
+        while position < end:
+            chunk = min(_READ_ROWS, end - position)
+            data, offset = self._read(self._offset(position), chunk * self.row_size)
+            for _ in range(chunk):
+                yield struct.unpack_from(self.row_format, data, offset)
+                offset += self.row_size
+            position += chunk
+
+    def bisect_time(self, time, low=0, high=None):
+        """Returns the position of the first row at or after `time`, `len(self)` if there is none."""
+        if high is None:
+            high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.time_at(middle) < time:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def time_range(self, start=None, end=None):
+        """Returns the positions (first, stop) of the rows with `start` <= time < `end`, both bounds are optional."""
+        first = 0 if start is None else self.bisect_time(start)
+        stop = self.count if end is None else self.bisect_time(end, first)
+        return first, stop
+
+    def sequence_at(self, position):
+        return self.first_sequence + position
+
+    def resize(self, capacity):
+        """Changes how many of the newest rows are visible, rows evicted earlier stay evicted."""
+        self.capacity = capacity
+        self._evict()
+        self.version += 1
+
+    def drop_oldest(self, count):
+        """Evicts the `count` oldest rows, they stay in the file."""
+        count = min(count, self.count)
+        if count <= 0:
+            return
+        self.first_sequence += count
+        self.count -= count
+        self.version += 1
+
+    def clear(self):
+        """Evicts all rows, they stay in the file."""
+        self.first_sequence += self.count
+        self.count = 0
+        self.version += 1
@@ -0,0 +1,175 @@
+import aas_core3.types as aas_types
+
+try:
+    from embedded_system.submodel_templates.time_series_storage import RingBufferStorage, TimeSeriesVariable
+except ImportError:
+    try:
+        from submodel_templates.time_series_storage import RingBufferStorage, TimeSeriesVariable
+    except ImportError:
+        raise ImportError("Could not import 'time_series_storage' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series import Segment, SegmentType
+except ImportError:
+    try:
+        from submodel_templates.time_series import Segment, SegmentType
+    except ImportError:
+        raise ImportError("Could not import 'time_series' from either path.")
+
+try:
+    from embedded_system.submodel_templates.time_series_aggregation import bucket_start
+except ImportError:
+    try:
+        from submodel_templates.time_series_aggregation import bucket_start
+    except ImportError:
+        raise ImportError("Could not import 'bucket_start' from either path.")
+
+
+def rollup_variables(variables):
+    """
+    Returns the variables of the rollup records of `variables`: the start of the bucket as time,
+    the count of samples and min, max and mean of every other variable.
+    """
+    time = variables[0]
+    rolled_up = [
+        TimeSeriesVariable(time.name, time.id_short, time.value_type, time.description, time.parse),
+        TimeSeriesVariable("count", "Count", aas_types.DataTypeDefXSD.LONG),
+    ]
+    for variable in variables[1:]:
+        rolled_up.append(TimeSeriesVariable(variable.name + "_min", variable.id_short + " Min", variable.value_type))
+        rolled_up.append(TimeSeriesVariable(variable.name + "_max", variable.id_short + " Max", variable.value_type))
+        rolled_up.append(TimeSeriesVariable(variable.name + "_mean", variable.id_short + " Mean"))
+    return rolled_up
+
+
+class RollupTier:
+    """
+    Folds samples into buckets of `interval` time units and stores one rollup record per closed
+    bucket in a bounded storage of `capacity` records.
+
+    Only the open bucket is kept as running count, min, max and sum per variable, so adding a
+    sample is O(1). A bucket is closed by the first sample of a later bucket. Late samples of an
+    earlier bucket are folded into the open one.
+    """
+
+    def __init__(self, segment_id_short, interval, variables, capacity, storage=None):
+        self.segment_id_short = segment_id_short
+        self.interval = interval
+        self.variables = rollup_variables(variables)
+        self.storage = storage if storage is not None else RingBufferStorage(self.variables, capacity)
+        self.bucket = None
+        self.count = 0
+        self.minimums = None
+        self.maximums = None
+        self.sums = None
+
+    def add(self, time, count, minimums, maximums, sums):
+        """
+        Adds `count` samples at `time` with their min, max and sum per variable. Returns the
+        closed bucket as (start, count, minimums, maximums, sums) if this closed one, else None.
+        """
+        start = bucket_start(time, self.interval)
+        closed = None
+        if self.bucket is not None and start > self.bucket:
+            closed = self.close()
+
+        if self.bucket is None:
+            self.bucket = start
+            self.count = count
+            self.minimums = list(minimums)
+            self.maximums = list(maximums)
+            self.sums = list(sums)
+            return closed
+
+        self.count += count
+        current_minimums = self.minimums
+        current_maximums = self.maximums
+        current_sums = self.sums
+        for index in range(len(current_sums)):
+            if minimums[index] < current_minimums[index]:
+                current_minimums[index] = minimums[index]
+            if maximums[index] > current_maximums[index]:
+                current_maximums[index] = maximums[index]
+            current_sums[index] += sums[index]
+        return closed
+
+    def close(self):
+        """Stores the open bucket as a rollup record and returns it, see `add`."""
+        if self.bucket is None:
+            return None
+        row = [self.bucket, self.count]
+        for minimum, maximum, total in zip(self.minimums, self.maximums, self.sums):
+            row.append(minimum)
+            row.append(maximum)
+            row.append(total / self.count)
+        self.storage.append(row)
+
+        closed = (self.bucket, self.count, self.minimums, self.maximums, self.sums)
+        self.bucket = None
+        self.minimums = self.maximums = self.sums = None
+        self.count = 0
+        return closed
+
+
+class RetentionPolicy:
+    """
+    Tiered retention for the records of a TimeSeries: raw records are kept for `raw_window` time
+    units and every sample is folded into per-minute rollups, whose closed buckets are folded
+    into per-hour rollups. Each tier is a bounded storage, the rollups answer long range queries
+    after the raw records are gone. Times are in units of `units_per_second`, seconds by default.
+
+    The policy is attached to the Records collection of the raw segment, which calls
+    `records_added` after every append. `segments()` returns the segments of the rollup tiers
+    for the TimeSeries submodel.
+    """
+
+    def __init__(self, variables, raw_window=None, units_per_second=1, minute_capacity=60, hour_capacity=48):
+        self.variables = variables
+        self.raw_window = raw_window
+        self.tiers = [
+            RollupTier("MinuteRollupSegment", 60 * units_per_second, variables, minute_capacity),
+            RollupTier("HourRollupSegment", 3600 * units_per_second, variables, hour_capacity),
+        ]
+        self._changed = []
+
+    def add_sample(self, row):
+        """Folds one parsed record, time first, into the tiers."""
+        values = row[1:]
+        tiers = self.tiers
+        closed = tiers[0].add(row[0], 1, values, values, values)
+        for index in range(1, len(tiers)):
+            if closed is None:
+                return
+            self._mark_changed(tiers[index - 1])
+            closed = tiers[index].add(*closed)
+        if closed is not None:
+            self._mark_changed(tiers[-1])
+
+    def _mark_changed(self, tier):
+        if tier.segment_id_short not in self._changed:
+            self._changed.append(tier.segment_id_short)
+
+    def records_added(self, storage, rows):
+        """Folds the parsed `rows` just appended to the raw `storage` into the tiers, then applies the raw window."""
+        for row in rows:
+            self.add_sample(row)
+
+        stored = len(storage)
+        if self.raw_window is not None and stored:
+            cutoff = storage.time_at(stored - 1) - self.raw_window
+            expired = storage.bisect_time(cutoff)
+            if expired:
+                storage.drop_oldest(expired)
+
+    def take_changed_segments(self):
+        """Returns the idShorts of the rollup segments that got records since the last call."""
+        changed = self._changed
+        self._changed = []
+        return changed
+
+    def segments(self):
+        """Returns one InternalSegment-like Segment per rollup tier, to be added to the TimeSeries Segments."""
+        return [
+            Segment(segment_type=SegmentType.INTERNAL_SEGMENT, id_short=tier.segment_id_short, storage=tier.storage)
+            for tier in self.tiers
+        ]
@@ -0,0 +1,148 @@
+import aas_core3.types as aas_types
+
+# Weight of the newest sample in the exponentially weighted moving average
+EWMA_ALPHA = 0.1
+
+_INFINITY = float("inf")
+
+
+def lexical(value):
+    """Returns the XSD lexical form of a statistic, 'NaN', 'INF' and '-INF' for the non-finite floats."""
+    if value != value:
+        return "NaN"
+    if value == _INFINITY:
+        return "INF"
+    if value == -_INFINITY:
+        return "-INF"
+    return repr(value)
+
+
+class RunningStatistics:
+    """
+    Count, mean, sample variance (Welford), min, max and an exponentially weighted moving average
+    of one variable, each sample updates them in O(1) without keeping it.
+    """
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = None
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.ewma = None
+
+    def add(self, value):
+        self.count += 1
+        if self.count == 1:
+            self.mean = float(value)
+            self.minimum = value
+            self.maximum = value
+            self.ewma = float(value)
+            return
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self.ewma += self.alpha * (value - self.ewma)
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+
+class StatisticProperty(aas_types.Property):
+    """
+    A read-only Property whose value is read from `RunningStatistics` when it is serialized or
+    navigated, so updating the statistics does not touch the Property at all.
+    """
+
+    read_only = True
+
+    def __init__(self, statistics, attribute, id_short, value_type, description=None):
+        self.statistics = statistics
+        self.attribute = attribute
+        super().__init__(
+            id_short=id_short,
+            category="VARIABLE",
+            description=description,
+            value_type=value_type,
+        )
+
+    @property
+    def value(self):
+        value = getattr(self.statistics, self.attribute)
+        return None if value is None else lexical(value)
+
+    @value.setter
+    def value(self, value):
+        # Only the constructor sets the value, to None
+        pass
+
+
+# (attribute of RunningStatistics, idShort of the Property, description) of the published statistics
+_PUBLISHED = (
+    ("count", "Count", "Number of records since the start."),
+    ("mean", "Mean", "Mean of all records since the start."),
+    ("variance", "Variance", "Sample variance of all records since the start."),
+    ("minimum", "Min", "Smallest value since the start."),
+    ("maximum", "Max", "Largest value since the start."),
+    ("ewma", "EWMA", "Exponentially weighted moving average."),
+)
+
+
+class StatisticsCollection(aas_types.SubmodelElementCollection):
+    """
+    Running statistics of the variables of a TimeSeries, except the time, as a collection with
+    one collection of read-only Properties per variable, e.g.
+    'Statistics.Circulation Fluid Temperature.Mean'. They cover all records since the start,
+    including evicted ones, and are updated with `records_added` as records are appended.
+    """
+
+    def __init__(self, variables, alpha=EWMA_ALPHA, id_short="Statistics"):
+        self.variables = variables
+        self.running = [RunningStatistics(alpha) for _ in variables[1:]]
+        super().__init__(
+            id_short=id_short,
+            description=[
+                aas_types.LangStringTextType(
+                    language="en",
+                    text="Running statistics of the records of the time series segment.",
+                ),
+            ],
+            value=[
+                aas_types.SubmodelElementCollection(
+                    id_short=variable.id_short,
+                    value=[
+                        StatisticProperty(
+                            running, attribute, id_short,
+                            aas_types.DataTypeDefXSD.LONG if attribute == "count"
+                            else variable.value_type if attribute in ("minimum", "maximum")
+                            else aas_types.DataTypeDefXSD.DOUBLE,
+                            [aas_types.LangStringTextType(language="en", text=text)],
+                        )
+                        for attribute, id_short, text in _PUBLISHED
+                    ],
+                )
+                for variable, running in zip(variables[1:], self.running)
+            ],
+        )
+
+    def records_added(self, storage, rows):
+        """Adds the parsed `rows`, time first, to the statistics."""
+        running = self.running
+        for row in rows:
+            for index in range(len(running)):
+                running[index].add(row[index + 1])
+
+    def statistics_of(self, name):
+        """Returns the RunningStatistics of a variable by name or idShort, None if there is no such variable."""
+        for variable, running in zip(self.variables[1:], self.running):
+            if name == variable.name or name == variable.id_short:
+                return running
+        return None
@@ -0,0 +1,706 @@
+import aas_core3.types as aas_types
+
+try:
+    from array import array
+except ImportError:
+    try:
+        from uarray import array
+    except ImportError:
+        raise ImportError("Could not import 'array' from either path.")
+
+_INTEGER_VALUE_TYPES = (
+    aas_types.DataTypeDefXSD.BYTE,
+    aas_types.DataTypeDefXSD.INT,
+    aas_types.DataTypeDefXSD.INTEGER,
+    aas_types.DataTypeDefXSD.LONG,
+    aas_types.DataTypeDefXSD.SHORT,
+    aas_types.DataTypeDefXSD.UNSIGNED_BYTE,
+    aas_types.DataTypeDefXSD.UNSIGNED_INT,
+    aas_types.DataTypeDefXSD.UNSIGNED_SHORT,
+)
+
+
+def _iso8601_to_epoch(text):
+    date, separator, clock = text.replace(" ", "T", 1).partition("T")
+    offset = 0
+    if clock[-1:] in ("Z", "z"):
+        clock = clock[:-1]
+    elif len(clock) > 6 and clock[-6] in "+-" and clock[-3] == ":":
+        offset = (int(clock[-5:-3]) * 3600 + int(clock[-2:]) * 60) * (1 if clock[-6] == "+" else -1)
+        clock = clock[:-6]
+
+    parts = date.split("-")
+    if len(parts) != 3 or len(parts[0]) != 4 or len(parts[1]) != 2 or len(parts[2]) != 2:
+        raise ValueError("Invalid timestamp: " + repr(text))
+    year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
+    hour = minute = second = 0
+    if separator:
+        times = clock.split(":")
+        if len(times) not in (2, 3):
+            raise ValueError("Invalid timestamp: " + repr(text))
+        hour, minute = int(times[0]), int(times[1])
+        if len(times) == 3:
+            # Fractions of a second are cut off
+            second = int(times[2].split(".")[0])
+    if not (1 <= month <= 12 and 1 <= day <= 31 and hour <= 23 and minute <= 59 and second <= 60):
+        raise ValueError("Invalid timestamp: " + repr(text))
+
+    # Days since 1970-01-01 of the proleptic Gregorian calendar, the year starting in March
+    shifted_year = year - 1 if month <= 2 else year
+    era = shifted_year // 400
+    year_of_era = shifted_year - era * 400
+    day_of_year = (153 * (month - 3 if month > 2 else month + 9) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second - offset
+
+
+def parse_timestamp(value):
+    """
+    Parses a record time as integer epoch seconds. Numbers and integer strings are taken as they
+    are, ISO 8601 date times like '2024-01-01T00:00:00Z' or '2024-01-01T01:00:00+01:00' are
+    converted, UTC if they have no offset. Fractions of a second are cut off. Raises ValueError
+    for anything else.
+    """
+    if not isinstance(value, str):
+        return int(value)
+    try:
+        return int(value)
+    except ValueError:
+        return _iso8601_to_epoch(value.strip())
+
+
+class TimeSeriesVariable:
+    """
+    One column of a TimeSeries record, e.g. the circulation fluid temperature of the chiller.
+
+    `name` is the short key used by the ingestion API ('cft'), `id_short` the one of the
+    Property in a materialized record ('Circulation Fluid Temperature'). Integer types are
+    stored as 64 bit integers, everything else as double. `parse` converts the values passed in,
+    by default `int` or `float`, e.g. `parse_timestamp` for a time that may be given in ISO 8601.
+    """
+
+    def __init__(self, name, id_short, value_type=aas_types.DataTypeDefXSD.DOUBLE, description=None, parse=None):
+        self.name = name
+        self.id_short = id_short
+        self.value_type = value_type
+        self.description = description
+        if value_type in _INTEGER_VALUE_TYPES:
+            self.typecode = "q"
+            self.parse = int
+        else:
+            self.typecode = "d"
+            self.parse = float
+        if parse is not None:
+            self.parse = parse
+
+
+class RingBufferStorage:
+    """
+    Columnar storage for the records of a TimeSeries segment.
+
+    Every variable is kept in its own fixed-capacity typed array and rows are addressed by their
+    position, 0 being the oldest row still stored. Appending is O(1) and, once the capacity is
+    reached, overwrites the oldest row. Every row also has a sequence number that grows with
+    every append and is never reused, so views of a row can tell whether it is still stored.
+
+    The first variable is the time of the record. Rows are expected in time order.
+    """
+
+    def __init__(self, variables, capacity=10):
+        self.variables = variables
+        self.capacity = capacity
+        self.columns = [array(variable.typecode, [0] * capacity) for variable in variables]
+        self.start = 0
+        self.count = 0
+        self.first_sequence = 0
+
+        # Bumped on every change, views built from the storage compare it
+        self.version = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        """Appends one row of values in variable order, returns True if the oldest row was evicted."""
+        capacity = self.capacity
+        if capacity <= 0:
+            return False
+        # Parsed before the storage is touched, so a value that does not parse leaves it unchanged
+        variables = self.variables
+        values = [variables[column_index].parse(row[column_index]) for column_index in range(len(variables))]
+
+        evicted = self.count == capacity
+        index = self.start + self.count
+        if evicted:
+            index = self.start
+            self.start = (self.start + 1) % capacity
+            self.first_sequence += 1
+        else:
+            self.count += 1
+        if index >= capacity:
+            index -= capacity
+
+        columns = self.columns
+        for column_index in range(len(columns)):
+            columns[column_index][index] = values[column_index]
+        self.version += 1
+        return evicted
+
+    def extend(self, rows):
+        """Appends many rows of values in variable order, see `extend_columns`."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        for row in rows:
+            if len(row) != len(self.variables):
+                raise ValueError("Expected %d values per row, got %d" % (len(self.variables), len(row)))
+        return self.extend_columns(list(zip(*rows)))
+
+    def extend_columns(self, columns):
+        """
+        Appends many rows given as one sequence of values per variable, in variable order.
+
+        All values are parsed before the storage is touched, so a value that does not parse leaves
+        it unchanged. Rows that would be overwritten within the same batch are never written. The
+        version is bumped once. Returns the number of rows evicted, counting those of the batch.
+        """
+        if len(columns) != len(self.variables):
+            raise ValueError("Expected %d columns, got %d" % (len(self.variables), len(columns)))
+        capacity = self.capacity
+        added = len(columns[0]) if columns else 0
+        for values in columns:
+            if len(values) != added:
+                raise ValueError("All columns must have the same length")
+        if capacity <= 0 or added == 0:
+            return 0
+
+        # Only the newest rows that fit are written
+        skipped = added - capacity if added > capacity else 0
+        parsed = []
+        for column_index in range(len(columns)):
+            variable = self.variables[column_index]
+            values = columns[column_index]
+            parse = variable.parse
+            parsed.append(array(variable.typecode, [parse(values[row]) for row in range(skipped, added)]))
+
+        end = self.start + self.count + skipped
+        for column_index in range(len(parsed)):
+            column = self.columns[column_index]
+            index = end % capacity
+            for value in parsed[column_index]:
+                column[index] = value
+                index += 1
+                if index == capacity:
+                    index = 0
+
+        total = self.count + added
+        evicted = total - capacity if total > capacity else 0
+        self.start = (self.start + evicted) % capacity
+        self.count = total - evicted
+        self.first_sequence += evicted
+        self.version += 1
+        return evicted
+
+    def physical_index(self, position):
+        index = self.start + position
+        return index - self.capacity if index >= self.capacity else index
+
+    def row(self, position):
+        index = self.physical_index(position)
+        return tuple(column[index] for column in self.columns)
+
+    def value(self, position, column_index):
+        return self.columns[column_index][self.physical_index(position)]
+
+    def time_at(self, position):
+        return self.columns[0][self.physical_index(position)]
+
+    def rows(self, start=0, end=None):
+        """Yields the rows from position `start` up to, excluding, `end` as tuples."""
+        if end is None or end > self.count:
+            end = self.count
+        for position in range(start, end):
+            yield self.row(position)
+
+    def bisect_time(self, time, low=0, high=None):
+        """Returns the position of the first row at or after `time`, `len(self)` if there is none."""
+        if high is None:
+            high = self.count
+        times = self.columns[0]
+        start = self.start
+        capacity = self.capacity
+        while low < high:
+            middle = (low + high) // 2
+            index = start + middle
+            if index >= capacity:
+                index -= capacity
+            if times[index] < time:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def time_range(self, start=None, end=None):
+        """Returns the positions (first, stop) of the rows with `start` <= time < `end`, both bounds are optional."""
+        first = 0 if start is None else self.bisect_time(start)
+        stop = self.count if end is None else self.bisect_time(end, first)
+        return first, stop
+
+    def segments(self, first=0, stop=None):
+        """Returns the physical index ranges (low, high) holding the rows from `first` up to `stop`, at most two."""
+        if stop is None or stop > self.count:
+            stop = self.count
+        if first >= stop:
+            return []
+        low = self.physical_index(first)
+        high = low + stop - first
+        if high <= self.capacity:
+            return [(low, high)]
+        return [(low, self.capacity), (0, high - self.capacity)]
+
+    def sequence_at(self, position):
+        return self.first_sequence + position
+
+    def resize(self, capacity):
+        """Changes the capacity, keeping the newest rows that still fit."""
+        rows = list(self.rows(max(0, self.count - capacity)))
+        self.first_sequence += self.count - len(rows)
+        self.capacity = capacity
+        self.columns = [array(variable.typecode, [0] * capacity) for variable in self.variables]
+        self.start = 0
+        self.count = 0
+        for row in rows:
+            self.append(row)
+        self.version += 1
+
+    def drop_oldest(self, count):
+        """Evicts the `count` oldest rows, e.g. the ones that left a retention window."""
+        count = min(count, self.count)
+        if count <= 0:
+            return
+        self.start = (self.start + count) % self.capacity
+        self.count -= count
+        self.first_sequence += count
+        self.version += 1
+
+    def clear(self):
+        self.first_sequence += self.count
+        self.start = 0
+        self.count = 0
+        self.version += 1
+
+
+# region: Compressed storage
+try:
+    import struct
+except ImportError:
+    try:
+        import ustruct as struct
+    except ImportError:
+        raise ImportError("Could not import 'struct' from either path.")
+
+try:
+    _bit_length = int.bit_length
+except AttributeError:
+    # MicroPython
+    def _bit_length(value):
+        length = 0
+        while value >= 256:
+            value >>= 8
+            length += 8
+        while value:
+            value >>= 1
+            length += 1
+        return length
+
+_MASK_64 = (1 << 64) - 1
+
+# (control bits, control bit count, value bit count) of the delta-of-delta classes, Gorilla style
+_DELTA_OF_DELTA_CLASSES = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+    (0b1111, 4, 64),
+)
+
+
+def _signed_64(value):
+    value &= _MASK_64
+    return value - (1 << 64) if value >> 63 else value
+
+
+class _BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.accumulator = 0
+        self.bit_count = 0
+
+    def write(self, value, width):
+        self.accumulator = (self.accumulator << width) | value
+        self.bit_count += width
+        while self.bit_count >= 8:
+            self.bit_count -= 8
+            self.data.append(self.accumulator >> self.bit_count)
+            self.accumulator &= (1 << self.bit_count) - 1
+
+    def to_bytes(self):
+        if self.bit_count:
+            self.data.append(self.accumulator << (8 - self.bit_count))
+            self.accumulator = 0
+            self.bit_count = 0
+        return bytes(self.data)
+
+
+class _BitReader:
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+        self.accumulator = 0
+        self.bit_count = 0
+
+    def read(self, width):
+        while self.bit_count < width:
+            self.accumulator = (self.accumulator << 8) | self.data[self.position]
+            self.position += 1
+            self.bit_count += 8
+        self.bit_count -= width
+        value = self.accumulator >> self.bit_count
+        self.accumulator &= (1 << self.bit_count) - 1
+        return value
+
+
+def _encode_integers(writer, values):
+    """Delta-of-delta encoding, constant intervals cost one bit per value."""
+    previous = values[0]
+    writer.write(previous & _MASK_64, 64)
+    previous_delta = 0
+    for index in range(1, len(values)):
+        value = values[index]
+        delta = _signed_64(value - previous)
+        delta_of_delta = _signed_64(delta - previous_delta)
+        if delta_of_delta == 0:
+            writer.write(0, 1)
+        else:
+            for control, control_width, width in _DELTA_OF_DELTA_CLASSES:
+                limit = 1 << (width - 1)
+                if -limit <= delta_of_delta < limit or width == 64:
+                    writer.write(control, control_width)
+                    writer.write(delta_of_delta & ((1 << width) - 1), width)
+                    break
+        previous = value
+        previous_delta = delta
+
+
+def _decode_integers(reader, count, column):
+    previous = _signed_64(reader.read(64))
+    column.append(previous)
+    previous_delta = 0
+    for _ in range(1, count):
+        if reader.read(1):
+            # The control bits are ones up to the first zero, the last class has no zero
+            width = _DELTA_OF_DELTA_CLASSES[-1][2]
+            for _, _, class_width in _DELTA_OF_DELTA_CLASSES[:-1]:
+                if not reader.read(1):
+                    width = class_width
+                    break
+            raw = reader.read(width)
+            delta_of_delta = raw - (1 << width) if raw >> (width - 1) else raw
+            previous_delta = _signed_64(previous_delta + delta_of_delta)
+        previous = _signed_64(previous + previous_delta)
+        column.append(previous)
+
+
+def _float_bits(value):
+    return struct.unpack(">Q", struct.pack(">d", value))[0]
+
+
+def _encode_floats(writer, values):
+    """XOR encoding, repeated values cost one bit and slowly changing ones a few meaningful bits."""
+    previous = _float_bits(values[0])
+    writer.write(previous, 64)
+    previous_leading = -1
+    previous_trailing = 0
+    for index in range(1, len(values)):
+        bits = _float_bits(values[index])
+        xor = bits ^ previous
+        previous = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        leading = 64 - _bit_length(xor)
+        trailing = _bit_length(xor & -xor) - 1
+        if previous_leading >= 0 and leading >= previous_leading and trailing >= previous_trailing:
+            # Fits the meaningful bits of the previous value
+            writer.write(0b10, 2)
+            writer.write(xor >> previous_trailing, 64 - previous_leading - previous_trailing)
+        else:
+            length = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 6)
+            writer.write(length - 1, 6)
+            writer.write(xor >> trailing, length)
+            previous_leading = leading
+            previous_trailing = trailing
+
+
+def _decode_floats(reader, count, column):
+    previous = reader.read(64)
+    column.append(struct.unpack(">d", struct.pack(">Q", previous))[0])
+    leading = 0
+    trailing = 0
+    for _ in range(1, count):
+        if reader.read(1):
+            if reader.read(1):
+                leading = reader.read(6)
+                trailing = 64 - leading - reader.read(6) - 1
+            previous ^= reader.read(64 - leading - trailing) << trailing
+        column.append(struct.unpack(">d", struct.pack(">Q", previous))[0])
+
+
+class CompressedStorage:
+    """
+    Compressed alternative to `RingBufferStorage` with the same interface, for long histories.
+
+    Rows are collected in an uncompressed block of `block_size` rows. Full blocks are sealed
+    into a bit stream per block, timestamps and other integer variables delta-of-delta encoded
+    and floats XOR encoded like in Facebook's Gorilla, so regular sampling intervals and slowly
+    changing values take a few bits per sample. Sealed blocks are decoded on access, the last
+    one decoded for random access like `row` is kept. `rows` decodes a block at a time while
+    iterating and keeps none of them. Once `capacity` is exceeded the oldest rows are evicted,
+    their memory is released a block at a time.
+    """
+
+    def __init__(self, variables, capacity=10000, block_size=64):
+        self.variables = variables
+        self.capacity = capacity
+        self.block_size = block_size
+        # Sealed blocks as (first time, last time, encoded bytes)
+        self.blocks = []
+        self.active = self._new_block()
+        # Evicted rows at the start of the first block
+        self.skip = 0
+        self.count = 0
+        self.first_sequence = 0
+        self.version = 0
+        self._decoded_block = None
+        self._decoded_columns = None
+
+    def __len__(self):
+        return self.count
+
+    def _new_block(self):
+        return [array(variable.typecode) for variable in self.variables]
+
+    def _seal(self):
+        writer = _BitWriter()
+        for variable, column in zip(self.variables, self.active):
+            if variable.typecode == "q":
+                _encode_integers(writer, column)
+            else:
+                _encode_floats(writer, column)
+        times = self.active[0]
+        self.blocks.append((times[0], times[-1], writer.to_bytes()))
+        self.active = self._new_block()
+
+    def _decode_columns(self, block):
+        reader = _BitReader(block[2])
+        columns = []
+        for variable in self.variables:
+            column = array(variable.typecode)
+            if variable.typecode == "q":
+                _decode_integers(reader, self.block_size, column)
+            else:
+                _decode_floats(reader, self.block_size, column)
+            columns.append(column)
+        return columns
+
+    def _decode(self, block):
+        if self._decoded_block is not block:
+            self._decoded_columns = self._decode_columns(block)
+            self._decoded_block = block
+        return self._decoded_columns
+
+    def _evict(self):
+        evicted = 0
+        while self.count > self.capacity:
+            self.count -= 1
+            self.skip += 1
+            self.first_sequence += 1
+            evicted += 1
+            if self.blocks and self.skip >= self.block_size:
+                del self.blocks[0]
+                self.skip -= self.block_size
+        return evicted
+
+    def _append_parsed(self, values):
+        for column, value in zip(self.active, values):
+            column.append(value)
+        self.count += 1
+        if len(self.active[0]) == self.block_size:
+            self._seal()
+
+    def append(self, row):
+        """Appends one row of values in variable order, returns True if the oldest row was evicted."""
+        if self.capacity <= 0:
+            return False
+        self._append_parsed([variable.parse(value) for variable, value in zip(self.variables, row)])
+        evicted = self._evict()
+        self.version += 1
+        return evicted > 0
+
+    def extend(self, rows):
+        """Appends many rows of values in variable order, see `extend_columns`."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        for row in rows:
+            if len(row) != len(self.variables):
+                raise ValueError("Expected %d values per row, got %d" % (len(self.variables), len(row)))
+        return self.extend_columns(list(zip(*rows)))
+
+    def extend_columns(self, columns):
+        """Appends many rows given as one sequence of values per variable, like `RingBufferStorage.extend_columns`."""
+        if len(columns) != len(self.variables):
+            raise ValueError("Expected %d columns, got %d" % (len(self.variables), len(columns)))
+        added = len(columns[0]) if columns else 0
+        for values in columns:
+            if len(values) != added:
+                raise ValueError("All columns must have the same length")
+        if self.capacity <= 0 or added == 0:
+            return 0
+
+        skipped = added - self.capacity if added > self.capacity else 0
+        parsed = [[variable.parse(values[row]) for row in range(skipped, added)]
+                  for variable, values in zip(self.variables, columns)]
+
+        evicted = 0
+        if skipped:
+            # Everything stored so far is evicted by the batch, as are its oldest rows
+            evicted = self.count + skipped
+            self.first_sequence += evicted
+            self.blocks = []
+            self.active = self._new_block()
+            self.skip = 0
+            self.count = 0
+        for row in zip(*parsed):
+            self._append_parsed(row)
+        evicted += self._evict()
+        self.version += 1
+        return evicted
+
+    def _locate(self, position):
+        """Returns the columns holding the row at `position` and its index in them."""
+        index = self.skip + position
+        block_index = index // self.block_size
+        if block_index < len(self.blocks):
+            return self._decode(self.blocks[block_index]), index - block_index * self.block_size
+        return self.active, index - len(self.blocks) * self.block_size
+
+    def row(self, position):
+        columns, index = self._locate(position)
+        return tuple(column[index] for column in columns)
+
+    def value(self, position, column_index):
+        columns, index = self._locate(position)
+        return columns[column_index][index]
+
+    def time_at(self, position):
+        return self.value(position, 0)
+
+    def rows(self, start=0, end=None):
+        """
+        Yields the rows from position `start` up to, excluding, `end` as tuples. Each sealed block
+        is decoded once and dropped when its last row was yielded.
+        """
+        if end is None or end > self.count:
+            end = self.count
+        block_size = self.block_size
+        index = self.skip + start
+        stop = self.skip + end
+        while index < stop:
+            block_index = index // block_size
+            offset = block_index * block_size
+            if block_index < len(self.blocks):
+                block = self.blocks[block_index]
+                columns = self._decoded_columns if block is self._decoded_block else self._decode_columns(block)
+                block_stop = min(stop, offset + block_size)
+            else:
+                columns = self.active
+                block_stop = stop
+            for row in zip(*[column[index - offset:block_stop - offset] for column in columns]):
+                yield row
+            index = block_stop
+
+    def bisect_time(self, time, low=0, high=None):
+        """Returns the position of the first row at or after `time`, only decoding the block it is in."""
+        if high is None:
+            high = self.count
+        blocks = self.blocks
+        first_block, last_block = 0, len(blocks)
+        while first_block < last_block:
+            middle = (first_block + last_block) // 2
+            if blocks[middle][1] < time:
+                first_block = middle + 1
+            else:
+                last_block = middle
+        block_low = max(0, first_block * self.block_size - self.skip)
+        block_high = min(self.count, (first_block + 1) * self.block_size - self.skip) \
+            if first_block < len(blocks) else self.count
+
+        while block_low < block_high:
+            middle = (block_low + block_high) // 2
+            if self.time_at(middle) < time:
+                block_low = middle + 1
+            else:
+                block_high = middle
+        return min(max(block_low, low), high)
+
+    def time_range(self, start=None, end=None):
+        """Returns the positions (first, stop) of the rows with `start` <= time < `end`, both bounds are optional."""
+        first = 0 if start is None else self.bisect_time(start)
+        stop = self.count if end is None else self.bisect_time(end, first)
+        return first, stop
+
+    def sequence_at(self, position):
+        return self.first_sequence + position
+
+    def resize(self, capacity):
+        """Changes the capacity, keeping the newest rows that still fit."""
+        self.capacity = capacity
+        self._evict()
+        self.version += 1
+
+    def drop_oldest(self, count):
+        """Evicts the `count` oldest rows, e.g. the ones that left a retention window."""
+        count = min(count, self.count)
+        if count <= 0:
+            return
+        self.count -= count
+        self.skip += count
+        self.first_sequence += count
+        while self.blocks and self.skip >= self.block_size:
+            del self.blocks[0]
+            self.skip -= self.block_size
+        self.version += 1
+
+    def clear(self):
+        self.first_sequence += self.count
+        self.blocks = []
+        self.active = self._new_block()
+        self.skip = 0
+        self.count = 0
+        self._decoded_block = None
+        self._decoded_columns = None
+        self.version += 1
+
+    def encoded_size(self):
+        """Returns the bytes used by the stored values, sealed blocks plus the uncompressed active block."""
+        size = 0
+        for block in self.blocks:
+            size += len(block[2])
+        for column in self.active:
+            size += len(column) * 8
+        return size
+
+# endregion
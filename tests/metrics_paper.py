@@ -5,16 +5,59 @@ import psutil
 import time
 import matplotlib.pyplot as plt
 from pympler import asizeof
-from aas_core3.jsonization import to_jsonable
+from aas_core3.jsonization import to_jsonable, to_json_bytes
 
 from aas_api.aas_api import AasApi
-from aas_templates.chiller import Chiller
+from aas_api.lfu_cache import LFUCache
+from aas_templates.chiller import Chiller, CHILLER_RECORD_VARIABLES
+from submodel_templates.time_series import RecordView
+from submodel_templates.time_series_storage import RingBufferStorage, CompressedStorage
 from aas_templates.performance_env import PerformanceEnv
 from types import ModuleType, FunctionType
 from gc import get_referents
 BLACKLIST = type, ModuleType, FunctionType
 
 
+class ScanningLFUCache:
+    """The previous LFUCache, which scans all frequencies on eviction. Kept as benchmark baseline."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.cache = {}
+        self.freq = {}
+
+    def get(self, key):
+        if key in self.cache:
+            self.freq[key] = self.freq.get(key, 0) + 1
+            return self.cache[key]
+        return None
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+
+        if key in self.cache:
+            self.cache[key] = value
+            self.freq[key] = self.freq.get(key, 0) + 1
+            return
+
+        if len(self.cache) >= self.capacity:
+            min_freq = float('inf')
+            lfu_key = None
+
+            for k, f in self.freq.items():
+                if f < min_freq:
+                    min_freq = f
+                    lfu_key = k
+
+            if lfu_key:
+                del self.cache[lfu_key]
+                del self.freq[lfu_key]
+
+        self.cache[key] = value
+        self.freq[key] = 1
+
+
 class TestMetrics(unittest.TestCase):
 
     start_submodels = 0
@@ -752,4 +795,267 @@ class TestMetrics(unittest.TestCase):
         plt.show()
 
         # A simple True assertion so the test runner doesn't fail
-        self.assertTrue(True)
\ No newline at end of file
+        self.assertTrue(True)
+
+    def test_lfu_cache_speed(self):
+        """
+        Micro-benchmark of the bucketed LFUCache against the previous scanning implementation.
+        For every capacity the cache is filled and then hit with a mixed get/put workload over
+        twice as many keys as fit, so that roughly every second put evicts.
+        """
+        import random
+
+        capacities = [10, 100, 1000, 10000]
+        operations = 5000
+
+        scanning_times_ms = []
+        bucketed_times_ms = []
+
+        for capacity in capacities:
+            random.seed(capacity)
+            workload = [(random.random() < 0.5, "key_" + str(random.randint(0, 2 * capacity)))
+                        for _ in range(operations)]
+
+            for cache_class, times_ms in ((ScanningLFUCache, scanning_times_ms), (LFUCache, bucketed_times_ms)):
+                cache = cache_class(capacity)
+                for i in range(capacity):
+                    cache.put("key_" + str(i), i)
+
+                t_start = time.time()
+                for is_get, key in workload:
+                    if is_get:
+                        cache.get(key)
+                    else:
+                        cache.put(key, key)
+                t_end = time.time()
+                times_ms.append((t_end - t_start) * 1000)
+
+            print(
+                f"[Capacity: {capacity}]\n"
+                f"  Scanning LFU: {scanning_times_ms[-1]:.2f} ms\n"
+                f"  Bucketed LFU: {bucketed_times_ms[-1]:.2f} ms\n"
+            )
+
+        plt.figure(figsize=(8, 5))
+        plt.plot(capacities, scanning_times_ms, marker='o', label='Scanning LFU (ms)')
+        plt.plot(capacities, bucketed_times_ms, marker='x', label='Bucketed LFU (ms)')
+        plt.xscale('log')
+        plt.xlabel('Cache capacity')
+        plt.ylabel(f'Time for {operations} operations (ms)')
+        plt.title("LFU Cache Speed vs. Capacity")
+        plt.grid(True)
+        plt.legend(loc='best')
+        plt.tight_layout()
+        plt.show()
+
+        self.assertTrue(True)
+
+    def test_json_bytes_encoder_speed(self):
+        """
+        Compares the single-pass to_json_bytes encoder against json.dumps(to_jsonable(x)) on the
+        Chiller and on PerformanceEnv instances with a growing number of submodels. Both must
+        produce the same bytes.
+        """
+        import json
+
+        repetitions = 20
+        submodel_counts = [0, 10, 50, 100, 200]
+
+        chiller = Chiller()
+        self.assertEqual(to_json_bytes(chiller), json.dumps(to_jsonable(chiller)).encode('utf-8'))
+
+        t_start = time.time()
+        for _ in range(repetitions):
+            json.dumps(to_jsonable(chiller)).encode('utf-8')
+        chiller_jsonable_ms = (time.time() - t_start) * 1000 / repetitions
+
+        t_start = time.time()
+        for _ in range(repetitions):
+            to_json_bytes(chiller)
+        chiller_encoder_ms = (time.time() - t_start) * 1000 / repetitions
+
+        print(
+            f"[Chiller]\n"
+            f"  json.dumps(to_jsonable): {chiller_jsonable_ms:.3f} ms\n"
+            f"  to_json_bytes:           {chiller_encoder_ms:.3f} ms\n"
+            f"  Speedup:                 {chiller_jsonable_ms / chiller_encoder_ms:.2f}x\n"
+        )
+
+        jsonable_times_ms = []
+        encoder_times_ms = []
+        json_sizes = []
+
+        env = PerformanceEnv()
+        for submodel_count in submodel_counts:
+            while len(env.submodels) < submodel_count + 1:
+                env.addSubmodel()
+
+            json_data = to_json_bytes(env)
+            self.assertEqual(json_data, json.dumps(to_jsonable(env)).encode('utf-8'))
+            json_sizes.append(len(json_data))
+
+            t_start = time.time()
+            for _ in range(repetitions):
+                json.dumps(to_jsonable(env)).encode('utf-8')
+            jsonable_times_ms.append((time.time() - t_start) * 1000 / repetitions)
+
+            t_start = time.time()
+            for _ in range(repetitions):
+                to_json_bytes(env)
+            encoder_times_ms.append((time.time() - t_start) * 1000 / repetitions)
+
+            print(
+                f"[Submodels: {len(env.submodels)}] JSON Size: {json_sizes[-1]} bytes\n"
+                f"  json.dumps(to_jsonable): {jsonable_times_ms[-1]:.3f} ms\n"
+                f"  to_json_bytes:           {encoder_times_ms[-1]:.3f} ms\n"
+            )
+
+        plt.figure(figsize=(8, 5))
+        plt.plot(json_sizes, jsonable_times_ms, marker='o', label='json.dumps(to_jsonable) (ms)')
+        plt.plot(json_sizes, encoder_times_ms, marker='x', label='to_json_bytes (ms)')
+        plt.xlabel('JSON size (bytes)')
+        plt.ylabel('Serialization time (ms)')
+        plt.title("Direct JSON Encoder vs. to_jsonable")
+        plt.grid(True)
+        plt.legend(loc='best')
+        plt.tight_layout()
+        plt.show()
+
+        self.assertTrue(True)
+
+    def test_time_series_batch_ingest_speed(self):
+        """
+        Compares the ingest throughput in rows per second of add_record_to_time_series, called once
+        per row, against add_records_to_time_series with batches of growing size. Both must leave
+        the same records behind, compared row by row and through the $value of every Record.
+        """
+        row_count = 5000
+        batch_sizes = [1, 10, 50, 100, 500]
+        max_record_count = 100
+        rows = [(i, 20.0 + i % 10, 1, 2, 3, 0, 0, 0, 0, 0) for i in range(row_count)]
+        records_path = "Segments.InternalSegment.Records"
+
+        def stored_records(api):
+            storage = api.get_time_series_records()[2].storage
+            values = api.get_all_submodel_elements(None, "TimeSeries", "$value", id_short_path=records_path)
+            return list(storage.rows()), values
+
+        api = AasApi(Chiller())
+        t_start = time.time()
+        for row in rows:
+            api.add_record_to_time_series(*row, max_record_count=max_record_count)
+        single_rows_per_s = row_count / (time.time() - t_start)
+        expected_rows, expected_values = stored_records(api)
+        self.assertEqual(len(expected_rows), max_record_count)
+        self.assertEqual(expected_rows[0][0], row_count - max_record_count)
+        print(f"[Per record] {single_rows_per_s:.0f} rows/s")
+
+        batch_rows_per_s = []
+        for batch_size in batch_sizes:
+            api = AasApi(Chiller())
+            t_start = time.time()
+            for offset in range(0, row_count, batch_size):
+                api.add_records_to_time_series(rows=rows[offset:offset + batch_size],
+                                               max_record_count=max_record_count)
+            batch_rows_per_s.append(row_count / (time.time() - t_start))
+            batch_rows, batch_values = stored_records(api)
+            self.assertEqual(batch_rows, expected_rows)
+            self.assertEqual(batch_values, expected_values)
+            print(
+                f"[Batch size: {batch_size}] {batch_rows_per_s[-1]:.0f} rows/s, "
+                f"speedup {batch_rows_per_s[-1] / single_rows_per_s:.2f}x"
+            )
+
+        plt.figure(figsize=(8, 5))
+        plt.plot(batch_sizes, batch_rows_per_s, marker='o', label='add_records_to_time_series (rows/s)')
+        plt.axhline(single_rows_per_s, color='gray', linestyle='--', label='add_record_to_time_series (rows/s)')
+        plt.xscale('log')
+        plt.xlabel('Batch size (rows)')
+        plt.ylabel('Ingest throughput (rows/s)')
+        plt.title("Batched vs. Per Record TimeSeries Ingestion")
+        plt.grid(True)
+        plt.legend(loc='best')
+        plt.tight_layout()
+        plt.show()
+
+    def test_time_series_compressed_bytes_per_sample(self):
+        """
+        Compares the heap used per chiller sample by Record collections of string Properties, the
+        RingBufferStorage and the CompressedStorage, for a growing history of realistic values:
+        one record per second with some jitter, slowly drifting temperatures and rarely changing
+        flags. Both storages must return the same rows. The heap of both Records collections is
+        measured again after a GET of the TimeSeries submodel and the lookup of a record, which
+        must not keep the records they serialized.
+        """
+        import random
+
+        random.seed(42)
+        row_counts = [256, 1024, 4096, 16384]
+        variable_count = len(CHILLER_RECORD_VARIABLES)
+
+        def chiller_rows(count):
+            timestamp = 1700000000000
+            temperature = 20.0
+            pressure = 2.5
+            rows = []
+            for _ in range(count):
+                timestamp += 1000 if random.random() < 0.9 else random.randint(990, 1010)
+                temperature = round(temperature + random.choice((-0.1, 0.0, 0.0, 0.1)), 1)
+                pressure = round(pressure + random.choice((-0.01, 0.0, 0.0, 0.0, 0.01)), 2)
+                alarm = 1.0 if random.random() < 0.01 else 0.0
+                rows.append((timestamp, temperature, temperature + 2.0, pressure, 12.5, 1.0, 0.0, alarm, 0.0, 0.0))
+            return rows
+
+        record_bytes = []
+        ring_bytes = []
+        compressed_bytes = []
+        encoded_bytes = []
+        ring_after_get_bytes = []
+        compressed_after_get_bytes = []
+        for row_count in row_counts:
+            rows = chiller_rows(row_count)
+
+            ring = RingBufferStorage(CHILLER_RECORD_VARIABLES, row_count)
+            ring.extend(rows)
+            compressed = CompressedStorage(CHILLER_RECORD_VARIABLES, row_count)
+            compressed.extend(rows)
+            self.assertEqual(list(compressed.rows()), list(ring.rows()))
+
+            records = [RecordView(CHILLER_RECORD_VARIABLES, row, sequence) for sequence, row in enumerate(rows)]
+            record_bytes.append(asizeof.asizeof(records) / row_count)
+            ring_bytes.append(asizeof.asizeof(ring) / row_count)
+            compressed_bytes.append(asizeof.asizeof(compressed) / row_count)
+            encoded_bytes.append(compressed.encoded_size() / row_count)
+
+            # The response caches are off, they keep the encoded bytes whatever the storage is
+            for storage, after_get_bytes in ((ring, ring_after_get_bytes), (compressed, compressed_after_get_bytes)):
+                api = AasApi(Chiller(record_storage=storage, running_statistics=False), cache=False)
+                api.get_submodel(None, "TimeSeries")
+                api.get_submodel_element_by_path(None, "TimeSeries", "Segments.InternalSegment.Records[1]")
+                after_get_bytes.append(asizeof.asizeof(api.get_time_series_records()[2]) / row_count)
+
+            print(
+                f"[Samples: {row_count}] bytes per record of {variable_count} values\n"
+                f"  Record collections: {record_bytes[-1]:.1f}\n"
+                f"  RingBufferStorage:  {ring_bytes[-1]:.1f} (after GET {ring_after_get_bytes[-1]:.1f})\n"
+                f"  CompressedStorage:  {compressed_bytes[-1]:.1f} "
+                f"(encoded {encoded_bytes[-1]:.1f}, {record_bytes[-1] / compressed_bytes[-1]:.1f}x less than records, "
+                f"after GET {compressed_after_get_bytes[-1]:.1f})\n"
+            )
+
+        plt.figure(figsize=(8, 5))
+        plt.plot(row_counts, record_bytes, marker='o', label='Record collections')
+        plt.plot(row_counts, ring_bytes, marker='x', label='RingBufferStorage')
+        plt.plot(row_counts, compressed_bytes, marker='s', label='CompressedStorage')
+        plt.plot(row_counts, ring_after_get_bytes, marker='x', linestyle='--', label='RingBufferStorage after GET')
+        plt.plot(row_counts, compressed_after_get_bytes, marker='s', linestyle='--',
+                 label='CompressedStorage after GET')
+        plt.xscale('log')
+        plt.yscale('log')
+        plt.xlabel('Stored records')
+        plt.ylabel('Heap per record (bytes)')
+        plt.title("TimeSeries History Memory per Record")
+        plt.grid(True)
+        plt.legend(loc='best')
+        plt.tight_layout()
+        plt.show()
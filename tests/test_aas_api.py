@@ -0,0 +1,676 @@
+import unittest
+import gc
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+
+import aas_core3.types as aas_types
+import aas_core3.jsonization as aas_jsonization
+
+from aas_api.aas_api import AasApi
+from aas_templates.chiller import Chiller, CHILLER_RECORD_VARIABLES
+from submodel_templates import time_series
+from submodel_templates.time_series_log import FileLogStorage
+from submodel_templates.time_series_retention import RetentionPolicy
+from submodel_templates.time_series_storage import RingBufferStorage
+
+
+class TestIdShortPathLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.chiller = Chiller()
+
+    def replace_ssid(self, api, value):
+        submodel = api.get_submodel_by_identifier("WifiAccessPoint")
+        replacement = aas_types.Property(id_short="SSID", value_type=aas_types.DataTypeDefXSD.STRING, value=value)
+        submodel.submodel_elements[0] = replacement
+        return replacement
+
+    def test_direct_replacement_is_not_served_stale(self):
+        for cache in (True, False):
+            api = AasApi(Chiller(), cache=cache)
+            self.assertEqual(
+                api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", "$value"), b'"AAS-M5StackCore2"'
+            )
+            replacement = self.replace_ssid(api, "Other")
+            self.assertEqual(api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", "$value"), b'"Other"')
+            self.assertIs(api.get_submodel_from_id_short_path("WifiAccessPoint.SSID"), replacement)
+
+    def test_replaced_ancestor_is_detected(self):
+        api = AasApi(self.chiller)
+        path = "TimeSeries.Segments.InternalSegment.Records"
+        old_records = api.get_submodel_from_id_short_path(path)
+        self.assertIsNotNone(old_records)
+
+        time_series = api.get_submodel_by_identifier("TimeSeries")
+        segments = time_series.submodel_elements[-1]
+        self.assertEqual(segments.id_short, "Segments")
+        segments.value = [aas_types.SubmodelElementCollection(id_short="InternalSegment", value=[
+            aas_types.SubmodelElementCollection(id_short="Records", value=[])
+        ])]
+
+        found = api.get_submodel_from_id_short_path(path)
+        self.assertIsNot(found, old_records)
+        self.assertIs(found, segments.value[0].value[0])
+
+    def test_records_appended_directly_are_found(self):
+        api = AasApi(self.chiller)
+        _, records_path, records = api.get_time_series_records()
+        records.storage.resize(3)
+        for time in range(3):
+            records.append_row((time, 1, 2, 3, 4, 5, 6, 7, 8, 9))
+        path = "TimeSeries." + records_path + "[1].Time"
+        self.assertEqual(api.get_submodel_from_id_short_path(path).value, "0")
+
+        # Evicts the record at time 0 without telling the API
+        records.append_row((3, 1, 2, 3, 4, 5, 6, 7, 8, 9))
+        self.assertEqual(api.get_submodel_from_id_short_path(path).value, "1")
+
+    def test_lookup_without_index_matches_index(self):
+        api = AasApi(self.chiller)
+        for path in ("WifiAccessPoint.SSID", "TimeSeries.Segments.InternalSegment.Records"):
+            self.assertIs(api.lookup_id_short_path(path, use_index=True),
+                          api.lookup_id_short_path(path, use_index=False))
+
+
+class TestIdShortPathCache(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+
+    def test_each_api_has_its_own_cache(self):
+        other = AasApi(Chiller())
+        self.api.get_submodel_from_id_short_path("WifiAccessPoint.SSID")
+        self.assertIsNot(self.api.id_short_path_cache, other.id_short_path_cache)
+        self.assertIsNot(other.get_submodel_from_id_short_path("WifiAccessPoint.SSID"),
+                         self.api.get_submodel_from_id_short_path("WifiAccessPoint.SSID"))
+
+    def test_value_updates_keep_cached_entries(self):
+        api = self.api
+        ssid = api.get_submodel_from_id_short_path("WifiAccessPoint.SSID")
+        api.patch_submodel_elements_bulk(None, {"WifiAccessPoint.SSID": "Changed"})
+        self.assertTrue(api.id_short_path_cache.exists("WifiAccessPoint.SSID"))
+        self.assertIs(api.get_submodel_from_id_short_path("WifiAccessPoint.SSID"), ssid)
+        self.assertEqual(ssid.value, "Changed")
+
+    def test_replaced_submodel_is_looked_up_again(self):
+        api = self.api
+        api.get_submodel_from_id_short_path("WifiAccessPoint.SSID")
+
+        class Request:
+            body = json.dumps({"id": "urn:wifi", "idShort": "WifiAccessPoint", "modelType": "Submodel"})
+
+        api.put_submodel(Request(), "WifiAccessPoint")
+        self.assertEqual(api.get_submodel_by_identifier("WifiAccessPoint").id, "urn:wifi")
+        self.assertIsNone(api.get_submodel_from_id_short_path("WifiAccessPoint.SSID"))
+
+        api.delete_submodel(None, "WifiAccessPoint")
+        self.assertIsNone(api.get_submodel_from_id_short_path("WifiAccessPoint"))
+
+    def test_structural_changes_of_other_submodels_keep_entries(self):
+        api = self.api
+        ssid = api.get_submodel_from_id_short_path("WifiAccessPoint.SSID")
+        version = api.get_submodel_structure_version(api.get_submodel_by_identifier("WifiAccessPoint"))
+        api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        self.assertEqual(
+            api.get_submodel_structure_version(api.get_submodel_by_identifier("WifiAccessPoint")), version
+        )
+        self.assertIs(api.id_short_path_cache.get("WifiAccessPoint.SSID")[2], ssid)
+
+
+class TestResponseTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+        self.api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+
+    def test_read_operations_return_bytes(self):
+        api = self.api
+        responses = [
+            api.get_asset_administration_shell(),
+            api.get_asset_information(None),
+            api.get_all_submodel_references(),
+            api.get_all_submodel_elements(None, "WifiAccessPoint"),
+            api.get_submodel_elements_batch(None, [("WifiAccessPoint", "SSID")]),
+            api.get_time_series_records_in_range(None),
+            api.get_time_series_aggregation(None, interval=10),
+        ]
+        for modifier in (None, "$value", "$reference", "$path", "$metadata"):
+            responses.append(api.get_submodel(None, "WifiAccessPoint", modifier))
+        for modifier in (None, "$value", "$path", "$metadata"):
+            responses.append(api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", modifier))
+        responses.append(api.get_submodel_element_by_path(None, "WifiAccessPoint", "UpdateSSIDCredentials",
+                                                          level="core"))
+        for response in responses:
+            self.assertIsInstance(response, bytes)
+            json.loads(response)
+
+    def test_errors_are_response_messages(self):
+        response = self.api.get_submodel_element_by_path(None, "WifiAccessPoint", "Missing")
+        self.assertEqual(response["code"], 404)
+        self.assertEqual(json.loads(self.api.encode_response(response))["code"], 404)
+
+    def test_element_encoding_matches_batch_read(self):
+        api = self.api
+        for modifier in (None, "$value", "$path", "$metadata"):
+            single = api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", modifier)
+            batch = api.get_submodel_elements_batch(None, [("WifiAccessPoint", "SSID", modifier)])
+            self.assertEqual(b'[' + single + b']', batch)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+
+    def test_cached_responses_follow_changes(self):
+        api = self.api
+        first = api.get_submodel(None, "WifiAccessPoint", "$value")
+        self.assertIs(api.get_submodel(None, "WifiAccessPoint", "$value"), first)
+        api.patch_submodel_elements_bulk(None, {"WifiAccessPoint.SSID": "Changed"})
+        self.assertEqual(json.loads(api.get_submodel(None, "WifiAccessPoint", "$value"))["SSID"], "Changed")
+
+    def test_removed_submodel_leaves_no_cached_responses(self):
+        api = self.api
+        submodel = api.get_submodel_by_identifier("WifiAccessPoint")
+        for modifier in (None, "$value", "$path", "$metadata"):
+            api.get_submodel(None, "WifiAccessPoint", modifier)
+        api.get_submodel(None, "WifiAccessPoint", level="core")
+        metadata = api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", "$metadata")
+        self.assertIn("idShort", json.loads(metadata))
+
+        api.delete_submodel(None, "WifiAccessPoint")
+        self.assertFalse([key for key in api.response_cache.keys() if isinstance(key, tuple) and key[0] is submodel])
+
+        # Re-added as the same instance after a change, the old encoding must not come back
+        submodel.submodel_elements[0] = aas_types.Property(
+            id_short="SSID", value_type=aas_types.DataTypeDefXSD.INT, value="1"
+        )
+        api.aas.submodels.append(submodel)
+        metadata = json.loads(api.get_submodel_element_by_path(None, "WifiAccessPoint", "SSID", "$metadata"))
+        self.assertEqual(metadata["valueType"], "xs:int")
+
+
+class TestEnvironmentSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+
+    def assert_matches_environment(self, encoded):
+        self.assertEqual(json.loads(encoded), aas_jsonization.to_jsonable(self.api.aas))
+
+    def test_spliced_environment_matches_full_serialization(self):
+        api = self.api
+        self.assert_matches_environment(api.get_asset_administration_shell())
+        api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        self.assert_matches_environment(api.get_asset_administration_shell())
+        api.patch_submodel_elements_bulk(None, {"WifiAccessPoint.SSID": "Changed"})
+        self.assert_matches_environment(api.get_asset_administration_shell())
+        api.delete_submodel(None, "WifiAccessPoint")
+        self.assert_matches_environment(api.get_asset_administration_shell())
+
+    def test_only_changed_submodels_are_encoded_again(self):
+        api = self.api
+        api.get_asset_administration_shell()
+        fragments = dict(api.submodel_fragments)
+        api.patch_submodel_elements_bulk(None, {"WifiAccessPoint.SSID": "Changed"})
+        api.get_asset_administration_shell()
+        wifi = api.get_submodel_by_identifier("WifiAccessPoint")
+        for submodel, fragment in api.submodel_fragments.items():
+            if submodel is wifi:
+                self.assertIsNot(fragment, fragments[submodel])
+            else:
+                self.assertIs(fragment, fragments[submodel])
+
+    def test_submodels_appended_directly_are_included(self):
+        api = self.api
+        api.get_asset_administration_shell()
+        api.aas.submodels.append(aas_types.Submodel(id="urn:appended", id_short="Appended"))
+        self.assert_matches_environment(api.get_asset_administration_shell())
+
+    def test_responses_are_reused_until_changed(self):
+        api = self.api
+        first = api.get_asset_administration_shell()
+        self.assertIs(api.get_asset_administration_shell(), first)
+        api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        self.assertIsNot(api.get_asset_administration_shell(), first)
+
+        uncached = AasApi(Chiller(), cache=False)
+        uncached.get_asset_administration_shell()
+        uncached.get_submodel(None, "WifiAccessPoint")
+        self.assertEqual(len(uncached.response_cache), 0)
+        self.assertEqual(uncached.submodel_fragments, {})
+
+
+class TestPaging(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+        self.api.add_records_to_time_series(rows=[(time, 1, 2, 3, 4, 5, 6, 7, 8, 9) for time in range(5)])
+
+    def walk(self, read, limit):
+        items = []
+        page = json.loads(read(limit=limit))
+        items += page["result"]
+        while "cursor" in page["paging_metadata"]:
+            page = json.loads(read(limit=limit, cursor=page["paging_metadata"]["cursor"]))
+            items += page["result"]
+        return items
+
+    def test_submodel_reference_pages_cover_all(self):
+        everything = json.loads(self.api.get_all_submodel_references())
+        for limit in (1, 2, len(everything), len(everything) + 1):
+            self.assertEqual(self.walk(self.api.get_all_submodel_references, limit), everything)
+
+    def test_submodel_element_pages_cover_all(self):
+        def read(**kwargs):
+            return self.api.get_all_submodel_elements(None, "TimeSeries", "$path",
+                                                      id_short_path="Segments.InternalSegment.Records", **kwargs)
+
+        everything = json.loads(read())["result"]
+        self.assertEqual(everything[-1], "Segments.InternalSegment.Records[5]")
+        for limit in (1, 4, 100):
+            self.assertEqual(self.walk(read, limit), everything)
+
+    def test_last_page_has_no_cursor(self):
+        page = json.loads(self.api.get_all_submodel_elements(None, "WifiAccessPoint", limit=100))
+        self.assertEqual(page["paging_metadata"], {})
+        self.assertEqual([element["idShort"] for element in page["result"]],
+                         ["SSID", "Password", "UpdateSSIDCredentials"])
+
+    def test_invalid_paging(self):
+        api = self.api
+        for limit, cursor in ((0, None), ("many", None), (None, "not a cursor"), (None, "LTE")):
+            self.assertEqual(api.get_all_submodel_references(limit=limit, cursor=cursor)["code"], 400)
+            self.assertEqual(api.get_all_submodel_elements(None, "WifiAccessPoint", limit=limit,
+                                                           cursor=cursor)["code"], 400)
+        self.assertEqual(api.get_all_submodel_elements(None, "WifiAccessPoint", id_short_path="Missing")["code"],
+                         404)
+
+
+class Request:
+
+    def __init__(self, body):
+        self.body = body
+
+
+class TestBatchRead(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+
+    def test_results_in_request_order(self):
+        items = [
+            ["WifiAccessPoint", "Password", "$value"],
+            {"submodelIdentifier": "WifiAccessPoint", "idShortPath": "SSID", "modifier": "$value"},
+            ["WifiAccessPoint", "SSID"],
+            ["WifiAccessPoint", "Password", "$value"],
+        ]
+        results = json.loads(self.api.get_submodel_elements_batch(Request(json.dumps(items))))
+        self.assertEqual(results[0], "12345678")
+        self.assertEqual(results[1], "AAS-M5StackCore2")
+        self.assertEqual(results[2]["idShort"], "SSID")
+        self.assertEqual(results[3], results[0])
+
+    def test_each_result_matches_the_single_read(self):
+        items = [("WifiAccessPoint", "SSID", modifier) for modifier in (None, "$value", "$path", "$metadata")]
+        results = json.loads(self.api.get_submodel_elements_batch(None, items))
+        for (submodel_identifier, id_short_path, modifier), result in zip(items, results):
+            single = self.api.get_submodel_element_by_path(None, submodel_identifier, id_short_path, modifier)
+            self.assertEqual(result, json.loads(single))
+
+    def test_unresolved_items_get_errors(self):
+        results = json.loads(self.api.get_submodel_elements_batch(
+            None, [("Missing", "SSID"), ("WifiAccessPoint", "Missing"), ("WifiAccessPoint", "SSID", "$value")]
+        ))
+        self.assertEqual(results[0]["code"], 404)
+        self.assertEqual(results[0]["text"], "Submodel not found in AAS environment.")
+        self.assertEqual(results[1]["code"], 404)
+        self.assertEqual(results[1]["text"], "Submodel element not found in AAS environment.")
+        self.assertEqual(results[2], "AAS-M5StackCore2")
+
+    def test_invalid_body(self):
+        self.assertEqual(self.api.get_submodel_elements_batch(Request("not json"))["code"], 400)
+        self.assertEqual(self.api.get_submodel_elements_batch(Request('[{"idShortPath": "SSID"}]'))["code"], 400)
+        for body in ('["WifiAccessPoint"]', '[["WifiAccessPoint"]]', '[["WifiAccessPoint", "SSID", "$value", 1]]',
+                     '[1]', '"WifiAccessPoint"', '{"WifiAccessPoint": "SSID"}'):
+            self.assertEqual(self.api.get_submodel_elements_batch(Request(body))["code"], 400)
+
+
+def settings_submodel():
+    return aas_types.Submodel(id="urn:settings", id_short="Settings", submodel_elements=[
+        aas_types.Property(id_short="Level", value_type=aas_types.DataTypeDefXSD.BYTE, value="1"),
+        aas_types.Property(id_short="Enabled", value_type=aas_types.DataTypeDefXSD.BOOLEAN, value="false"),
+        aas_types.Property(id_short="Setpoint", value_type=aas_types.DataTypeDefXSD.DOUBLE, value="20.5"),
+    ])
+
+
+class TestBulkPatch(unittest.TestCase):
+
+    def setUp(self):
+        chiller = Chiller()
+        chiller.submodels.append(settings_submodel())
+        self.api = AasApi(chiller)
+
+    def values(self):
+        return {path: self.api.get_submodel_element_from_path(*self.api.split_id_short_path(path)).value
+                for path in ("Settings.Level", "Settings.Enabled", "Settings.Setpoint", "WifiAccessPoint.SSID")}
+
+    def test_all_updates_are_applied(self):
+        response = self.api.patch_submodel_elements_bulk(None, {
+            "Settings.Level": -5, "Settings.Enabled": True, "Settings.Setpoint": 21.25,
+            "WifiAccessPoint.SSID": "Plant",
+        })
+        self.assertEqual(response["code"], 200)
+        self.assertEqual(self.values(), {
+            "Settings.Level": "-5", "Settings.Enabled": "true", "Settings.Setpoint": "21.25",
+            "WifiAccessPoint.SSID": "Plant",
+        })
+        self.assertEqual(json.loads(self.api.get_submodel(None, "Settings", "$value")),
+                         {"Level": -5, "Enabled": True, "Setpoint": 21.25})
+
+    def test_one_invalid_update_changes_nothing(self):
+        before = self.values()
+        cached = self.api.get_submodel(None, "WifiAccessPoint", "$value")
+        response = self.api.patch_submodel_elements_bulk(None, {
+            "WifiAccessPoint.SSID": "Plant", "Settings.Enabled": True, "Settings.Level": 300,
+        })
+        self.assertEqual(response["code"], 400)
+        self.assertEqual(list(response["errors"]), ["Settings.Level"])
+        self.assertEqual(self.values(), before)
+        self.assertEqual(self.api.get_submodel(None, "WifiAccessPoint", "$value"), cached)
+
+    def test_errors_are_keyed_by_path(self):
+        response = self.api.patch_submodel_elements_bulk(None, {
+            "Settings.Level": "high",
+            "Settings.Enabled": 1,
+            "Settings.Setpoint": "warm",
+            "Settings.Missing": 1,
+            "Missing.Level": 1,
+            "WifiAccessPoint.SSID": 5,
+            "TimeSeries.Segments.InternalSegment.Statistics.Alarm flag 1.Count": 3,
+        })
+        self.assertEqual(response["code"], 400)
+        self.assertEqual(set(response["errors"]), {
+            "Settings.Level", "Settings.Enabled", "Settings.Setpoint", "Settings.Missing", "Missing.Level",
+            "WifiAccessPoint.SSID", "TimeSeries.Segments.InternalSegment.Statistics.Alarm flag 1.Count",
+        })
+
+    def test_only_properties_are_updated(self):
+        response = self.api.patch_submodel_elements_bulk(None, {"TimeSeries.Segments": 1})
+        self.assertEqual(list(response["errors"]), ["TimeSeries.Segments"])
+
+    def test_single_patch_prints_nothing(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            response = self.api.patch_submodel_element_by_path(Request("Plant"), "WifiAccessPoint", "SSID", "$value")
+        self.assertEqual(response["code"], 200)
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(self.values()["WifiAccessPoint.SSID"], "Plant")
+
+    def test_updates_from_the_request_body(self):
+        response = self.api.patch_submodel_elements_bulk(Request('{"Settings.Level": 7, "Settings.Enabled": "1"}'))
+        self.assertEqual(response["code"], 200)
+        self.assertEqual(self.values()["Settings.Level"], "7")
+        self.assertEqual(self.values()["Settings.Enabled"], "1")
+        for body in ("not json", "[1, 2]"):
+            self.assertEqual(self.api.patch_submodel_elements_bulk(Request(body))["code"], 400)
+
+
+class TestTimeSeriesIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+
+    def test_ingest_prints_nothing(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for time in range(3):
+                self.api.add_record_to_time_series(time, 20.5, 1, 2, 3, 0, 0, 0, 0, 0, max_record_count=2)
+        self.assertEqual(output.getvalue(), "")
+        records = self.api.get_time_series_records()[2]
+        self.assertEqual([row[0] for row in records.storage.rows()], [1, 2])
+
+    def replace_records(self):
+        time_series_submodel = self.api.get_submodel_by_identifier("TimeSeries")
+        old = self.api.get_time_series_records()[2]
+        segment = time_series_submodel.submodel_elements[-1].value[0]
+        replacement = time_series.RecordsCollection(
+            RingBufferStorage(old.storage.variables, 5), id_short="Records")
+        segment.value[segment.value.index(old)] = replacement
+        return time_series_submodel, replacement
+
+    def test_records_collection_is_looked_up_once(self):
+        with mock.patch("aas_api.aas_api.find_records_collection",
+                        wraps=time_series.find_records_collection) as find:
+            for time in range(5):
+                self.api.add_record_to_time_series(time, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+            self.api.add_records_to_time_series(rows=[(5, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)])
+            self.api.get_time_series_records_in_range(None)
+        self.assertEqual(find.call_count, 1)
+
+    def test_structural_change_looks_up_again(self):
+        self.api.add_record_to_time_series(0, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        time_series_submodel, replacement = self.replace_records()
+        self.api.submodel_changed(time_series_submodel)
+        self.api.add_record_to_time_series(1, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        self.assertIs(self.api.get_time_series_records()[2], replacement)
+        self.assertEqual([row[0] for row in replacement.storage.rows()], [1])
+
+    def test_invalidate_drops_the_handle(self):
+        self.api.add_record_to_time_series(0, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        replacement = self.replace_records()[1]
+        self.api.invalidate()
+        self.assertIs(self.api.get_time_series_records()[2], replacement)
+
+    def test_missing_time_series(self):
+        self.api.delete_submodel(None, "TimeSeries")
+        with self.assertRaises(ValueError):
+            self.api.add_record_to_time_series(0, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+
+    def stored_rows(self, api):
+        return list(api.get_time_series_records()[2].storage.rows())
+
+    def listed_records(self, api):
+        records = json.loads(api.get_all_submodel_elements(
+            None, "TimeSeries", "$value", id_short_path="Segments.InternalSegment.Records"
+        ))["result"]
+        # The placeholder and one record per stored row
+        self.assertEqual(len(records), 1 + len(self.stored_rows(api)))
+        return records
+
+    def test_batches_equal_per_record_ingestion(self):
+        rows = [(time, 20.0 + time, 1, 2, 3, time % 2, 0, 0, 0, 1) for time in range(14)]
+        for time in range(14):
+            self.api.add_record_to_time_series(*rows[time], max_record_count=10)
+        expected = self.stored_rows(self.api)
+
+        names = ("timestamp", "cft", "cfdt", "cfdp", "cfer", "statusf1", "statusf2", "alarmf1", "alarmf2", "alarmf3")
+        later = rows[4:]
+        for batch in ({"rows": later}, {"columns": list(zip(*later))}, {"columns": dict(zip(names, zip(*later)))}):
+            api = AasApi(Chiller())
+            api.add_records_to_time_series(rows=rows[:4], max_record_count=10)
+            api.add_records_to_time_series(max_record_count=10, **batch)
+            self.assertEqual(self.stored_rows(api), expected)
+            # Every record is listed on its own, in $value they would all share the key 'Record'
+            self.assertEqual(self.listed_records(api), self.listed_records(self.api))
+
+    def test_iso8601_timestamps(self):
+        self.api.add_record_to_time_series("2024-01-01T00:00:00Z", 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        self.api.add_records_to_time_series(rows=[("2024-01-01T00:01:00+00:00", 21.5, 1, 2, 3, 0, 0, 0, 0, 0)])
+        self.assertEqual([row[0] for row in self.stored_rows(self.api)], [1704067200, 1704067260])
+        records = json.loads(self.api.get_time_series_records_in_range(
+            None, start="2024-01-01T00:00:30Z", serialization_modifier="$value"))
+        self.assertEqual([record["Record"]["Time"] for record in records], [1704067260])
+        with self.assertRaises(ValueError):
+            self.api.add_record_to_time_series("yesterday", 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        self.assertEqual(len(self.stored_rows(self.api)), 2)
+        self.assertEqual(self.api.get_time_series_records_in_range(None, start="yesterday")["code"], 400)
+
+    def test_reads_keep_no_record_views(self):
+        self.api.add_records_to_time_series(rows=[(time, 20.5, 1, 2, 3, 0, 0, 0, 0, 0) for time in range(20)])
+        self.api.get_asset_administration_shell()
+        self.api.get_submodel(None, "TimeSeries")
+        self.api.get_submodel(None, "TimeSeries", "$value")
+        self.listed_records(self.api)
+        for _ in range(2):
+            self.assertEqual(self.api.get_submodel_element_by_path(
+                None, "TimeSeries", "Segments.InternalSegment.Records[3].Time", "$value"), b'"12"')
+            self.api.get_submodel_element_by_path(None, "TimeSeries", "Segments.InternalSegment.Records[5]")
+        self.api.get_time_series_records_in_range(None, start=5)
+        gc.collect()
+        self.assertEqual([obj for obj in gc.get_objects() if isinstance(obj, time_series.RecordView)], [])
+
+    def test_invalid_batch_adds_nothing(self):
+        self.api.add_record_to_time_series(0, 20.5, 1, 2, 3, 0, 0, 0, 0, 0)
+        listed = self.listed_records(self.api)
+        invalid = (
+            {"rows": [(1, 20.5, 1, 2, 3, 0, 0, 0, 0, 0), (2, 20.5, 1)]},
+            {"rows": [(1, "warm", 1, 2, 3, 0, 0, 0, 0, 0)]},
+            {"columns": {"timestamp": [1], "cft": [20.5]}},
+        )
+        for batch in invalid:
+            with self.assertRaises(ValueError):
+                self.api.add_records_to_time_series(**batch)
+        self.assertEqual([row[0] for row in self.stored_rows(self.api)], [0])
+        self.assertEqual(self.listed_records(self.api), listed)
+
+
+class TestTimeSeriesAggregation(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+        self.api.add_records_to_time_series(rows=[
+            (time, float("nan") if time == 3 else 20.0 + time, 1, 2, 3, 0, 0, 0, 0, 0) for time in range(10)
+        ], max_record_count=10)
+
+    def test_buckets_are_strict_json(self):
+        response = json.loads(self.api.get_time_series_aggregation(None, interval="5", variables="cft,cfdt"),
+                              parse_constant=self.fail)
+        self.assertEqual(response["interval"], 5)
+        first, second = response["buckets"]
+        self.assertIsNone(first["values"]["cft"]["mean"])
+        self.assertEqual(first["values"]["cfdt"]["mean"], 1.0)
+        self.assertEqual(second["values"]["cft"], {"min": 25.0, "max": 29.0, "mean": 27.0, "last": 29.0})
+
+    def test_invalid_parameters(self):
+        for kwargs in ({}, {"interval": "0"}, {"interval": "x"}, {"interval": "5", "variables": "missing"}):
+            self.assertEqual(self.api.get_time_series_aggregation(None, **kwargs)["code"], 400)
+        self.assertEqual(self.api.get_time_series_aggregation(None, "Missing", interval="5")["code"], 404)
+
+
+class TestTimeSeriesRangeQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AasApi(Chiller())
+        self.api.add_records_to_time_series(rows=[(time * 10, time, 2, 3, 4, 5, 6, 7, 8, 9) for time in range(20)],
+                                            max_record_count=100)
+
+    def query(self, **kwargs):
+        return json.loads(self.api.get_time_series_records_in_range(None, **kwargs))
+
+    def times(self, records):
+        return [record["Record"]["Time"] for record in records]
+
+    def test_half_open_range(self):
+        self.assertEqual(self.times(self.query(start=50, end=100, serialization_modifier="$value")),
+                         [50, 60, 70, 80, 90])
+        self.assertEqual(self.times(self.query(start="185", serialization_modifier="$value")), [190])
+        self.assertEqual(self.query(start=1000), [])
+
+    def test_latest(self):
+        self.assertEqual(self.times(self.query(end=100, latest=2, serialization_modifier="$value")), [80, 90])
+
+    def test_value_shape_matches_element_listing(self):
+        listed = json.loads(self.api.get_all_submodel_elements(
+            None, "TimeSeries", "$value", id_short_path="Segments.InternalSegment.Records"
+        ))["result"]
+        queried = self.query(serialization_modifier="$value")
+        self.assertEqual(queried, listed[-len(queried):])
+
+    def test_cursor_pages_survive_appends(self):
+        page = self.query(start=0, limit=8, serialization_modifier="$value")
+        seen = self.times(page["result"])
+        self.api.add_record_to_time_series(200, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        while "cursor" in page["paging_metadata"]:
+            page = self.query(start=0, limit=8, cursor=page["paging_metadata"]["cursor"],
+                              serialization_modifier="$value")
+            seen += self.times(page["result"])
+        self.assertEqual(seen, [time * 10 for time in range(21)])
+
+    def test_external_segment_is_read_from_its_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = self.api.get_time_series_records()[2].storage
+        log = FileLogStorage(storage.variables, os.path.join(directory.name, "records.log"))
+        self.addCleanup(log.close)
+        log.extend([(1000 + time, time, 2, 3, 4, 5, 6, 7, 8, 9) for time in range(5)])
+        segments = self.api.get_submodel_by_identifier("TimeSeries").submodel_elements[-1]
+        segments.value.append(time_series.Segment(time_series.SegmentType.EXTERNAL_SEGMENT, storage=log))
+
+        self.assertEqual(self.times(self.query(segment="ExternalSegment", start=1002, serialization_modifier="$value")),
+                         [1002, 1003, 1004])
+        aggregation = json.loads(self.api.get_time_series_aggregation(None, interval=10, segment="ExternalSegment"))
+        self.assertEqual(aggregation["buckets"][0]["count"], 5)
+        self.assertEqual(self.api.get_time_series_records_in_range(None, segment="Missing")["code"], 404)
+
+    def test_export(self):
+        chunks = list(self.api.export_time_series(None, format="csv", start=50, end=70, chunk_size=16))
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), 16)
+        lines = b"".join(chunks).decode("utf-8").split("\r\n")
+        self.assertEqual(lines[0].split(",")[0], "Time")
+        self.assertEqual([line.split(",")[0] for line in lines[1:-1]], ["50", "60"])
+        records = [json.loads(line) for line in b"".join(self.api.export_time_series(None, format="ndjson")).splitlines()]
+        self.assertEqual([record["Time"] for record in records], [time * 10 for time in range(20)])
+        self.assertEqual(self.api.export_time_series(None, format="xml")["code"], 400)
+        self.assertEqual(self.api.export_time_series(None, start="x")["code"], 400)
+
+    def test_rollup_segments_follow_ingestion(self):
+        api = AasApi(Chiller(retention=RetentionPolicy(CHILLER_RECORD_VARIABLES, raw_window=60)))
+        api.add_records_to_time_series(rows=[(time, 20.0, 1, 2, 3, 0, 0, 0, 0, 0) for time in range(0, 120, 10)])
+        path = "Segments.MinuteRollupSegment.Records"
+        listed = json.loads(api.get_all_submodel_elements(None, "TimeSeries", "$value", id_short_path=path))
+        self.assertEqual(len(listed["result"]), 2)
+
+        api.add_record_to_time_series(120, 30.0, 1, 2, 3, 0, 0, 0, 0, 0)
+        listed = json.loads(api.get_all_submodel_elements(None, "TimeSeries", "$value", id_short_path=path))
+        self.assertEqual(len(listed["result"]), 3)
+        rollups = json.loads(api.get_time_series_records_in_range(None, segment="MinuteRollupSegment",
+                                                                  serialization_modifier="$value"))
+        self.assertEqual([(rollup["Record"]["Time"], rollup["Record"]["Count"]) for rollup in rollups],
+                         [(0, 6), (60, 6)])
+        # The raw window keeps the last minute
+        raw = json.loads(api.get_time_series_records_in_range(None, serialization_modifier="$value"))
+        self.assertEqual(self.times(raw), [60, 70, 80, 90, 100, 110, 120])
+
+    def test_statistics_are_live(self):
+        path = "Segments.InternalSegment.Statistics.Circulation Fluid Temperature"
+        self.assertEqual(json.loads(self.api.get_submodel_element_by_path(None, "TimeSeries", path, "$value")),
+                         {"Circulation Fluid Temperature": {"Count": 20, "Mean": 9.5, "Variance": 35.0, "Min": 0.0,
+                                                            "Max": 19.0, "EWMA": mock.ANY}})
+        self.api.add_record_to_time_series(200, 40.5, 2, 3, 4, 5, 6, 7, 8, 9)
+        self.assertEqual(json.loads(self.api.get_submodel_element_by_path(None, "TimeSeries", path + ".Max", "$value")),
+                         "40.5")
+        self.assertEqual(json.loads(self.api.get_submodel(None, "TimeSeries", "$value"))["Segments"]["InternalSegment"]
+                         ["Statistics"]["Circulation Fluid Temperature"]["Count"], 21)
+
+    def test_statistics_are_read_only(self):
+        path = "Segments.InternalSegment.Statistics.Circulation Fluid Temperature.Mean"
+        response = self.api.patch_submodel_element_by_path(Request("1.0"), "TimeSeries", path, "$value")
+        self.assertEqual(response["code"], 400)
+        response = self.api.patch_submodel_elements_bulk(None, {"TimeSeries." + path: 1.0})
+        self.assertEqual(response["code"], 400)
+        self.assertEqual(json.loads(self.api.get_submodel_element_by_path(None, "TimeSeries", path, "$value")), "9.5")
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.api.get_time_series_records_in_range(None, limit=0)["code"], 400)
+        self.assertEqual(self.api.get_time_series_records_in_range(None, start="soon")["code"], 400)
+        self.assertEqual(self.api.get_time_series_records_in_range(None, "Missing")["code"], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
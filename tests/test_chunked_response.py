@@ -0,0 +1,69 @@
+import io
+import unittest
+
+from aas_api.aas_api import AasApi
+from aas_api.chunked_response import is_chunked, coalesce, encode_chunked, write_chunked
+from aas_templates.chiller import Chiller
+
+
+def decode_chunked(body):
+    """Parses a chunked transfer encoded body, checking the framing on the way."""
+    chunks = []
+    while True:
+        size_line, body = body.split(b"\r\n", 1)
+        size = int(size_line, 16)
+        if size == 0:
+            assert body == b"\r\n", body
+            return chunks
+        chunks.append(body[:size])
+        assert body[size:size + 2] == b"\r\n"
+        body = body[size + 2:]
+
+
+class TestChunkedResponse(unittest.TestCase):
+
+    def test_coalesce(self):
+        pieces = [b"ab", b"c", b"defg", b"h"]
+        chunks = list(coalesce(pieces, 3))
+        self.assertEqual(chunks, [b"abc", b"defg", b"h"])
+        self.assertEqual(list(coalesce([], 3)), [])
+
+    def test_framing_skips_empty_chunks(self):
+        body = b"".join(encode_chunked([b"hello", b"", b"x" * 300]))
+        self.assertTrue(body.startswith(b"5\r\nhello\r\n12c\r\n"))
+        self.assertEqual(decode_chunked(body), [b"hello", b"x" * 300])
+
+    def test_write_chunked_drops_content_length(self):
+        stream = io.BytesIO()
+        write_chunked(stream, "HTTP/1.1 200 OK", {"Content-Type": "application/json", "Content-Length": "9"},
+                      iter([b"{}"]))
+        head, body = stream.getvalue().split(b"\r\n\r\n", 1)
+        self.assertNotIn(b"Content-Length", head)
+        self.assertIn(b"Transfer-Encoding: chunked", head)
+        self.assertEqual(decode_chunked(body), [b"{}"])
+
+    def test_chunked_responses_equal_complete_ones(self):
+        api = AasApi(Chiller())
+        api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        chunks = api.get_asset_administration_shell(chunk_size=64)
+        self.assertTrue(is_chunked(chunks))
+        chunks = list(chunks)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), api.get_asset_administration_shell())
+        # Once cached, the complete response is sent as one chunk
+        self.assertEqual(list(api.get_asset_administration_shell(chunk_size=64)),
+                         [api.get_asset_administration_shell()])
+
+        for chunk_size in (64, 4096):
+            chunks = api.get_submodel(None, "TimeSeries", chunk_size=chunk_size)
+            self.assertTrue(is_chunked(chunks))
+            self.assertEqual(b"".join(chunks), api.get_submodel(None, "TimeSeries"))
+
+    def test_complete_responses_are_not_chunked(self):
+        api = AasApi(Chiller())
+        self.assertFalse(is_chunked(api.get_asset_administration_shell()))
+        self.assertFalse(is_chunked(api.generate_response_message("text")))
+
+
+if __name__ == '__main__':
+    unittest.main()
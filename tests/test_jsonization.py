@@ -0,0 +1,152 @@
+import io
+import json
+import unittest
+
+import aas_core3.types as aas_types
+import aas_core3.jsonization as aas_jsonization
+import aas_core3.xmlization as aas_xmlization
+
+from aas_templates.chiller import Chiller
+from submodel_templates.time_series import find_records_collection
+
+
+class WatchedCollection(aas_types.SubmodelElementCollection):
+    """Fails the test if an attribute is assigned after construction."""
+
+    frozen = False
+
+    def __setattr__(self, name, value):
+        if self.frozen:
+            raise AssertionError("Serialization assigned " + name)
+        super().__setattr__(name, value)
+
+
+def nested_submodel():
+    inner = WatchedCollection(id_short="Inner", value=[
+        aas_types.Property(id_short="Leaf", value_type=aas_types.DataTypeDefXSD.INT, value="1"),
+    ])
+    outer = WatchedCollection(id_short="Outer", value=[inner])
+    entity = aas_types.Entity(
+        id_short="Entity", entity_type=aas_types.EntityType.SELF_MANAGED_ENTITY, statements=[
+            aas_types.Property(id_short="Statement", value_type=aas_types.DataTypeDefXSD.INT, value="2"),
+        ], global_asset_id="urn:asset",
+    )
+    submodel = aas_types.Submodel(id="urn:submodel", id_short="Nested", submodel_elements=[outer, entity])
+    inner.frozen = outer.frozen = True
+    return submodel
+
+
+class TestDepthLimitedSerialization(unittest.TestCase):
+
+    def test_max_depth_zero_leaves_out_submodel_elements(self):
+        submodel = nested_submodel()
+        jsonable = aas_jsonization.to_jsonable(submodel, max_depth=0)
+        self.assertNotIn("submodelElements", jsonable)
+        self.assertEqual(jsonable["idShort"], "Nested")
+        self.assertNotIn("submodelElements", aas_xmlization.to_str(submodel, max_depth=0))
+
+    def test_max_depth_one_is_level_core(self):
+        jsonable = aas_jsonization.to_jsonable(nested_submodel(), max_depth=1)
+        outer, entity = jsonable["submodelElements"]
+        self.assertEqual(outer["idShort"], "Outer")
+        self.assertNotIn("value", outer)
+        self.assertNotIn("statements", entity)
+
+    def test_max_depth_two_keeps_one_more_level(self):
+        jsonable = aas_jsonization.to_jsonable(nested_submodel(), max_depth=2)
+        outer = jsonable["submodelElements"][0]
+        self.assertEqual(outer["value"][0]["idShort"], "Inner")
+        self.assertNotIn("value", outer["value"][0])
+
+    def test_element_depth_is_relative_to_the_element(self):
+        outer = nested_submodel().submodel_elements[0]
+        self.assertNotIn("value", aas_jsonization.to_jsonable(outer, max_depth=0))
+        self.assertNotIn("value", aas_jsonization.to_jsonable(outer, max_depth=1)["value"][0])
+
+    def test_unlimited_matches_plain_serialization(self):
+        submodel = nested_submodel()
+        self.assertEqual(aas_jsonization.to_jsonable(submodel, max_depth=10), aas_jsonization.to_jsonable(submodel))
+        self.assertEqual(aas_xmlization.to_str(submodel, max_depth=10), aas_xmlization.to_str(submodel))
+
+    def test_instances_are_not_modified(self):
+        # WatchedCollection raises on any assignment while serializing
+        submodel = nested_submodel()
+        for max_depth in (0, 1, 2):
+            aas_jsonization.to_jsonable(submodel, max_depth=max_depth)
+            aas_xmlization.to_str(submodel, max_depth=max_depth)
+        self.assertEqual(len(submodel.submodel_elements[0].value), 1)
+
+    def test_storage_backed_records_keep_their_value(self):
+        chiller = Chiller()
+        time_series = [submodel for submodel in chiller.submodels if submodel.id_short == "TimeSeries"][0]
+        records = find_records_collection(time_series)[1]
+        records.append_row((1, 1, 2, 3, 4, 5, 6, 7, 8, 9))
+        before = len(records.value)
+        for max_depth in (1, None):
+            aas_jsonization.to_jsonable(time_series, max_depth=max_depth)
+        self.assertEqual(len(records.value), before)
+        self.assertEqual(records.fixed_elements[0].id_short, "Record")
+
+
+def chiller_with_records():
+    chiller = Chiller()
+    time_series = [submodel for submodel in chiller.submodels if submodel.id_short == "TimeSeries"][0]
+    records = find_records_collection(time_series)[1]
+    for time in range(3):
+        records.append_row((time, 1.5, 2, 3, 4, 5, 6, 7, 8, 9))
+    # Strings that need escaping
+    chiller.submodels[0].submodel_elements[0].value = 'Quote " backslash \\ newline \n umlaut \u00fc'
+    return chiller
+
+
+class TestStreamingWriter(unittest.TestCase):
+
+    def test_written_text_equals_json_dumps(self):
+        chiller = chiller_with_records()
+        expected = json.dumps(aas_jsonization.to_jsonable(chiller))
+        for buffer_size in (1, 64, 512, 1 << 20):
+            stream = io.StringIO()
+            aas_jsonization.write(chiller, stream, buffer_size)
+            self.assertEqual(stream.getvalue(), expected)
+
+    def test_chunks_hold_at_least_chunk_size(self):
+        chiller = chiller_with_records()
+        chunks = list(aas_jsonization.iterate(chiller, 256))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), 256)
+        self.assertEqual("".join(chunks), json.dumps(aas_jsonization.to_jsonable(chiller)))
+
+    def test_single_elements(self):
+        element = nested_submodel().submodel_elements[0]
+        self.assertEqual("".join(aas_jsonization.iterate(element)),
+                         json.dumps(aas_jsonization.to_jsonable(element)))
+
+
+class TestJsonBytesEncoder(unittest.TestCase):
+
+    def assert_encodes_like_json_dumps(self, instance):
+        self.assertEqual(aas_jsonization.to_json_bytes(instance),
+                         json.dumps(aas_jsonization.to_jsonable(instance)).encode("utf-8"))
+
+    def test_environment_is_byte_identical(self):
+        chiller = chiller_with_records()
+        self.assert_encodes_like_json_dumps(chiller)
+        for submodel in chiller.submodels:
+            self.assert_encodes_like_json_dumps(submodel)
+            for element in submodel.submodel_elements:
+                self.assert_encodes_like_json_dumps(element)
+        for concept_description in chiller.concept_descriptions or []:
+            self.assert_encodes_like_json_dumps(concept_description)
+
+    def test_derived_classes_are_encoded_as_their_base(self):
+        # WatchedCollection and the storage backed records are subclasses of aas_types classes
+        self.assert_encodes_like_json_dumps(nested_submodel())
+
+    def test_output_is_valid_utf8_json(self):
+        encoded = aas_jsonization.to_json_bytes(chiller_with_records())
+        json.loads(encoded.decode("utf-8"), parse_constant=self.fail)
+
+
+if __name__ == '__main__':
+    unittest.main()
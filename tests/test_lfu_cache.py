@@ -0,0 +1,73 @@
+import unittest
+
+from aas_api.lfu_cache import LFUCache
+
+
+class TestLFUCache(unittest.TestCase):
+
+    def test_evicts_least_frequently_used(self):
+        cache = LFUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_ties_evict_least_recently_used(self):
+        cache = LFUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.get("b")
+        cache.put("c", 3)
+        self.assertFalse(cache.exists("a"))
+        self.assertTrue(cache.exists("b"))
+
+    def test_put_updates_value_and_frequency(self):
+        cache = LFUCache(2)
+        cache.put("a", 1)
+        cache.put("a", 2)
+        cache.put("b", 3)
+        cache.put("c", 4)
+        self.assertEqual(cache.get("a"), 2)
+        self.assertFalse(cache.exists("b"))
+
+    def test_remove_and_clear(self):
+        cache = LFUCache(3)
+        for key in "abc":
+            cache.put(key, key)
+        cache.get("a")
+        cache.remove("a")
+        cache.remove("missing")
+        self.assertEqual(sorted(cache.keys()), ["b", "c"])
+        cache.put("d", "d")
+        cache.put("e", "e")
+        self.assertEqual(len(cache), 3)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.put("f", "f")
+        self.assertEqual(cache.get("f"), "f")
+
+    def test_zero_capacity_caches_nothing(self):
+        cache = LFUCache(0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_decay_lets_old_favourites_age_out(self):
+        cache = LFUCache(2, decay_interval=4)
+        cache.put("old", 1)
+        for _ in range(7):
+            cache.get("old")
+        # Halved twice on the way, "old" ends up as frequent as the new entry
+        cache.put("new", 2)
+        for _ in range(3):
+            cache.get("new")
+        cache.put("next", 3)
+        self.assertTrue(cache.exists("new"))
+        self.assertFalse(cache.exists("old"))
+
+
+if __name__ == '__main__':
+    unittest.main()
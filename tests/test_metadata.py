@@ -0,0 +1,64 @@
+import json
+import unittest
+
+import aas_core3.types as aas_types
+import aas_core3.jsonization as aas_jsonization
+
+from aas_api.aas_api import AasApi
+from aas_templates.chiller import Chiller
+from aas_util.metadata import to_metadata
+
+VALUE_KEYS = ("value", "valueId", "min", "max", "first", "second", "globalAssetId", "specificAssetIds", "observed")
+
+
+def elements_of(jsonable):
+    """Yields every element of a jsonable submodel or element, depth first."""
+    yield jsonable
+    for key in ("submodelElements", "value", "statements", "annotations"):
+        children = jsonable.get(key)
+        if isinstance(children, list):
+            for child in children:
+                if isinstance(child, dict) and "modelType" in child:
+                    yield from elements_of(child)
+
+
+class TestMetadata(unittest.TestCase):
+
+    def test_values_are_left_out(self):
+        chiller = Chiller()
+        for submodel in chiller.submodels:
+            for element in elements_of(to_metadata(submodel)):
+                if element["modelType"] in ("SubmodelElementCollection", "SubmodelElementList"):
+                    continue
+                for key in VALUE_KEYS:
+                    self.assertNotIn(key, element, element.get("idShort"))
+
+    def test_structure_is_kept(self):
+        for submodel in Chiller().submodels:
+            metadata = [(element["modelType"], element.get("idShort")) for element in elements_of(to_metadata(submodel))]
+            full = [(element["modelType"], element.get("idShort"))
+                    for element in elements_of(aas_jsonization.to_jsonable(submodel))]
+            self.assertEqual(metadata, full)
+
+    def test_property_keeps_its_type(self):
+        element = aas_types.Property(id_short="Speed", value_type=aas_types.DataTypeDefXSD.DOUBLE, value="1.5")
+        self.assertEqual(to_metadata(element), {"idShort": "Speed", "valueType": "xs:double", "modelType": "Property"})
+
+    def test_cached_until_structure_changes(self):
+        api = AasApi(Chiller())
+        metadata = api.get_submodel(None, "TimeSeries", "$metadata")
+        element_metadata = api.get_submodel_element_by_path(None, "TimeSeries", "Segments", "$metadata")
+
+        api.patch_submodel_elements_bulk(None, {"WifiAccessPoint.SSID": "Changed"})
+        api.submodel_changed(api.get_submodel_by_identifier("TimeSeries"), structural=False)
+        self.assertIs(api.get_submodel(None, "TimeSeries", "$metadata"), metadata)
+        self.assertIs(api.get_submodel_element_by_path(None, "TimeSeries", "Segments", "$metadata"), element_metadata)
+
+        api.add_record_to_time_series(1, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+        changed = api.get_submodel(None, "TimeSeries", "$metadata")
+        self.assertNotEqual(changed, metadata)
+        self.assertEqual(json.loads(changed), to_metadata(api.get_submodel_by_identifier("TimeSeries")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+import aas_core3.types as aas_types
+
+from aas_api.aas_api import AasApi
+from aas_api.submodel_registry import SubmodelRegistry, base64url_encode, base64url_decode
+from aas_templates.chiller import Chiller
+
+
+def submodel(id_short, identifier=None):
+    return aas_types.Submodel(id=identifier or "urn:" + id_short, id_short=id_short)
+
+
+class TestSubmodelRegistry(unittest.TestCase):
+
+    def test_base64url_round_trip(self):
+        for text in ("", "a", "id:embedded_system:aaabbbccc:wifi", "ü?>"):
+            encoded = base64url_encode(text)
+            self.assertNotIn("=", encoded)
+            self.assertEqual(base64url_decode(encoded), text)
+        with self.assertRaises(ValueError):
+            base64url_decode("a")
+
+    def test_resolves_every_key(self):
+        first = submodel("First")
+        registry = SubmodelRegistry([first, submodel("Second")])
+        for key in ("First", "urn:First", base64url_encode("First"), base64url_encode("urn:First")):
+            self.assertIs(registry.get(key), first)
+        self.assertIsNone(registry.get("Third"))
+        self.assertFalse(registry.exists("Third"))
+
+    def test_first_submodel_wins_shared_keys(self):
+        first, second = submodel("Shared", "urn:1"), submodel("Shared", "urn:2")
+        submodels = [first, second]
+        registry = SubmodelRegistry(submodels)
+        self.assertIs(registry.get("Shared"), first)
+        submodels.remove(first)
+        registry.remove(first)
+        self.assertIs(registry.get("Shared"), second)
+        self.assertIsNone(registry.get("urn:1"))
+
+    def test_sync_picks_up_direct_changes(self):
+        submodels = [submodel("First")]
+        registry = SubmodelRegistry(submodels)
+
+        submodels.append(submodel("Second"))
+        registry.sync(submodels)
+        self.assertIs(registry.get("Second"), submodels[1])
+
+        del submodels[0]
+        registry.sync(submodels)
+        self.assertIsNone(registry.get("First"))
+
+        replacement = submodel("Second", "urn:other")
+        submodels[0] = replacement
+        registry.sync(submodels)
+        self.assertIs(registry.get("Second"), replacement)
+
+        other_list = [submodel("Other")]
+        registry.sync(other_list)
+        self.assertIs(registry.get("Other"), other_list[0])
+        self.assertIsNone(registry.get("Second"))
+
+    def test_submodel_replaced_with_other_keys(self):
+        submodels = [submodel("First"), submodel("Second")]
+        registry = SubmodelRegistry(submodels)
+        replacement = submodel("Renamed")
+        submodels[1] = replacement
+        registry.sync(submodels)
+        # Found without looking up the old key first
+        self.assertIs(registry.get("Renamed"), replacement)
+        self.assertIs(registry.get(base64url_encode("urn:Renamed")), replacement)
+        self.assertIsNone(registry.get("Second"))
+        self.assertIs(registry.get("First"), submodels[0])
+
+    def test_submodel_renamed_in_place(self):
+        submodels = [submodel("First")]
+        registry = SubmodelRegistry(submodels)
+        submodels[0].id_short = "Renamed"
+        self.assertIs(registry.get("Renamed"), submodels[0])
+        self.assertIsNone(registry.get("Missing"))
+
+    def test_api_resolves_after_put_and_delete(self):
+        api = AasApi(Chiller())
+        old = api.get_submodel_by_identifier("WifiAccessPoint")
+        self.assertIs(api.get_submodel_by_identifier(base64url_encode(old.id)), old)
+
+        api.aas.submodels.append(submodel("Appended"))
+        self.assertTrue(api.does_submodel_exist("Appended"))
+
+        class Request:
+            body = '{"id": "urn:wifi", "idShort": "WifiAccessPoint", "modelType": "Submodel"}'
+
+        api.put_submodel(Request(), "WifiAccessPoint")
+        self.assertEqual(api.get_submodel_by_identifier("WifiAccessPoint").id, "urn:wifi")
+        self.assertIsNone(api.get_submodel_by_identifier(old.id))
+
+        api.delete_submodel(None, "WifiAccessPoint")
+        self.assertFalse(api.does_submodel_exist("WifiAccessPoint"))
+        self.assertIsNone(api.get_submodel_from_id_short_path("WifiAccessPoint.SSID"))
+
+
+    def test_api_finds_submodel_replaced_in_place(self):
+        api = AasApi(Chiller())
+        self.assertIsNotNone(api.get_submodel_by_identifier("WifiAccessPoint"))
+        position = api.aas.submodels.index(api.get_submodel_by_identifier("WifiAccessPoint"))
+        replacement = submodel("Network")
+        api.aas.submodels[position] = replacement
+        self.assertIs(api.get_submodel_by_identifier("Network"), replacement)
+        self.assertIsNone(api.get_submodel_by_identifier("WifiAccessPoint"))
+
+if __name__ == '__main__':
+    unittest.main()
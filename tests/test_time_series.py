@@ -0,0 +1,631 @@
+import calendar
+import json
+import os
+import statistics
+import tempfile
+import unittest
+from unittest import mock
+
+import aas_core3.types as aas_types
+
+from submodel_templates import time_series_aggregation, time_series_log
+from submodel_templates.time_series import RecordsCollection
+from submodel_templates.time_series_aggregation import aggregate
+from submodel_templates.time_series_export import csv_lines, ndjson_lines, iterate_rows
+from submodel_templates.time_series_log import FileLogStorage
+from submodel_templates.time_series_retention import RetentionPolicy
+from submodel_templates.time_series_statistics import RunningStatistics, StatisticsCollection
+from submodel_templates.time_series_storage import TimeSeriesVariable, RingBufferStorage, CompressedStorage, \
+    parse_timestamp
+
+
+def variables():
+    return [
+        TimeSeriesVariable("time", "Time", aas_types.DataTypeDefXSD.LONG),
+        TimeSeriesVariable("temperature", "Temperature"),
+        TimeSeriesVariable("flag", "Flag", aas_types.DataTypeDefXSD.INT),
+    ]
+
+
+def row(time):
+    return time, time + 0.5, time % 2
+
+
+
+class TestParseTimestamp(unittest.TestCase):
+
+    def test_numbers_are_kept(self):
+        self.assertEqual(parse_timestamp(1704067200), 1704067200)
+        self.assertEqual(parse_timestamp("-5"), -5)
+
+    def test_iso8601_is_converted_to_epoch_seconds(self):
+        for year, month, day, hour, minute, second in ((1970, 1, 1, 0, 0, 0), (2024, 1, 1, 0, 0, 0),
+                                                       (2024, 2, 29, 23, 59, 59), (2000, 3, 1, 12, 30, 5),
+                                                       (1900, 2, 28, 1, 2, 3), (2100, 12, 31, 0, 0, 1)):
+            expected = calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0))
+            text = "%04d-%02d-%02dT%02d:%02d:%02d" % (year, month, day, hour, minute, second)
+            self.assertEqual(parse_timestamp(text + "Z"), expected)
+            self.assertEqual(parse_timestamp(text), expected)
+        self.assertEqual(parse_timestamp("2024-01-01T01:00:00+01:00"), 1704067200)
+        self.assertEqual(parse_timestamp("2023-12-31T19:30:00.999-04:30"), 1704067200)
+        self.assertEqual(parse_timestamp("2024-01-01 00:00Z"), 1704067200)
+        self.assertEqual(parse_timestamp("2024-01-01"), 1704067200)
+
+    def test_invalid_timestamps(self):
+        for text in ("", "now", "1.5", "2024-13-01T00:00:00Z", "2024-01-01T24:00:00Z", "2024-1-1T00:00:00Z",
+                     "2024-01-01T00Z", "2024-01-01T00:00:00+0100"):
+            with self.assertRaises(ValueError):
+                parse_timestamp(text)
+
+class TestRingBufferStorage(unittest.TestCase):
+
+    def test_rows_are_parsed_per_variable(self):
+        storage = RingBufferStorage(variables(), capacity=3)
+        storage.append(("1", "2.5", "1"))
+        self.assertEqual(storage.row(0), (1, 2.5, 1))
+        self.assertIsInstance(storage.row(0)[0], int)
+        self.assertIsInstance(storage.row(0)[1], float)
+
+    def test_oldest_rows_are_evicted(self):
+        storage = RingBufferStorage(variables(), capacity=3)
+        evicted = [storage.append(row(time)) for time in range(5)]
+        self.assertEqual(evicted, [False, False, False, True, True])
+        self.assertEqual(len(storage), 3)
+        self.assertEqual(list(storage.rows()), [row(2), row(3), row(4)])
+        self.assertEqual(list(storage.rows(1, 2)), [row(3)])
+        self.assertEqual([storage.sequence_at(position) for position in range(3)], [2, 3, 4])
+
+    def test_invalid_row_leaves_the_storage_unchanged(self):
+        storage = RingBufferStorage(variables(), capacity=2)
+        for time in range(2):
+            storage.append(row(time))
+        for invalid in ((2, "warm", 0), ("now", 1.0, 0), (2, 1.0)):
+            with self.assertRaises((ValueError, IndexError)):
+                storage.append(invalid)
+        self.assertEqual(list(storage.rows()), [row(0), row(1)])
+        self.assertEqual(storage.sequence_at(0), 0)
+
+    def test_version_changes_with_every_append(self):
+        storage = RingBufferStorage(variables(), capacity=2)
+        versions = set()
+        for time in range(4):
+            storage.append(row(time))
+            versions.add(storage.version)
+        self.assertEqual(len(versions), 4)
+
+    def test_resize_keeps_the_newest_rows(self):
+        storage = RingBufferStorage(variables(), capacity=4)
+        for time in range(6):
+            storage.append(row(time))
+        storage.resize(2)
+        self.assertEqual(list(storage.rows()), [row(4), row(5)])
+        self.assertEqual(storage.sequence_at(0), 4)
+        storage.resize(5)
+        for time in range(6, 9):
+            storage.append(row(time))
+        self.assertEqual(list(storage.rows()), [row(time) for time in range(4, 9)])
+        self.assertEqual(storage.sequence_at(0), 4)
+
+    def test_zero_capacity_stores_nothing(self):
+        storage = RingBufferStorage(variables(), capacity=0)
+        self.assertFalse(storage.append(row(1)))
+        self.assertEqual(len(storage), 0)
+
+    def test_clear_keeps_counting_sequences(self):
+        storage = RingBufferStorage(variables(), capacity=3)
+        for time in range(2):
+            storage.append(row(time))
+        storage.clear()
+        storage.append(row(7))
+        self.assertEqual(list(storage.rows()), [row(7)])
+        self.assertEqual(storage.sequence_at(0), 2)
+
+    def test_extend_equals_appending_row_by_row(self):
+        for start, batch in ((0, 2), (2, 3), (1, 7)):
+            appended = RingBufferStorage(variables(), capacity=4)
+            extended = RingBufferStorage(variables(), capacity=4)
+            for time in range(start):
+                appended.append(row(time))
+                extended.append(row(time))
+            rows = [row(time) for time in range(start, start + batch)]
+            evicted = sum(appended.append(added) for added in rows)
+            self.assertEqual(extended.extend(rows), evicted)
+            self.assertEqual(list(extended.rows()), list(appended.rows()))
+            self.assertEqual(extended.sequence_at(0), appended.sequence_at(0))
+
+    def test_extend_columns(self):
+        storage = RingBufferStorage(variables(), capacity=4)
+        storage.extend_columns([[1, 2], ["1.5", "2.5"], [1, 0]])
+        self.assertEqual(list(storage.rows()), [(1, 1.5, 1), (2, 2.5, 0)])
+
+    def test_invalid_batches_leave_the_storage_unchanged(self):
+        storage = RingBufferStorage(variables(), capacity=4)
+        storage.append(row(0))
+        version = storage.version
+        for rows in ([row(1), (2, 2.5)], [row(1), (2, "warm", 0)]):
+            with self.assertRaises(ValueError):
+                storage.extend(rows)
+        with self.assertRaises(ValueError):
+            storage.extend_columns([[1, 2], [1.5]])
+        with self.assertRaises(ValueError):
+            storage.extend_columns([[1], [1.5]])
+        self.assertEqual(list(storage.rows()), [row(0)])
+        self.assertEqual(storage.version, version)
+
+
+class TestRecordsCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.placeholder = aas_types.Property(id_short="Record", value_type=aas_types.DataTypeDefXSD.STRING)
+        self.records = RecordsCollection(RingBufferStorage(variables(), capacity=3), id_short="Records",
+                                         value=[self.placeholder])
+
+    def test_value_holds_the_fixed_elements_and_one_view_per_row(self):
+        for time in range(2):
+            self.records.append_row(row(time))
+        value = self.records.value
+        self.assertIs(value[0], self.placeholder)
+        self.assertEqual(len(value), 3)
+        self.assertEqual([(prop.id_short, prop.value) for prop in value[2].value],
+                         [("Time", "1"), ("Temperature", "1.5"), ("Flag", "1")])
+
+    def test_views_are_not_kept(self):
+        for time in range(3):
+            self.records.append_row(row(time))
+        views = list(self.records.value)
+        self.assertEqual([view.sequence for view in views[1:]], [0, 1, 2])
+        self.assertIsNot(self.records.value[1], views[1])
+        self.assertIsNot(self.records.view(0), self.records.view(0))
+        self.assertFalse(hasattr(self.records, "_views"))
+
+    def test_value_is_read_from_the_storage(self):
+        for time in range(5):
+            self.records.append_row(row(time))
+        value = self.records.value
+        self.assertEqual(len(value), 4)
+        self.assertEqual([view.sequence for view in value[1:]], [2, 3, 4])
+        self.assertEqual(value[-1].value[0].value, "4")
+        self.assertEqual([view.sequence for view in value[2:]], [3, 4])
+        with self.assertRaises(IndexError):
+            value[4]
+        self.records.append_row(row(5))
+        self.assertEqual(value[-1].value[0].value, "5")
+
+    def test_evicted_views_keep_their_values(self):
+        self.records.append_row(row(0))
+        view = self.records.value[1]
+        for time in range(1, 5):
+            self.records.append_row(row(time))
+        self.assertEqual(view.value[0].value, "0")
+        self.assertNotIn(view, self.records.value)
+
+    def test_value_setter_replaces_the_fixed_elements(self):
+        self.records.append_row(row(0))
+        self.records.value = []
+        self.assertEqual(len(self.records.value), 1)
+        self.assertEqual(len(self.records.storage), 1)
+
+
+def filled_storage(times, capacity=64):
+    storage = RingBufferStorage(variables(), capacity)
+    for time in times:
+        storage.append((time, (time * 7) % 11 - 3.5, time % 3))
+    return storage
+
+
+class TestAggregation(unittest.TestCase):
+
+    def expected(self, storage, interval, start=None, end=None):
+        """The buckets computed the obvious way."""
+        buckets = {}
+        origin = 0 if start is None else start
+        for time, temperature, flag in storage.rows():
+            if (start is None or time >= start) and (end is None or time < end):
+                buckets.setdefault(origin + (time - origin) // interval * interval, []).append((temperature, flag))
+        result = []
+        for bucket_start in sorted(buckets):
+            rows = buckets[bucket_start]
+            values = {}
+            for name, column in (("temperature", [row[0] for row in rows]), ("flag", [row[1] for row in rows])):
+                values[name] = {"min": min(column), "max": max(column), "mean": sum(column) / len(column),
+                                "last": column[-1]}
+            result.append({"start": bucket_start, "end": bucket_start + interval, "count": len(rows),
+                           "values": values})
+        return result
+
+    def assert_buckets_equal(self, buckets, expected):
+        self.assertEqual(len(buckets), len(expected))
+        for bucket, expected_bucket in zip(buckets, expected):
+            self.assertEqual({key: bucket[key] for key in ("start", "end", "count")},
+                             {key: expected_bucket[key] for key in ("start", "end", "count")})
+            for name, statistics in expected_bucket["values"].items():
+                for key, value in statistics.items():
+                    self.assertAlmostEqual(bucket["values"][name][key], value)
+
+    def aggregate_both_ways(self, *args, **kwargs):
+        """Aggregates with the pure Python path and, where NumPy is installed, with the NumPy one."""
+        with mock.patch.object(time_series_aggregation, "np", None):
+            results = [aggregate(*args, **kwargs)]
+        if time_series_aggregation.np is not None:
+            results.append(aggregate(*args, **kwargs))
+        return results
+
+    def test_buckets_match_manual_computation(self):
+        # 70 rows in a capacity of 64, so the rows wrap around the end of the columns
+        storage = filled_storage([time * 3 for time in range(70)])
+        for interval, start, end in ((10, None, None), (25, 31, 170), (7, None, 100), (1000, None, None)):
+            for buckets in self.aggregate_both_ways(storage, interval, start, end):
+                self.assert_buckets_equal(buckets, self.expected(storage, interval, start, end))
+
+    def test_empty_buckets_are_left_out(self):
+        storage = filled_storage([0, 1, 50, 51])
+        for buckets in self.aggregate_both_ways(storage, 10):
+            self.assertEqual([(bucket["start"], bucket["count"]) for bucket in buckets], [(0, 2), (50, 2)])
+            self.assertEqual(aggregate(storage, 10, 2, 50), [])
+
+    def test_selected_variables(self):
+        storage = filled_storage(range(5))
+        for buckets in self.aggregate_both_ways(storage, 10, names=["Flag"]):
+            self.assertEqual(list(buckets[0]["values"]), ["flag"])
+        for names in (["Missing"], ["time", "Missing"]):
+            with self.assertRaises(ValueError):
+                aggregate(storage, 10, names=names)
+        with self.assertRaises(ValueError):
+            aggregate(storage, 0)
+
+    def test_non_finite_statistics_are_null(self):
+        storage = RingBufferStorage(variables(), 8)
+        for time, temperature in ((0, 1.0), (1, float("nan")), (2, 2.0), (10, float("inf")), (11, 3.0), (20, 4.0)):
+            storage.append((time, temperature, 0))
+        for buckets in self.aggregate_both_ways(storage, 10, names=["temperature"]):
+            statistics = [bucket["values"]["temperature"] for bucket in buckets]
+            self.assertEqual(statistics[0], {"min": None, "max": None, "mean": None, "last": 2.0})
+            self.assertEqual(statistics[1], {"min": 3.0, "max": None, "mean": None, "last": 3.0})
+            self.assertEqual(statistics[2], {"min": 4.0, "max": 4.0, "mean": 4.0, "last": 4.0})
+            json.dumps(buckets, allow_nan=False)
+
+
+class TestCompressedStorage(unittest.TestCase):
+
+    def assert_same_rows(self, first, second):
+        # Compares NaN by its bits, so NaN equals NaN
+        self.assertEqual([repr(row) for row in first], [repr(row) for row in second])
+
+    def test_round_trip_is_exact(self):
+        special = (float("nan"), float("inf"), float("-inf"), -0.0, 1e-300, 1.7976931348623157e308)
+        # Regular intervals, small and large jumps and deltas that only fit 64 bits with wrap around
+        times = [-1000 + index * 10 + (1000003 if index > 100 else 0) for index in range(200)]
+        times += [2 ** 62, -2 ** 63, 2 ** 63 - 1, 0, -(1 << 40), 5]
+        times += [times[-1] + index * 3 for index in range(1, 95)]
+        rows = [(time, special[index % len(special)] if index % 3 == 0 else index * 0.1,
+                 -index * 12345678901 if index % 2 else index)
+                for index, time in enumerate(times)]
+        compressed = CompressedStorage(variables(), capacity=1000, block_size=16)
+        for added in rows:
+            compressed.append(added)
+        self.assertGreater(len(compressed.blocks), 1)
+        self.assert_same_rows(compressed.rows(), rows)
+        self.assert_same_rows([compressed.row(position) for position in (0, 17, 299)], [rows[0], rows[17], rows[299]])
+
+    def test_behaves_like_the_ring_buffer(self):
+        compressed = CompressedStorage(variables(), capacity=50, block_size=8)
+        ring_buffer = RingBufferStorage(variables(), capacity=50)
+        for time in range(130):
+            self.assertEqual(compressed.append(row(time)), ring_buffer.append(row(time)))
+        self.assertEqual(compressed.extend([row(time) for time in range(130, 140)]),
+                         ring_buffer.extend([row(time) for time in range(130, 140)]))
+        self.assertEqual(list(compressed.rows()), list(ring_buffer.rows()))
+        self.assertEqual(compressed.sequence_at(0), ring_buffer.sequence_at(0))
+        for start, end in ((None, None), (95, 120), (0, 93), (139, None), (200, None), (100, 100)):
+            self.assertEqual(compressed.time_range(start, end), ring_buffer.time_range(start, end))
+
+    def test_evicted_blocks_are_released(self):
+        compressed = CompressedStorage(variables(), capacity=20, block_size=8)
+        for time in range(100):
+            compressed.append(row(time))
+        self.assertEqual(len(compressed), 20)
+        self.assertLessEqual(len(compressed.blocks), 3)
+        self.assertEqual(list(compressed.rows()), [row(time) for time in range(80, 100)])
+
+    def test_batch_larger_than_capacity(self):
+        compressed = CompressedStorage(variables(), capacity=10, block_size=4)
+        compressed.append(row(0))
+        self.assertEqual(compressed.extend([row(time) for time in range(1, 21)]), 11)
+        self.assertEqual(list(compressed.rows()), [row(time) for time in range(11, 21)])
+        self.assertEqual(compressed.sequence_at(0), 11)
+
+    def test_drop_oldest_and_resize(self):
+        compressed = CompressedStorage(variables(), capacity=100, block_size=4)
+        for time in range(30):
+            compressed.append(row(time))
+        compressed.drop_oldest(9)
+        self.assertEqual(compressed.sequence_at(0), 9)
+        self.assertEqual(compressed.row(0), row(9))
+        compressed.resize(5)
+        self.assertEqual(list(compressed.rows()), [row(time) for time in range(25, 30)])
+        compressed.clear()
+        self.assertEqual(len(compressed), 0)
+        self.assertEqual(compressed.sequence_at(0), 30)
+
+    def test_rows_decode_without_keeping_blocks(self):
+        compressed = CompressedStorage(variables(), capacity=30, block_size=4)
+        for time in range(41):
+            compressed.append(row(time))
+        self.assertEqual(list(compressed.rows()), [row(time) for time in range(11, 41)])
+        self.assertIsNone(compressed._decoded_block)
+        for start, end in ((0, 1), (1, 9), (3, 29), (27, 30), (29, None), (5, 5)):
+            self.assertEqual(list(compressed.rows(start, end)), [row(time) for time in range(11, 41)][start:end])
+        self.assertIsNone(compressed._decoded_block)
+        self.assertEqual(compressed.row(6), row(17))
+        self.assertEqual(list(compressed.rows(4, 8)), [row(time) for time in range(15, 19)])
+
+    def test_regular_samples_compress(self):
+        compressed = CompressedStorage(variables(), capacity=10000, block_size=64)
+        for time in range(1024):
+            compressed.append((time * 1000, 20.0, 1))
+        self.assertLess(compressed.encoded_size(), 1024 * 3 * 8 // 10)
+
+
+class TestFileLogStorage(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "records.log")
+
+    def open(self, capacity=None, storage_variables=None):
+        storage = FileLogStorage(storage_variables or variables(), self.path, capacity)
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_rows_survive_reopening(self):
+        storage = self.open()
+        for time in range(5):
+            storage.append(row(time))
+        storage.extend([row(time) for time in range(5, 8)])
+        storage.close()
+
+        reopened = self.open()
+        self.assertEqual(list(reopened.rows()), [row(time) for time in range(8)])
+        reopened.append(row(8))
+        self.assertEqual(reopened.sequence_at(len(reopened) - 1), 8)
+        self.assertEqual(reopened.row(8), row(8))
+
+    def test_reopening_after_a_torn_row(self):
+        storage = self.open()
+        storage.extend([row(time) for time in range(3)])
+        storage.close()
+        with open(self.path, "ab") as file:
+            # The first bytes of a row that was never finished
+            file.write(b"\x01\x02\x03")
+
+        reopened = self.open()
+        self.assertEqual(len(reopened), 3)
+        reopened.append(row(3))
+        self.assertEqual(reopened.sequence_at(3), 3)
+        self.assertEqual(list(reopened.rows()), [row(time) for time in range(4)])
+        reopened.close()
+        self.assertEqual(list(self.open().rows()), [row(time) for time in range(4)])
+
+    def test_other_variables_are_rejected(self):
+        self.open().append(row(0))
+        with self.assertRaises(ValueError):
+            FileLogStorage(variables()[:2], self.path)
+        with open(self.path, "wb") as file:
+            file.write(b"not a log")
+        with self.assertRaises(ValueError):
+            FileLogStorage(variables(), self.path)
+
+    def test_capacity_limits_the_visible_rows(self):
+        storage = self.open(capacity=3)
+        self.assertEqual([storage.append(row(time)) for time in range(5)], [False, False, False, True, True])
+        self.assertEqual(list(storage.rows()), [row(2), row(3), row(4)])
+        self.assertEqual(storage.sequence_at(0), 2)
+        storage.close()
+
+        reopened = self.open(capacity=2)
+        self.assertEqual(list(reopened.rows()), [row(3), row(4)])
+        self.assertEqual(reopened.sequence_at(0), 3)
+        reopened.resize(None)
+        reopened.drop_oldest(1)
+        self.assertEqual(reopened.row(0), row(4))
+
+    def test_reads_without_mmap(self):
+        storage = self.open()
+        rows = [row(time) for time in range(150)]
+        storage.extend(rows)
+        storage.close()
+        with mock.patch.object(time_series_log, "mmap", None):
+            reopened = FileLogStorage(variables(), self.path)
+            self.addCleanup(reopened.close)
+            self.assertEqual(list(reopened.rows()), rows)
+            self.assertEqual(list(reopened.rows(70, 140)), rows[70:140])
+            self.assertEqual(reopened.time_range(100, 120), (100, 120))
+            reopened.append(row(150))
+            self.assertEqual(reopened.row(150), row(150))
+
+    def test_invalid_rows_are_not_written(self):
+        storage = self.open()
+        storage.append(row(0))
+        with self.assertRaises(ValueError):
+            storage.extend([row(1), (2, 2.5)])
+        with self.assertRaises(ValueError):
+            storage.extend_columns([[1], [1.5]])
+        self.assertEqual(list(storage.rows()), [row(0)])
+        self.assertEqual(os.path.getsize(self.path), storage.header_size + storage.row_size)
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = RingBufferStorage([
+            TimeSeriesVariable("time", "Time", aas_types.DataTypeDefXSD.LONG),
+            TimeSeriesVariable("temperature", 'Temperature, "C"'),
+        ], capacity=200)
+        for time in range(150):
+            self.storage.append((time, time / 4))
+
+    def test_csv(self):
+        lines = b"".join(csv_lines(self.storage, 10, 12)).decode("utf-8").split("\r\n")
+        self.assertEqual(lines, ['Time,"Temperature, ""C"""', "10,2.5", "11,2.75", ""])
+
+    def test_ndjson(self):
+        lines = b"".join(ndjson_lines(self.storage, 148)).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {"Time": 148, 'Temperature, "C"': 37.0}, {"Time": 149, 'Temperature, "C"': 37.25},
+        ])
+
+    def test_non_finite_values(self):
+        storage = RingBufferStorage(self.storage.variables, capacity=4)
+        for time, temperature in ((0, float("nan")), (1, float("inf")), (2, float("-inf")), (3, 1e-05)):
+            storage.append((time, temperature))
+        self.assertEqual(b"".join(csv_lines(storage)).decode("utf-8").split("\r\n")[1:],
+                         ["0,", "1,", "2,", "3,1e-05", ""])
+        values = [json.loads(line, parse_constant=self.fail)['Temperature, "C"']
+                  for line in b"".join(ndjson_lines(storage)).decode("utf-8").splitlines()]
+        self.assertEqual(values, [None, None, None, 1e-05])
+
+    def test_rows_appended_while_exporting_are_left_out(self):
+        exported = []
+        for row in iterate_rows(self.storage, 100):
+            exported.append(row[0])
+            if len(exported) == 1:
+                self.storage.append((150, 0.0))
+        self.assertEqual(exported, list(range(100, 150)))
+
+    def test_rows_evicted_while_exporting_are_skipped(self):
+        exported = []
+        for row in iterate_rows(self.storage):
+            exported.append(row[0])
+            if len(exported) == 1:
+                # Evicts the rows up to 99, the first 64 were read already
+                self.storage.drop_oldest(100)
+        self.assertEqual(exported, list(range(64)) + list(range(100, 150)))
+
+
+class TestRetentionPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetentionPolicy(variables(), raw_window=120, minute_capacity=200, hour_capacity=5)
+        self.records = RecordsCollection(RingBufferStorage(variables(), capacity=1000), id_short="Records",
+                                         retention=self.policy)
+
+    def samples(self, first, stop, step=10):
+        return [(time, (time * 13) % 17 - 4.0, time // 10 % 3) for time in range(first, stop, step)]
+
+    def expected_rollup(self, samples, start):
+        temperatures = [sample[1] for sample in samples]
+        flags = [sample[2] for sample in samples]
+        return (start, len(samples), min(temperatures), max(temperatures), sum(temperatures) / len(samples),
+                min(flags), max(flags), sum(flags) / len(samples))
+
+    def assert_rollups_equal(self, rows, expected):
+        self.assertEqual(len(rows), len(expected))
+        for stored, expected_row in zip(rows, expected):
+            self.assertEqual(stored[:4], expected_row[:4])
+            for stored_value, expected_value in zip(stored[4:], expected_row[4:]):
+                self.assertAlmostEqual(stored_value, expected_value)
+
+    def test_minute_rollups(self):
+        samples = self.samples(0, 3 * 60 + 10)
+        self.records.extend_rows(samples[:7])
+        for sample in samples[7:]:
+            self.records.append_row(sample)
+        # The bucket starting at 180 is still open
+        minute = self.policy.tiers[0].storage
+        self.assert_rollups_equal(list(minute.rows()), [
+            self.expected_rollup([sample for sample in samples if start <= sample[0] < start + 60], start)
+            for start in (0, 60, 120)
+        ])
+
+    def test_hour_rollups(self):
+        # The hour starting at 3600 is closed by the minute starting at 7200, which is closed at 7260
+        samples = self.samples(0, 2 * 3600 + 90, 30)
+        self.records.extend_rows(samples)
+        hour = self.policy.tiers[1].storage
+        self.assert_rollups_equal(list(hour.rows()), [
+            self.expected_rollup([sample for sample in samples if start <= sample[0] < start + 3600], start)
+            for start in (0, 3600)
+        ])
+
+    def test_raw_window_drops_old_records(self):
+        self.records.extend_rows(self.samples(0, 600))
+        raw = self.records.storage
+        self.assertEqual(raw.time_at(0), 470)
+        self.assertEqual(raw.time_at(len(raw) - 1), 590)
+        # The rollups still cover the dropped records
+        self.assertEqual(self.policy.tiers[0].storage.time_at(0), 0)
+
+    def test_changed_segments(self):
+        self.records.extend_rows(self.samples(0, 60))
+        self.assertEqual(self.policy.take_changed_segments(), [])
+        self.records.append_row((60, 1.0, 0))
+        self.assertEqual(self.policy.take_changed_segments(), ["MinuteRollupSegment"])
+        self.assertEqual(self.policy.take_changed_segments(), [])
+        self.records.append_row((3600, 1.0, 0))
+        self.records.append_row((3700, 1.0, 0))
+        self.assertEqual(self.policy.take_changed_segments(), ["MinuteRollupSegment", "HourRollupSegment"])
+
+    def test_rollup_segments(self):
+        segments = self.policy.segments()
+        self.assertEqual([segment.id_short for segment in segments], ["MinuteRollupSegment", "HourRollupSegment"])
+        self.assertIs(segments[0].storage, self.policy.tiers[0].storage)
+        self.assertEqual([variable.id_short for variable in segments[1].storage.variables][:5],
+                         ["Time", "Count", "Temperature Min", "Temperature Max", "Temperature Mean"])
+
+
+class TestRunningStatistics(unittest.TestCase):
+
+    def test_matches_the_statistics_module(self):
+        values = [((index * 37) % 23) * 1.5 - 7 for index in range(200)]
+        running = RunningStatistics(alpha=0.2)
+        ewma = values[0]
+        for value in values:
+            running.add(value)
+            ewma += 0.2 * (value - ewma)
+        self.assertEqual(running.count, len(values))
+        self.assertAlmostEqual(running.mean, statistics.mean(values))
+        self.assertAlmostEqual(running.variance, statistics.variance(values))
+        self.assertEqual((running.minimum, running.maximum), (min(values), max(values)))
+        self.assertAlmostEqual(running.ewma, ewma)
+
+    def test_few_samples(self):
+        running = RunningStatistics()
+        self.assertEqual((running.count, running.mean, running.variance, running.ewma), (0, None, None, None))
+        running.add(4)
+        self.assertEqual((running.mean, running.minimum, running.maximum, running.ewma), (4.0, 4, 4, 4.0))
+        self.assertIsNone(running.variance)
+        running.add(6)
+        self.assertEqual(running.variance, 2.0)
+
+    def test_properties_read_the_statistics(self):
+        collection = StatisticsCollection(variables())
+        records = RecordsCollection(RingBufferStorage(variables(), capacity=2), id_short="Records",
+                                    statistics=collection)
+        temperature = collection.value[0]
+        self.assertEqual(temperature.id_short, "Temperature")
+        mean = [prop for prop in temperature.value if prop.id_short == "Mean"][0]
+        self.assertIsNone(mean.value)
+        records.extend_rows([row(time) for time in range(4)])
+        records.append_row(row(4))
+        # Evicted records still count
+        self.assertEqual(mean.value, repr(2.5))
+        self.assertEqual(collection.statistics_of("flag").count, 5)
+        self.assertIs(collection.statistics_of("Flag"), collection.statistics_of("flag"))
+        self.assertIsNone(collection.statistics_of("time"))
+        mean.value = "1"
+        self.assertEqual(mean.value, repr(2.5))
+
+
+    def test_non_finite_statistics_are_xsd_values(self):
+        collection = StatisticsCollection(variables())
+        collection.records_added(None, [(0, 1.0, 1), (1, float("inf"), 2)])
+        temperature = {prop.id_short: prop.value for prop in collection.value[0].value}
+        self.assertEqual((temperature["Mean"], temperature["Max"], temperature["Min"]), ("INF", "INF", "1.0"))
+        collection.records_added(None, [(2, float("-inf"), 3)])
+        temperature = {prop.id_short: prop.value for prop in collection.value[0].value}
+        self.assertEqual((temperature["Mean"], temperature["Min"]), ("NaN", "-INF"))
+        self.assertEqual({prop.id_short: prop.value for prop in collection.value[1].value}["Mean"], "2.0")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import unittest
+
+import aas_core3.types as aas_types
+
+from aas_api.aas_api import AasApi
+from aas_templates.chiller import Chiller
+from aas_util.value_only import to_value_only, value_only, property_type_switch, lexical_value, NO_VALUE
+
+
+def double(id_short, value):
+    return aas_types.Property(id_short=id_short, value_type=aas_types.DataTypeDefXSD.DOUBLE, value=value)
+
+
+def operation(id_short):
+    return aas_types.Operation(id_short=id_short)
+
+
+class TestValueOnly(unittest.TestCase):
+
+    def test_typed_values(self):
+        self.assertEqual(property_type_switch(aas_types.DataTypeDefXSD.INT, "42"), 42)
+        self.assertEqual(property_type_switch(aas_types.DataTypeDefXSD.DOUBLE, "1.5"), 1.5)
+        self.assertIs(property_type_switch(aas_types.DataTypeDefXSD.BOOLEAN, "true"), True)
+        self.assertEqual(property_type_switch(aas_types.DataTypeDefXSD.STRING, "1"), "1")
+        # Values that do not parse stay strings
+        self.assertEqual(property_type_switch(aas_types.DataTypeDefXSD.INT, "NaN"), "NaN")
+
+    def test_lexical_values(self):
+        xsd = aas_types.DataTypeDefXSD
+        self.assertEqual(lexical_value(xsd.BYTE, -128), "-128")
+        self.assertEqual(lexical_value(xsd.UNSIGNED_SHORT, "65535"), "65535")
+        self.assertEqual(lexical_value(xsd.DOUBLE, 1), "1")
+        self.assertEqual(lexical_value(xsd.BOOLEAN, False), "false")
+        self.assertEqual(lexical_value(xsd.STRING, "text"), "text")
+        for option, value in ((xsd.BYTE, 128), (xsd.UNSIGNED_INT, -1), (xsd.POSITIVE_INTEGER, 0),
+                              (xsd.INT, 1.5), (xsd.INT, True), (xsd.DOUBLE, "abc"), (xsd.DOUBLE, None),
+                              (xsd.BOOLEAN, 1), (xsd.BOOLEAN, "yes"), (xsd.STRING, 1),
+                              (xsd.DECIMAL, float("nan")), (xsd.DECIMAL, "INF")):
+            with self.assertRaises(ValueError):
+                lexical_value(option, value)
+        for value, lexical in ((float("nan"), "NaN"), (float("inf"), "INF"), (float("-inf"), "-INF"),
+                               ("nan", "NaN"), ("-Infinity", "-INF"), ("INF", "INF")):
+            self.assertEqual(lexical_value(xsd.DOUBLE, value), lexical)
+            self.assertEqual(lexical_value(xsd.FLOAT, value), lexical)
+        # Every accepted value reads back as the original
+        for option, value in ((xsd.INT, 42), (xsd.DOUBLE, 2.5), (xsd.BOOLEAN, True)):
+            self.assertEqual(property_type_switch(option, lexical_value(option, value)), value)
+
+    def test_non_finite_floats_are_null(self):
+        collection = aas_types.SubmodelElementCollection(id_short="Values", value=[
+            double("NotANumber", "NaN"), double("Infinite", "INF"), double("NegativeInfinite", "-INF"),
+            double("Finite", "2.5"),
+        ])
+        encoded = json.dumps(value_only(collection), allow_nan=False)
+        self.assertEqual(json.loads(encoded), {"Values": {
+            "NotANumber": None, "Infinite": None, "NegativeInfinite": None, "Finite": 2.5,
+        }})
+
+    def test_elements_without_value_are_left_out(self):
+        collection = aas_types.SubmodelElementCollection(id_short="Collection", value=[
+            double("Value", "1"), operation("Operation"),
+        ])
+        element_list = aas_types.SubmodelElementList(
+            id_short="List", type_value_list_element=aas_types.AASSubmodelElements.SUBMODEL_ELEMENT,
+            value=[double(None, "1"), operation(None), double(None, "2")],
+        )
+        self.assertEqual(to_value_only(collection), {"Value": 1.0})
+        self.assertEqual(to_value_only(element_list), [1.0, 2.0])
+        self.assertIs(to_value_only(operation("Operation")), NO_VALUE)
+        self.assertEqual(value_only(operation("Operation")), {})
+
+    def test_submodel_value_is_strict_json(self):
+        api = AasApi(Chiller())
+        api.add_record_to_time_series(1, float("nan"), float("inf"), 3, 4, 5, 6, 7, 8, 9)
+        for identifier in ("TimeSeries", "WifiAccessPoint"):
+            json.loads(api.get_submodel(None, identifier, "$value"), parse_constant=self.fail)
+        records = json.loads(api.get_time_series_records_in_range(None, serialization_modifier="$value"),
+                             parse_constant=self.fail)
+        self.assertIsNone(records[-1]["Record"]["Circulation Fluid Temperature"])
+
+
+if __name__ == '__main__':
+    unittest.main()